@@ -0,0 +1,226 @@
+"""
+Benchmarks of the evaluation path on synthetic inputs. Every stage is run for the
+requested problem sizes, wall time and peak memory are appended to a history file
+(one JSON record per line) and compared to the previous runs on the same machine. The
+script exits with status 1 if a stage regressed beyond the threshold.
+
+Example:
+
+    python benchmarks/run_benchmarks.py --preset medium --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from synthetic import get_synthetic_profiles, write_synthetic_inputs
+
+from data.data_preparation import import_data, \
+    determine_usage_and_capacity_related_cost_contributions, \
+    determine_cost_reduction_by_purchase_of_pv
+from indicators import names_criteria
+from inputs import InputBundle
+from results import get_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# problem sizes as (scenarios, alternatives, profiles)
+PRESETS = {
+    "small": [(4, 4, 10)],
+    "medium": [(4, 4, 10), (100, 50, 1000)],
+    "large": [(4, 4, 10), (100, 50, 1000), (1000, 100, 10000),
+              (10000, 500, 100000)],
+}
+# absolute increase of wall time (seconds) and peak memory (bytes) that is tolerated
+# in addition to the relative threshold, stages of small problem sizes take only a
+# few milliseconds and vary by more than the threshold between runs
+TOLERANCES = {"wall_time": 0.05, "peak_memory": 2**20}
+STAGES = ["import_data", "get_results", "cost_contributions", "pv_cost_reduction"]
+
+
+def measure(func, repeat=3):
+    """
+    Wall time and peak memory of a function call. The time is the minimum over
+    <repeat> calls, the peak memory of the traced Python and NumPy allocations is
+    determined in a separate call, as tracing slows down the execution.
+
+    :param func: callable
+        called without arguments
+    :param repeat: int
+    :return: dict
+        "wall_time" in seconds and "peak_memory" in bytes
+    """
+    wall_times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        wall_times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"wall_time": min(wall_times), "peak_memory": peak_memory}
+
+
+def get_stages(data_dir, nr_scenarios, nr_alternatives, nr_profiles, stages=None):
+    """
+    Benchmarked stages for one problem size, synthetic inputs are only generated for
+    the selected stages.
+
+    :param stages: list of str or None (default)
+        stages to be run, defaults to all stages
+    :return: dict
+        functions without arguments per stage
+    """
+    if stages is None:
+        stages = STAGES
+    functions = {}
+    if set(stages) & {"import_data", "get_results", "cost_contributions"}:
+        file_path = write_synthetic_inputs(data_dir, nr_scenarios, nr_alternatives)
+        dt = import_data(file_path)
+        weights = pd.DataFrame([[1/3, 1/3, 1/6, 1/6]], columns=names_criteria())
+        scenario_names = [f"Scenario {scenario}" for scenario in dt.scenarios]
+        inputs = InputBundle(data_dir)
+        functions["import_data"] = lambda: import_data(file_path)
+        functions["get_results"] = lambda: get_results(
+            dt, nr_scenarios, nr_alternatives, weights, scenario_names, inputs)
+        functions["cost_contributions"] = \
+            lambda: determine_usage_and_capacity_related_cost_contributions(dt)
+    if "pv_cost_reduction" in stages:
+        profiles_base = get_synthetic_profiles(nr_profiles, scale=1.)
+        profiles_der = profiles_base - get_synthetic_profiles(
+            nr_profiles, scale=0.8, seed=1).to_numpy()
+        profiles_der[profiles_der < 0] = 0
+        functions["pv_cost_reduction"] = \
+            lambda: determine_cost_reduction_by_purchase_of_pv(
+                profiles_base, profiles_der, profiles_der, profiles_base, profiles_der,
+                profiles_der)
+    return {stage: functions[stage] for stage in stages}
+
+
+def read_history(history_file):
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def get_regressions(records, history, threshold, window=5, tolerances=None):
+    """
+    Compare new records to the median of the last <window> records of the same stage,
+    problem size and machine. A record regressed if it exceeds the reference by more
+    than the relative threshold plus the absolute tolerance.
+
+    :param records: list of dict
+    :param history: list of dict
+    :param threshold: float
+        relative increase of wall time or peak memory that is regarded as regression
+    :param window: int
+    :param tolerances: dict or None (default)
+        absolute increase of "wall_time" and "peak_memory" that is tolerated,
+        defaults to TOLERANCES
+    :return: list of str
+        descriptions of the regressions
+    """
+    tolerances = TOLERANCES if tolerances is None else tolerances
+    regressions = []
+    keys = ["stage", "scenarios", "alternatives", "profiles", "machine"]
+    for record in records:
+        previous = [r for r in history
+                    if all(r[key] == record[key] for key in keys)][-window:]
+        if not previous:
+            continue
+        for metric in ["wall_time", "peak_memory"]:
+            reference = float(np.median([r[metric] for r in previous]))
+            if record[metric] > (1 + threshold) * reference + tolerances[metric]:
+                regressions.append(
+                    f"{record['stage']} ({record['scenarios']} scenarios, "
+                    f"{record['alternatives']} alternatives, {record['profiles']} "
+                    f"profiles): {metric} {record[metric]:.4g} exceeds reference "
+                    f"{reference:.4g} by more than {threshold:.0%} and "
+                    f"{tolerances[metric]:.4g}")
+    return regressions
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, cwd=BENCHMARK_DIR,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--sizes", nargs="+", metavar="S,A,P",
+                        help="problem sizes as scenarios,alternatives,profiles, "
+                             "overrides the preset")
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        help="stages to be run, defaults to all stages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative increase regarded as regression")
+    parser.add_argument("--time-tolerance", type=float,
+                        default=TOLERANCES["wall_time"],
+                        help="absolute increase of wall time in seconds that is "
+                             "tolerated in addition to the threshold")
+    parser.add_argument("--memory-tolerance", type=float,
+                        default=TOLERANCES["peak_memory"] / 2**20,
+                        help="absolute increase of peak memory in MiB that is "
+                             "tolerated in addition to the threshold")
+    parser.add_argument("--history", default=os.path.join(BENCHMARK_DIR,
+                                                          "history.jsonl"))
+    parser.add_argument("--no-record", action="store_true",
+                        help="only compare, do not append to the history")
+    args = parser.parse_args(argv)
+    if args.sizes is None:
+        sizes = PRESETS[args.preset]
+    else:
+        sizes = [tuple(int(value) for value in size.split(",")) for size in args.sizes]
+    history = read_history(args.history)
+    commit = get_commit()
+    records = []
+    for nr_scenarios, nr_alternatives, nr_profiles in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            stages = get_stages(data_dir, nr_scenarios, nr_alternatives, nr_profiles,
+                                args.stages)
+            for stage, func in stages.items():
+                record = {"stage": stage, "scenarios": nr_scenarios,
+                          "alternatives": nr_alternatives, "profiles": nr_profiles,
+                          "machine": platform.node(), "commit": commit,
+                          "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                record.update(measure(func, args.repeat))
+                records.append(record)
+                print(f"{stage:>20} S={nr_scenarios:<6} A={nr_alternatives:<4} "
+                      f"P={nr_profiles:<7} {record['wall_time']:10.4f} s "
+                      f"{record['peak_memory'] / 2**20:10.1f} MiB")
+    regressions = get_regressions(
+        records, history, args.threshold,
+        tolerances={"wall_time": args.time_tolerance,
+                    "peak_memory": args.memory_tolerance * 2**20})
+    if not args.no_record:
+        with open(args.history, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "effnets"))
+
+from data.aggregation import INPUT_COLUMNS  # noqa: E402
+from data.data_preparation import Dataset, write_cache, get_cache_path  # noqa: E402
+
+# Generators of synthetic inputs with the schema of the real input files
+
+# columns given in percent of the total of every scenario and alternative and the
+# absolute columns derived from them
+SHARE_COLUMNS = {
+    "Cost Share": None,
+    "Peak Share": "Simultaneous Peak",
+    "Energy Share": "Electricity Purchased",
+    "Capacity Share": "Contracted Capacity",
+    "Losses Share": "Losses",
+}
+
+
+def get_synthetic_data(nr_scenarios, nr_alternatives, nr_customer_groups=5, seed=0):
+    """
+    Synthetic input data in the format returned by data_preparation.import_data. The
+    shares of every scenario and alternative sum up to 100, absolute values are
+    consistent with the shares.
+
+    :param nr_scenarios: int
+    :param nr_alternatives: int
+    :param nr_customer_groups: int
+    :param seed: int
+    :return: Dataset
+    """
+    rng = np.random.default_rng(seed)
+    nr_segments = nr_scenarios * nr_alternatives
+    data = pd.MultiIndex.from_product(
+        [range(1, nr_scenarios + 1), range(1, nr_alternatives + 1),
+         range(1, nr_customer_groups + 1)],
+        names=Dataset.index_columns).to_frame(index=False)
+
+    def _get_shares(concentration):
+        shares = rng.dirichlet(concentration, size=nr_segments)
+        return 100 * shares.ravel()
+
+    # customer groups of equal size in all scenarios, few flexible consumers
+    concentration = np.r_[20., np.ones(nr_customer_groups - 1)]
+    group_share = 100 * rng.dirichlet(concentration)
+    data["Group Share"] = np.tile(group_share, nr_segments)
+    for share, column in SHARE_COLUMNS.items():
+        data[share] = _get_shares(concentration)
+        if column is not None:
+            total = np.repeat(rng.uniform(1e3, 1e4, nr_segments), nr_customer_groups)
+            data[column] = data[share] / 100 * total
+    data["Aggregated Peak"] = data["Simultaneous Peak"] * rng.uniform(
+        1.2, 2., len(data))
+    data["Aggregated Simultaneous Peak"] = data["Simultaneous Peak"] * rng.uniform(
+        1., 1.2, len(data))
+    data["Monthly Peak"] = 12 * data["Aggregated Peak"] * rng.uniform(
+        0.6, 1., len(data))
+    return Dataset(data[INPUT_COLUMNS], is_sorted=True)
+
+
+def get_synthetic_cost_contribution_ur(nr_scenarios, nr_alternatives, seed=0):
+    """
+    Synthetic share of usage-related costs in the format of cost_contribution_ur.csv.
+
+    :return: pd.DataFrame
+        index: scenarios, columns: alternatives
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(0.2, 0.6, (nr_scenarios, nr_alternatives)),
+                        index=range(1, nr_scenarios + 1),
+                        columns=range(1, nr_alternatives + 1))
+
+
+def get_synthetic_pv_cost_reduction(nr_alternatives, seed=0):
+    """
+    Synthetic relative costs after purchase of a PV system in the format of
+    pv_cost_reduction.csv.
+
+    :return: pd.DataFrame
+        index: consumer groups, columns: alternatives
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(0.5, 1., (4, nr_alternatives)),
+                        index=["PV", "PV_BESS", "EV_PV", "EV_PV_BESS"],
+                        columns=range(1, nr_alternatives + 1))
+
+
+def get_synthetic_profiles(nr_profiles, nr_timesteps=8760, scale=1., seed=0):
+    """
+    Synthetic hourly profiles with daily and seasonal pattern.
+
+    :param nr_profiles: int
+    :param nr_timesteps: int
+    :param scale: float
+        mean of the profiles
+    :param seed: int
+    :return: pd.DataFrame
+        index: timestamps, columns: profiles, values as float32
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2021-01-01", periods=nr_timesteps, freq="h")
+    hours = np.arange(nr_timesteps, dtype=np.float32)
+    pattern = (1 + 0.5 * np.sin(2 * np.pi * hours / 24)) * \
+        (1 + 0.3 * np.cos(2 * np.pi * hours / nr_timesteps))
+    profiles = np.empty((nr_timesteps, nr_profiles), dtype=np.float32)
+    for start in range(0, nr_profiles, 1000):
+        stop = min(start + 1000, nr_profiles)
+        profiles[:, start:stop] = scale * pattern[:, None] * rng.gamma(
+            2., 0.5, (nr_timesteps, stop - start)).astype(np.float32)
+    return pd.DataFrame(profiles, index=index, copy=False)
+
+
+def write_synthetic_inputs(data_dir, nr_scenarios, nr_alternatives, seed=0):
+    """
+    Write a directory of synthetic input files that can be read by inputs.InputBundle.
+    The network data is only written as compiled cache next to an empty workbook, as
+    workbooks cannot hold the number of rows of large instances.
+
+    :param data_dir: str
+    :return: str
+        path of the (empty) workbook
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    file_path = os.path.join(data_dir, "inputdata_new.xlsx")
+    with open(file_path, "wb"):
+        pass
+    write_cache(get_synthetic_data(nr_scenarios, nr_alternatives, seed=seed)[
+        INPUT_COLUMNS], get_cache_path(file_path))
+    get_synthetic_cost_contribution_ur(nr_scenarios, nr_alternatives, seed).to_csv(
+        os.path.join(data_dir, "cost_contribution_ur.csv"))
+    get_synthetic_pv_cost_reduction(nr_alternatives, seed).to_csv(
+        os.path.join(data_dir, "pv_cost_reduction.csv"))
+    return file_path
@@ -0,0 +1,5 @@
+import sys
+
+from effnets.cli import main
+
+sys.exit(main())
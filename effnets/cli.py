@@ -0,0 +1,338 @@
+"""
+Evaluation of network tariffs driven by a run file (TOML or YAML). The run file
+defines the input and output directories, the names of the scenarios and
+alternatives, additional weightings of the criteria and the selection of scenarios,
+alternatives, stakeholders and outputs to be evaluated. Only the values required by
+the selected outputs are computed.
+
+Example run file:
+
+    data_dir = "data"                # relative to the run file
+    output_dir = "results"
+    cache_dir = "results/cache"      # "" to disable the cache
+    ur_base = 0.41                   # derive cost contributions instead of reading
+                                     # cost_contribution_ur.csv
+    der_proxy = true                 # scenario-specific DER cost reduction instead
+                                     # of pv_cost_reduction.csv
+    format = "parquet"               # "csv" (default), "parquet" or "arrow"
+
+    [scenarios]
+    1 = "Scenario 1"
+    2 = "Scenario 2"
+
+    [alternatives]
+    1 = "Volumetric Tariff"
+    4 = "Capacity Tariff"
+
+    [weights]
+    "Equal Weights" = [0.3333, 0.3333, 0.1667, 0.1667]
+
+    [selection]
+    stakeholders = ["Equal Weights", "DSO"]
+    outputs = ["end_rating"]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+
+EFFNETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# outputs written to the output directory, see run
+OUTPUTS = ["end_rating", "result_matrix", "weighting"]
+FORMATS = ["csv", "parquet", "arrow"]
+EXPERTS = ["Authority", "Politics", "Third Party", "DSO", "Regulator"]
+
+DEFAULT_CONFIG = {
+    "data_dir": os.path.join(EFFNETS_DIR, "data"),
+    "output_dir": "results",
+    "cache_dir": os.path.join("results", "cache"),
+    "ur_base": None,
+    "der_proxy": False,
+    "format": "csv",
+    "scenarios": {1: "Scenario 1", 2: "Scenario 2", 3: "Scenario 3",
+                  4: "Scenario 4"},
+    "alternatives": {1: "Volumetric Tariff", 2: "Monthly Power Peak",
+                     3: "Yearly Power Peak", 4: "Capacity Tariff"},
+    "experts": EXPERTS,
+    "weights": {"Equal Weights": [1/3, 1/3, 1/6, 1/6]},
+    "selection": {"scenarios": None, "alternatives": None, "stakeholders": None,
+                  "outputs": OUTPUTS},
+}
+
+
+def read_run_file(file_path):
+    """
+    Read a run file in TOML (.toml) or YAML (.yaml, .yml) format. Relative
+    directories are resolved relative to the run file.
+
+    :param file_path: str
+    :return: dict
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("Reading TOML run files requires Python 3.11 or "
+                                  "the package tomli.")
+        with open(file_path, "rb") as f:
+            config = tomllib.load(f)
+    elif extension in [".yaml", ".yml"]:
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML run files requires the package pyyaml.")
+        with open(file_path) as f:
+            config = yaml.safe_load(f) or {}
+    else:
+        raise ValueError(f"Run file {file_path} has to be a TOML or YAML file.")
+    run_dir = os.path.dirname(os.path.abspath(file_path))
+    for key in ["data_dir", "output_dir", "cache_dir"]:
+        if config.get(key):
+            config[key] = os.path.join(run_dir, config[key])
+    return config
+
+
+def get_config(run_file=None, **selection):
+    """
+    Run configuration from the defaults, an optional run file and a selection, e.g.
+    from the command line.
+
+    :param run_file: str or None (default)
+    :param selection: dict
+        "scenarios", "alternatives", "stakeholders" and "outputs" to be evaluated,
+        values of None are ignored
+    :return: dict
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    run_config = read_run_file(run_file) if run_file is not None else {}
+    for key, value in run_config.items():
+        if key not in config:
+            raise ValueError(f"Unknown entry {key} in run file, valid entries are "
+                             f"{list(config)}.")
+        if key == "selection":
+            config[key].update(value)
+        elif key == "weights":
+            config[key].update(value)
+        else:
+            config[key] = value
+    for key in ["scenarios", "alternatives"]:
+        config[key] = {int(label): name for label, name in config[key].items()}
+    config["selection"].update(
+        {key: value for key, value in selection.items() if value is not None})
+    return config
+
+
+def get_selection(config):
+    """
+    Labels and names of the selected scenarios and alternatives and the selected
+    stakeholders and outputs.
+
+    :param config: dict
+        see get_config
+    :return: dict
+    """
+    selection = config["selection"]
+    resolved = {}
+    for key in ["scenarios", "alternatives"]:
+        labels = selection[key]
+        if labels is None:
+            labels = list(config[key])
+        unknown = [label for label in labels if label not in config[key]]
+        if unknown:
+            raise ValueError(f"Unknown {key} {unknown}, valid {key} are "
+                             f"{list(config[key])}.")
+        resolved[key] = {label: config[key][label] for label in labels}
+    stakeholders = selection["stakeholders"]
+    available = list(config["weights"]) + list(config["experts"])
+    if stakeholders is None:
+        stakeholders = available
+    unknown = [stakeholder for stakeholder in stakeholders
+               if stakeholder not in available]
+    if unknown:
+        raise ValueError(f"Unknown stakeholders {unknown}, valid stakeholders are "
+                         f"{available}.")
+    resolved["stakeholders"] = list(stakeholders)
+    unknown = [output for output in selection["outputs"] if output not in OUTPUTS]
+    if unknown:
+        raise ValueError(f"Unknown outputs {unknown}, valid outputs are {OUTPUTS}.")
+    resolved["outputs"] = list(selection["outputs"])
+    return resolved
+
+
+def _get_expert_weights(config, selection):
+    # relative weights of the selected experts, rows: experts, columns: criteria
+    import pandas as pd
+    from data.expert_weighting import expert_pairwise_comparison_dict
+    from weights import get_relative_weights_stakeholder
+    experts = [stakeholder for stakeholder in selection["stakeholders"]
+               if stakeholder in config["experts"]]
+    if not experts:
+        return None
+    expert_weights = expert_pairwise_comparison_dict()
+    return pd.concat([get_relative_weights_stakeholder(expert_weights[expert], expert)
+                      for expert in experts])
+
+
+def _get_weights(config, selection, expert_weights):
+    # weightings of all selected stakeholders in the selected order
+    import pandas as pd
+    from indicators import names_criteria
+    weights = pd.DataFrame(
+        [config["weights"][stakeholder] for stakeholder in selection["stakeholders"]
+         if stakeholder in config["weights"]],
+        index=[stakeholder for stakeholder in selection["stakeholders"]
+               if stakeholder in config["weights"]],
+        columns=names_criteria(), dtype=float)
+    if expert_weights is not None:
+        weights = pd.concat([weights, expert_weights])
+    return weights.loc[selection["stakeholders"]]
+
+
+def run(config):
+    """
+    Evaluate the selected scenarios and alternatives and write the selected outputs:
+
+    * end_rating: rating of every alternative per stakeholder (end_rating.csv)
+    * result_matrix: performance of every alternative per criterion
+      (result_matrix.csv)
+    * weighting: relative weights of the selected experts (weighting.csv)
+
+    The network data is only read if end_rating or result_matrix are selected, the
+    weights of the stakeholders only if end_rating or weighting are selected. With the
+    format "parquet" or "arrow", the outputs are written to partitioned directories
+    of the same names as soon as they are determined, see sink.ResultsWriter.
+
+    :param config: dict
+        see get_config
+    :return: list of str
+        paths of the written files
+    """
+    # modules of the framework are imported with the effnets directory as root
+    if EFFNETS_DIR not in sys.path:
+        sys.path.insert(0, EFFNETS_DIR)
+    selection = get_selection(config)
+    os.makedirs(config["output_dir"], exist_ok=True)
+    if config["format"] not in FORMATS:
+        raise ValueError(f"Unknown format {config['format']}, valid formats are "
+                         f"{FORMATS}.")
+    if config["format"] != "csv":
+        from sink import ResultsWriter
+        with ResultsWriter(config["output_dir"], config["format"]) as writer:
+            _run(config, selection, writer)
+        return writer.files
+    return _run(config, selection)
+
+
+def _run(config, selection, writer=None):
+    # outputs are written as csv files if no writer is given
+    outputs = selection["outputs"]
+    output_dir = config["output_dir"]
+    written = []
+    expert_weights = None
+    if "end_rating" in outputs or "weighting" in outputs:
+        expert_weights = _get_expert_weights(config, selection)
+    if "end_rating" in outputs or "result_matrix" in outputs:
+        from graph import build_analysis_graph
+        from inputs import InputBundle
+        weights = _get_weights(config, selection, expert_weights) \
+            if "end_rating" in outputs else None
+        # only values whose inputs changed since the last run are recomputed, all
+        # others are read from the cache
+        graph = build_analysis_graph(
+            weights, InputBundle(config["data_dir"], ur_base=config["ur_base"],
+                                 der_proxy=config["der_proxy"]),
+            scenarios=list(selection["scenarios"]),
+            alternatives=list(selection["alternatives"]),
+            cache_dir=config["cache_dir"] or None)
+        scenario_names = list(selection["scenarios"].values())
+        alternative_names = list(selection["alternatives"].values())
+        if writer is not None:
+            # the performance matrix is written before the ratings are determined
+            if "result_matrix" in outputs:
+                writer.write_performance(graph.get("performance"), alternative_names)
+            if "end_rating" in outputs:
+                writer.write_ratings(graph.get("ratings"), alternative_names)
+        else:
+            if "end_rating" in outputs:
+                path = os.path.join(output_dir, "end_rating.csv")
+                graph.get("ratings").to_frame(scenario_names,
+                                              alternative_names).to_csv(path)
+                written.append(path)
+            if "result_matrix" in outputs:
+                path = os.path.join(output_dir, "result_matrix.csv")
+                graph.get("performance").to_frame(alternative_names).to_csv(path)
+                written.append(path)
+    if "weighting" in outputs and expert_weights is not None:
+        if writer is not None:
+            writer.write_weights(expert_weights)
+        else:
+            path = os.path.join(output_dir, "weighting.csv")
+            expert_weights.to_csv(path)
+            written.append(path)
+    return written
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="effnets", description=__doc__.strip().splitlines()[0],
+        epilog="Selections given on the command line override the run file.")
+    parser.add_argument("run_file", nargs="?",
+                        help="TOML or YAML run file, defaults to the evaluation of "
+                             "all scenarios, alternatives and stakeholders")
+    parser.add_argument("--scenarios", nargs="+", type=int, metavar="SCENARIO")
+    parser.add_argument("--alternatives", nargs="+", type=int,
+                        metavar="ALTERNATIVE")
+    parser.add_argument("--stakeholders", nargs="+", metavar="STAKEHOLDER")
+    parser.add_argument("--outputs", nargs="+", choices=OUTPUTS)
+    parser.add_argument("--output-dir", help="overrides the run file")
+    parser.add_argument("--ur-base", type=float,
+                        help="share of usage-related costs in the status quo, the "
+                             "cost contributions are derived from the network data "
+                             "instead of read from cost_contribution_ur.csv")
+    parser.add_argument("--der-proxy", action="store_true",
+                        help="derive the scenario-specific cost reduction by DER "
+                             "from the network data instead of reading "
+                             "pv_cost_reduction.csv")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="format of the outputs, parquet and arrow require "
+                             "pyarrow")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="neither read nor write the cache of results")
+    parser.add_argument("--show-config", action="store_true",
+                        help="print the resolved configuration and exit")
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    config = get_config(args.run_file, scenarios=args.scenarios,
+                        alternatives=args.alternatives,
+                        stakeholders=args.stakeholders, outputs=args.outputs)
+    if args.output_dir is not None:
+        config["output_dir"] = args.output_dir
+    if args.ur_base is not None:
+        config["ur_base"] = args.ur_base
+    if args.der_proxy:
+        config["der_proxy"] = True
+    if args.format is not None:
+        config["format"] = args.format
+    if args.no_cache:
+        config["cache_dir"] = None
+    if args.show_config:
+        config["selection"] = get_selection(config)
+        print(json.dumps(config, indent=2))
+        return 0
+    for path in run(config):
+        print(f"Written {path}")
+    print("Success")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# Aggregation of per-customer simulation results to the input data of the framework
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.data_preparation import Dataset, CAPACITY_TIERS, get_contracted_capacity
+
+# columns of the data returned by import_data in their original order
+INPUT_COLUMNS = ["Scenario", "Alternative", "Customer Group", "Group Share",
+                 "Cost Share", "Peak Share", "Energy Share", "Capacity Share",
+                 "Electricity Purchased", "Aggregated Peak",
+                 "Aggregated Simultaneous Peak", "Contracted Capacity",
+                 "Simultaneous Peak", "Losses", "Losses Share", "Monthly Peak"]
+
+GROUP_KEYS = ["Scenario", "Alternative", "Customer Group"]
+CUSTOMER_KEYS = ["Scenario", "Alternative", "Customer"]
+
+
+class SimulationAggregator:
+    """
+    Streaming aggregation of per-customer, per-timestep simulation results to the
+    format returned by import_data. Chunks of results are added with update(), only
+    running sums and maxima are kept:
+
+    * per customer: customer group, yearly peak and monthly peaks,
+    * per customer group and timestep: aggregated load of the group, needed for the
+      coincident (simultaneous) peak,
+    * per customer group: purchased electricity, costs and losses.
+
+    Memory is therefore bounded by the number of customers and timesteps and does not
+    grow with the number of rows that are streamed through the aggregator.
+
+    Expected columns of the chunks are "Scenario", "Alternative", "Customer",
+    "Customer Group", "Timestep" (parseable as datetime), "Power" (consumption from
+    the grid in kW), "Cost" (network charges) and optionally "Losses".
+
+    :param timestep_hours: float
+        duration of one timestep in hours, default: 1.0
+    :param capacity_tiers: np.array
+        capacity tiers used to determine the contracted capacity of every customer
+    """
+    def __init__(self, timestep_hours=1.0, capacity_tiers=CAPACITY_TIERS):
+        self.timestep_hours = timestep_hours
+        self.capacity_tiers = capacity_tiers
+        self._customer_group = _RunningAggregate("first")
+        self._peak = _RunningAggregate("max")
+        self._monthly_peak = _RunningAggregate("max")
+        self._group_load = _RunningAggregate("sum")
+        self._group_sums = _RunningAggregate("sum")
+
+    def update(self, chunk):
+        """
+        Add a chunk of simulation results.
+
+        :param chunk: pd.DataFrame
+            rows of simulation results, see class description for the columns
+        """
+        if "Losses" not in chunk.columns:
+            chunk = chunk.assign(Losses=np.nan)
+        timesteps = pd.to_datetime(chunk["Timestep"])
+        chunk = chunk.assign(Timestep=timesteps, Month=timesteps.dt.month)
+        # only the chunk is reduced, its aggregates are added to the running ones
+        self._customer_group.update(
+            chunk.groupby(CUSTOMER_KEYS)["Customer Group"].first())
+        self._peak.update(chunk.groupby(CUSTOMER_KEYS)["Power"].max())
+        self._monthly_peak.update(
+            chunk.groupby(CUSTOMER_KEYS + ["Month"])["Power"].max())
+        self._group_load.update(
+            chunk.groupby(GROUP_KEYS + ["Timestep"])["Power"].sum())
+        self._group_sums.update(
+            chunk.groupby(GROUP_KEYS)[["Power", "Cost", "Losses"]].sum(min_count=1))
+
+    def result(self):
+        """
+        Aggregated input data of all chunks added so far.
+
+        :return: Dataset
+            data in the format returned by import_data
+        """
+        if not len(self._customer_group):
+            raise ValueError("No simulation results were added.")
+        customer_group = self._customer_group.to_pandas()
+        monthly_peak = self._monthly_peak.to_pandas()
+        group_load = self._group_load.to_pandas()
+        group_sums = self._group_sums.to_pandas()
+        # per-customer values summed up per customer group
+        peak = pd.concat([self._peak.to_pandas(), customer_group], axis=1)
+        peak["Contracted Capacity"] = \
+            get_contracted_capacity(peak["Power"].to_numpy(), self.capacity_tiers)
+        peak["Monthly Peak"] = monthly_peak.groupby(level=CUSTOMER_KEYS).sum()
+        peak["Customers"] = 1
+        data = peak.groupby(
+            ["Scenario", "Alternative", "Customer Group"]).sum().rename(
+            columns={"Power": "Aggregated Peak"})
+        # purchased electricity, costs and losses
+        data["Electricity Purchased"] = \
+            group_sums["Power"] * self.timestep_hours
+        data["Cost"] = group_sums["Cost"]
+        data["Losses"] = group_sums["Losses"]
+        # peak of group load and contribution of group to the coincident peak
+        data["Aggregated Simultaneous Peak"] = \
+            group_load.groupby(level=GROUP_KEYS).max()
+        total_load = group_load.groupby(
+            level=["Scenario", "Alternative", "Timestep"]).sum()
+        peak_timesteps = total_load.groupby(
+            level=["Scenario", "Alternative"]).idxmax()
+        group_load = group_load.reset_index()
+        group_load = group_load.merge(
+            pd.DataFrame(peak_timesteps.tolist(),
+                         columns=["Scenario", "Alternative", "Timestep"]),
+            on=["Scenario", "Alternative", "Timestep"])
+        data["Simultaneous Peak"] = \
+            group_load.set_index(GROUP_KEYS)["Power"].reindex(data.index).fillna(0)
+        # shares in percent of the total of the scenario and alternative
+        for share, column in [("Group Share", "Customers"), ("Cost Share", "Cost"),
+                              ("Peak Share", "Simultaneous Peak"),
+                              ("Energy Share", "Electricity Purchased"),
+                              ("Capacity Share", "Contracted Capacity"),
+                              ("Losses Share", "Losses")]:
+            data[share] = 100 * data[column] / \
+                data.groupby(level=["Scenario", "Alternative"])[column].transform("sum")
+        return Dataset(data.reset_index()[INPUT_COLUMNS])
+
+
+class _RunningAggregate:
+    """
+    Running sum, maximum or first value per key of the aggregates of a stream of
+    chunks. Keys are mapped to consecutive codes when they first occur and the values
+    are kept in arrays that grow geometrically, so that adding the aggregate of a chunk
+    only costs time proportional to the size of the chunk's aggregate.
+
+    :param how: str
+        "sum", "max" or "first", missing values are skipped
+    """
+    def __init__(self, how):
+        self.how = how
+        self.codes = {}
+        self.keys = []
+        self.values = None
+        self.template = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, new):
+        """
+        Add the aggregate of a chunk.
+
+        :param new: pd.Series or pd.DataFrame
+            values per key, every key at most once
+        """
+        if self.template is None:
+            self.template = new.iloc[:0]
+        keys = new.index.tolist()
+        nr_keys = len(self)
+        codes = np.fromiter((self.codes.setdefault(key, len(self.codes))
+                             for key in keys), dtype=np.intp, count=len(keys))
+        is_new = codes >= nr_keys
+        self.keys.extend(key for key, new_key in zip(keys, is_new) if new_key)
+        values = new.to_numpy().reshape(len(keys), -1)
+        self._reserve(len(self), values)
+        if self.how == "first":
+            self.values[codes[is_new]] = values[is_new]
+            return
+        old = self.values[codes]
+        if self.how == "max":
+            self.values[codes] = np.fmax(old, values)
+        else:
+            # missing values are skipped, all missing stays missing
+            self.values[codes] = np.where(np.isnan(old), values,
+                                          old + np.nan_to_num(values))
+
+    def _reserve(self, size, values):
+        capacity = 0 if self.values is None else len(self.values)
+        if size <= capacity:
+            return
+        dtype = values.dtype if self.how == "first" else float
+        grown = np.empty((max(size, 2 * capacity, 1024), values.shape[1]), dtype=dtype)
+        if self.how != "first":
+            # missing until the first value of a key is added
+            grown[capacity:] = np.nan
+        if capacity:
+            grown[:capacity] = self.values
+        self.values = grown
+
+    def to_pandas(self):
+        """
+        Aggregate of all chunks sorted by key.
+
+        :return: pd.Series or pd.DataFrame
+            same type, names and columns as the added aggregates
+        """
+        index = pd.MultiIndex.from_tuples(self.keys,
+                                          names=self.template.index.names)
+        values = self.values[:len(self)]
+        if isinstance(self.template, pd.Series):
+            result = pd.Series(values[:, 0], index=index, name=self.template.name)
+        else:
+            result = pd.DataFrame(values, index=index,
+                                  columns=self.template.columns)
+        return result.sort_index()
+
+
+def iter_simulation_results(file_path, chunksize=1000000):
+    """
+    Read simulation results in chunks. Supported formats are csv and, if pyarrow is
+    installed, parquet.
+
+    :param file_path: str
+    :param chunksize: int
+        number of rows per chunk
+    :return: iterator of pd.DataFrame
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        yield from pd.read_csv(file_path, chunksize=chunksize)
+    elif extension in [".parquet", ".pq"]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading parquet files requires pyarrow.")
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise NotImplementedError(f"File format {extension} is not supported.")
+
+
+def aggregate_simulation_results(sources, timestep_hours=1.0, chunksize=1000000):
+    """
+    Aggregate per-customer simulation results to the input data of the framework, see
+    SimulationAggregator.
+
+    :param sources: str or list of str or iterable of pd.DataFrame
+        paths to csv or parquet files or chunks of simulation results
+    :param timestep_hours: float
+        duration of one timestep in hours, default: 1.0
+    :param chunksize: int
+        number of rows read from files at once
+    :return: Dataset
+        data in the format returned by import_data
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    aggregator = SimulationAggregator(timestep_hours=timestep_hours)
+    for source in sources:
+        chunks = iter_simulation_results(source, chunksize) \
+            if isinstance(source, str) else [source]
+        for chunk in chunks:
+            aggregator.update(chunk)
+    return aggregator.result()
@@ -1,78 +1,581 @@
 # Methods to provide certain input data
+import numpy as np
 import pandas as pd
+import json
 import os
 from itertools import product
 import pathlib
+import sys
 
+if __name__ == "__main__":
+    # make the modules of effnets importable if executed as script
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from instrumentation import instrument
+
+
+class Dataset:
+    """
+    Input data sorted by scenario, alternative and customer group. The rows of every
+    (scenario, alternative) combination are contiguous, their offsets are stored once
+    so that the indicators can access them without scanning the whole table.
+
+    Derived columns (see DERIVED_COLUMNS) and the values of the reference alternative
+    (1) per scenario (see REFERENCE_COLUMNS) are determined once when the dataset is
+    created. Afterwards, the dataset is immutable: all arrays are read-only, columns
+    cannot be added and the frame returned by data is a copy-on-write view. It can
+    therefore be shared between threads.
+
+    :param data: pd.DataFrame
+        input data in the format returned by the simulation, has to contain at least the
+        columns "Scenario", "Alternative" and "Customer Group"
+    :param is_sorted: bool
+        whether data is already sorted by the index columns with a RangeIndex, in
+        which case it is used without copying, default: False
+    """
+    index_columns = ["Scenario", "Alternative", "Customer Group"]
+
+    def __init__(self, data, is_sorted=False):
+        if not is_sorted:
+            data = data.sort_values(self.index_columns, kind="stable").reset_index(
+                drop=True)
+        arrays = {column: data[column].to_numpy() for column in data.columns
+                  if column not in DERIVED_COLUMNS}
+        arrays.update(get_derived_columns(arrays))
+        for column, values in arrays.items():
+            if values.flags.writeable:
+                values = values.view()
+                values.flags.writeable = False
+            arrays[column] = values
+        _set = super().__setattr__
+        _set("_arrays", arrays)
+        _set("_data", pd.DataFrame(arrays, copy=False))
+        # determine boundaries of (scenario, alternative) blocks
+        scenarios = arrays["Scenario"]
+        alternatives = arrays["Alternative"]
+        change = np.flatnonzero((scenarios[1:] != scenarios[:-1]) |
+                                (alternatives[1:] != alternatives[:-1])) + 1
+        starts = np.concatenate([[0], change]).astype(int)
+        stops = np.concatenate([change, [len(scenarios)]]).astype(int)
+        # table of (scenario, alternative) blocks, blocks are sorted by their code
+        _set("_scenario_values", np.unique(scenarios))
+        _set("_alternative_values", np.unique(alternatives))
+        _set("_block_codes",
+             np.searchsorted(self._scenario_values, scenarios[starts]) *
+             len(self._alternative_values) +
+             np.searchsorted(self._alternative_values, alternatives[starts]))
+        _set("_block_starts", starts)
+        _set("_block_stops", stops)
+        _set("_references", self._get_references())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dataset is immutable.")
+
+    def __setitem__(self, key, value):
+        raise TypeError("Dataset is immutable, derived columns are determined when "
+                        "the dataset is created.")
+
+    @property
+    def data(self):
+        """
+        Sorted input data including the derived columns. The frame is a shallow copy,
+        changes to it do not affect the dataset.
+
+        :return: pd.DataFrame
+        """
+        return self._data.copy(deep=False)
+
+    def _get_references(self):
+        # values of the reference alternative (1) per scenario
+        idx_reference = np.searchsorted(self._alternative_values, 1)
+        if idx_reference == len(self._alternative_values) or \
+                self._alternative_values[idx_reference] != 1:
+            return {}
+        is_reference = \
+            self._block_codes % len(self._alternative_values) == idx_reference
+        positions = np.full(len(self._scenario_values), -1)
+        positions[self._block_codes[is_reference] //
+                  len(self._alternative_values)] = np.flatnonzero(is_reference)
+        references = {}
+        for column in REFERENCE_COLUMNS:
+            if column not in self._arrays:
+                continue
+            sums = np.add.reduceat(self._arrays[column], self._block_starts)
+            references[column] = np.where(positions >= 0, sums[positions], np.nan)
+        if "Relative Cost Share" in self._arrays:
+            # relative cost share of inflexible customers (group 1)
+            values = np.full(len(self._scenario_values), np.nan)
+            for idx_scenario, position in enumerate(positions):
+                if position < 0:
+                    continue
+                start = self._block_starts[position]
+                groups = self._arrays["Customer Group"][
+                    start:self._block_stops[position]]
+                idx = np.searchsorted(groups, 1)
+                if idx < len(groups) and groups[idx] == 1:
+                    values[idx_scenario] = \
+                        self._arrays["Relative Cost Share"][start + idx]
+            references["Relative Cost Share"] = values
+        for values in references.values():
+            values.flags.writeable = False
+        return references
+
+    def sums(self, column):
+        """
+        Sum of <column> over all customer groups of every combination of scenario and
+        alternative, determined in one pass over the blocks of the dataset.
+
+        :param column: str
+        :return: pd.DataFrame
+            index: scenarios, columns: alternatives, NaN for combinations that are
+            not contained in the dataset
+        """
+        values = np.full(len(self._scenario_values) * len(self._alternative_values),
+                         np.nan)
+        values[self._block_codes] = np.add.reduceat(self._arrays[column],
+                                                    self._block_starts)
+        return pd.DataFrame(
+            values.reshape(len(self._scenario_values), len(self._alternative_values)),
+            index=self.scenarios, columns=self.alternatives)
+
+    def reference(self, idx_scenario, column):
+        """
+        Value of <column> for the reference alternative (1) of a scenario, i.e. the
+        sum over all customer groups for the columns in REFERENCE_COLUMNS and the
+        value of the inflexible customers (group 1) for "Relative Cost Share". Other
+        columns are summed up on demand.
+
+        :param idx_scenario: int
+        :param column: str
+        :return: float
+        """
+        if column not in self._references:
+            return self.column(idx_scenario, 1, column).sum()
+        return self.references([idx_scenario], column)[0]
+
+    def references(self, scenarios, column):
+        """
+        Values of <column> for the reference alternative (1) of several scenarios, see
+        reference.
+
+        :param scenarios: list of int
+        :param column: str
+        :return: np.array
+        """
+        if column not in self._references:
+            return np.array([self.reference(scenario, column)
+                             for scenario in scenarios])
+        scenarios = np.asarray(scenarios)
+        idx_scenarios = np.minimum(np.searchsorted(self._scenario_values, scenarios),
+                                   len(self._scenario_values) - 1)
+        values = self._references[column][idx_scenarios]
+        missing = (self._scenario_values[idx_scenarios] != scenarios) | \
+            np.isnan(values)
+        if missing.any():
+            raise KeyError(f"No data for scenario {scenarios[missing][0]} and "
+                           f"alternative 1.")
+        return values
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Dataset from column arrays that are already sorted by the index columns, e.g.
+        arrays in shared memory. The arrays are not copied.
+
+        :param arrays: dict
+            column names and np.arrays of equal length
+        :return: Dataset
+        """
+        return cls(pd.DataFrame(arrays, copy=False), is_sorted=True)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    @property
+    def columns(self):
+        return self._data.columns
+
+    @property
+    def scenarios(self):
+        return [int(scenario) for scenario in self._scenario_values]
+
+    @property
+    def alternatives(self):
+        return [int(alternative) for alternative in self._alternative_values]
+
+    def array(self, column):
+        """
+        Values of <column> for all rows in the sorted order of the dataset.
+
+        :param column: str
+        :return: np.array
+        """
+        return self._arrays[column]
+
+    def segments(self, scenarios=None, alternatives=None):
+        """
+        Row boundaries of all combinations of the given scenarios and alternatives.
+        Every combination has to be contained in the dataset.
+
+        :param scenarios: list of int or None (default)
+            scenarios to be included, defaults to all scenarios of the dataset
+        :param alternatives: list of int or None (default)
+            alternatives to be included, defaults to all alternatives of the dataset
+        :return: tuple of np.array
+            starts and stops of the segments with shape (len(scenarios),
+            len(alternatives))
+        """
+        scenarios = self._scenario_values if scenarios is None else \
+            np.asarray(scenarios)
+        alternatives = self._alternative_values if alternatives is None else \
+            np.asarray(alternatives)
+        idx_scenarios = np.searchsorted(self._scenario_values, scenarios)
+        idx_alternatives = np.searchsorted(self._alternative_values, alternatives)
+        codes = idx_scenarios[:, None] * len(self._alternative_values) + \
+            idx_alternatives[None, :]
+        positions = np.minimum(np.searchsorted(self._block_codes, codes),
+                               len(self._block_codes) - 1)
+        found = (self._block_codes[positions] == codes) & \
+            np.isin(scenarios, self._scenario_values)[:, None] & \
+            np.isin(alternatives, self._alternative_values)[None, :]
+        if not found.all():
+            idx_missing = np.argwhere(~found)[0]
+            raise KeyError(f"No data for scenario {scenarios[idx_missing[0]]} and "
+                           f"alternative {alternatives[idx_missing[1]]}.")
+        return self._block_starts[positions], self._block_stops[positions]
+
+    def rows(self, idx_scenario, alternative):
+        """
+        Slice of rows belonging to the given scenario and alternative.
+
+        :param idx_scenario: int
+        :param alternative: int
+        :return: slice
+        """
+        idx_scenario_value = np.searchsorted(self._scenario_values, idx_scenario)
+        idx_alternative_value = np.searchsorted(self._alternative_values, alternative)
+        if idx_scenario_value < len(self._scenario_values) and \
+                idx_alternative_value < len(self._alternative_values) and \
+                self._scenario_values[idx_scenario_value] == idx_scenario and \
+                self._alternative_values[idx_alternative_value] == alternative:
+            code = idx_scenario_value * len(self._alternative_values) + \
+                idx_alternative_value
+            position = np.searchsorted(self._block_codes, code)
+            if position < len(self._block_codes) and \
+                    self._block_codes[position] == code:
+                return slice(self._block_starts[position], self._block_stops[position])
+        raise KeyError(f"No data for scenario {idx_scenario} and alternative "
+                       f"{alternative}.")
 
-def import_data():
+    def get(self, idx_scenario, alternative):
+        """
+        Data of all customer groups for the given scenario and alternative.
+
+        :param idx_scenario: int
+        :param alternative: int
+        :return: pd.DataFrame
+        """
+        return self._data.iloc[self.rows(idx_scenario, alternative)]
+
+    def column(self, idx_scenario, alternative, column):
+        """
+        Values of <column> of all customer groups for the given scenario and
+        alternative, ordered by customer group.
+
+        :param idx_scenario: int
+        :param alternative: int
+        :param column: str
+        :return: np.array
+        """
+        return self._arrays[column][self.rows(idx_scenario, alternative)]
+
+    def value(self, idx_scenario, alternative, customer_group, column):
+        """
+        Value of <column> for a single customer group in the given scenario and
+        alternative.
+
+        :param idx_scenario: int
+        :param alternative: int
+        :param customer_group: int
+        :param column: str
+        :return: float
+        """
+        rows = self.rows(idx_scenario, alternative)
+        groups = self._arrays["Customer Group"][rows]
+        idx = np.searchsorted(groups, customer_group)
+        if idx == len(groups) or groups[idx] != customer_group:
+            raise KeyError(f"No data for customer group {customer_group} in scenario "
+                           f"{idx_scenario} and alternative {alternative}.")
+        return self._arrays[column][rows.start + idx]
+
+
+RENAME_DICT = {
+    "Customer_Group": "Customer Group",
+    "Group_Share": "Group Share",
+    "Cost_share": "Cost Share",
+    "Peak_share": "Peak Share",
+    "Energy_share": "Energy Share",
+    "Capacity_share": "Capacity Share",
+    "Energiesumme": "Electricity Purchased",
+    "AggregierteP": "Aggregated Peak",
+    "AggregiertePglz": "Aggregated Simultaneous Peak",
+    "Peak_share_abs": "Simultaneous Peak",
+    "AggregierteCap": "Contracted Capacity",
+    "Total_Losses": "Losses",
+    "relative_Losses": "Losses Share",
+    "agg_monthly_peak": "Monthly Peak"
+}
+
+# columns used by the indicators in indicators.py
+INDICATOR_COLUMNS = ["Group Share", "Cost Share", "Peak Share", "Energy Share",
+                     "Capacity Share", "Electricity Purchased", "Simultaneous Peak",
+                     "Contracted Capacity"]
+
+# proxies of the cost driving factors of the tariffs (alternatives 1 to 4)
+TARIFF_PROXIES = {
+    "VT": "Electricity Purchased",
+    "MPT": "Monthly Peak",
+    "YPT": "Aggregated Peak",
+    "CT": "Contracted Capacity",
+}
+
+# consumer groups of the proxy of the cost reduction by DER with the compared customer
+# groups (DER owners, reference group)
+DER_GROUP_PAIRS = {
+    "PV": (2, 1),
+    "PV_BESS": (4, 1),
+    "EV_PV": (5, 3),
+    "EV_PV_BESS": (5, 3),
+}
+
+# columns derived from the input data when a Dataset is created, i.e. the relative
+# cost share and the relative cost drivers of all tariffs, relative to the group share
+DERIVED_COLUMNS = {
+    "Relative Cost Share": "Cost Share",
+    **{f"Relative Cost Driver {tariff}": proxy
+       for tariff, proxy in TARIFF_PROXIES.items()},
+}
+
+# columns whose sum over all customer groups in the reference alternative (1) is
+# determined per scenario when a Dataset is created
+REFERENCE_COLUMNS = ["Simultaneous Peak", "Contracted Capacity",
+                     "Electricity Purchased"]
+
+
+def get_derived_columns(arrays):
+    """
+    Method to determine the derived columns, see DERIVED_COLUMNS, for which the input
+    columns are available.
+
+    :param arrays: dict
+        column names and np.arrays of the input data
+    :return: dict
+        names and np.arrays of the derived columns
+    """
+    if "Group Share" not in arrays:
+        return {}
+    return {column: arrays[source] / arrays["Group Share"]
+            for column, source in DERIVED_COLUMNS.items() if source in arrays}
+
+
+# capacity tiers in kW that can be contracted under the capacity tariff (CT)
+CAPACITY_TIERS = np.array([3, 5, 7, 6*1.44, 10*1.44, 13*1.44, 16*1.44, 20*1.44,
+                           25*1.44, 32*1.44, 35*1.44, 40*1.44, 50*1.44, 63*1.44])
+
+
+def get_contracted_capacity(peaks, capacity_tiers=CAPACITY_TIERS):
+    """
+    Method to determine the smallest capacity tier covering the consumption peaks.
+    Peaks above the largest tier are assigned a contracted capacity of 0.
+
+    :param peaks: np.array
+        Consumption peaks
+    :param capacity_tiers: np.array
+        Available capacity tiers in ascending order
+    :return: np.array
+        Values for contracted capacity
+    """
+    idx_tier = np.searchsorted(capacity_tiers, peaks, side="left")
+    return np.where(idx_tier < len(capacity_tiers),
+                    capacity_tiers[np.minimum(idx_tier, len(capacity_tiers) - 1)], 0.)
+
+
+@instrument(rows="result")
+def import_data(file_path=None, columns=None, use_cache=True):
     """
-    Method to read input data and rename columns to expected names.
+    Method to read input data and rename columns to expected names. The sheet is read
+    from a compiled cache next to the workbook (see compile_input_data) as long as the
+    cache is newer than the workbook, otherwise the workbook is parsed and the cache is
+    updated.
 
-    :return: pandas.DataFrame
-        columns contain ["Customer Group", "Group Share", "Cost Share", "Peak Share",
-        "Energy Share", "Capacity Share", "Electricity Purchased", "Aggregated Peak",
-        "Simultaneous Peak", "Contracted Capacity", "Losses", "Losses Share"]
+    :param file_path: str or None (default)
+        path to workbook with sheet "Simulation_Analysis_Results", defaults to
+        inputdata_new.xlsx in the data directory
+    :param columns: list of str or None (default)
+        columns to be read in addition to "Scenario", "Alternative" and
+        "Customer Group", e.g. INDICATOR_COLUMNS, defaults to all columns
+    :param use_cache: bool
+        whether to use and update the compiled cache, default: True
+    :return: Dataset
+        data columns contain ["Customer Group", "Group Share", "Cost Share",
+        "Peak Share", "Energy Share", "Capacity Share", "Electricity Purchased",
+        "Aggregated Peak", "Simultaneous Peak", "Contracted Capacity", "Losses",
+        "Losses Share"]
     """
     # Import input data from simulated network
-    data_dir = pathlib.Path(__file__).parent.resolve()
-    data = pd.read_excel(os.path.join(data_dir, 'inputdata_new.xlsx'),
-                         sheet_name='Simulation_Analysis_Results')
-    rename_dict = {
-        "Customer_Group": "Customer Group",
-        "Group_Share": "Group Share",
-        "Cost_share": "Cost Share",
-        "Peak_share": "Peak Share",
-        "Energy_share": "Energy Share",
-        "Capacity_share": "Capacity Share",
-        "Energiesumme": "Electricity Purchased",
-        "AggregierteP": "Aggregated Peak",
-        "AggregiertePglz": "Aggregated Simultaneous Peak",
-        "Peak_share_abs": "Simultaneous Peak",
-        "AggregierteCap": "Contracted Capacity",
-        "Total_Losses": "Losses",
-        "relative_Losses": "Losses Share",
-        "agg_monthly_peak": "Monthly Peak"
-    }
-    return data.rename(columns=rename_dict)
+    if file_path is None:
+        data_dir = pathlib.Path(__file__).parent.resolve()
+        file_path = os.path.join(data_dir, 'inputdata_new.xlsx')
+    cache_path = get_cache_path(file_path)
+    if use_cache and os.path.exists(cache_path) and \
+            os.stat(cache_path).st_mtime_ns >= os.stat(file_path).st_mtime_ns:
+        data = read_cache(cache_path, columns)
+    else:
+        data = read_workbook(file_path)
+        if use_cache:
+            try:
+                write_cache(data, cache_path)
+            except OSError:
+                # e.g. read-only data directory, continue without cache
+                pass
+        if columns is not None:
+            data = data[_get_projected_columns(data.columns, columns)]
+    return Dataset(data)
+
+
+@instrument(rows="result")
+def read_workbook(file_path):
+    """
+    Method to parse the sheet "Simulation_Analysis_Results" of the input workbook.
+
+    :param file_path: str
+    :return: pd.DataFrame
+        columns are renamed to the expected names
+    """
+    data = pd.read_excel(file_path, sheet_name='Simulation_Analysis_Results')
+    return data.rename(columns=RENAME_DICT)
+
+
+def compile_input_data(file_path=None):
+    """
+    Convert the sheet "Simulation_Analysis_Results" of the input workbook into the
+    compiled cache that is read by import_data.
 
+    :param file_path: str or None (default)
+        path to workbook, defaults to inputdata_new.xlsx in the data directory
+    :return: str
+        path to the cache
+    """
+    if file_path is None:
+        data_dir = pathlib.Path(__file__).parent.resolve()
+        file_path = os.path.join(data_dir, 'inputdata_new.xlsx')
+    cache_path = get_cache_path(file_path)
+    write_cache(read_workbook(file_path), cache_path)
+    return cache_path
+
+
+def get_cache_path(file_path):
+    """
+    Path of the compiled cache of a workbook, same name with suffix ".npz".
 
-def determine_usage_and_capacity_related_cost_contributions():
+    :param file_path: str
+    :return: str
+    """
+    return os.path.splitext(file_path)[0] + ".npz"
+
+
+@instrument(rows=lambda data, cache_path: len(data))
+def write_cache(data, cache_path):
+    """
+    Store every column as a typed array in an uncompressed npz-archive. The archive is
+    written to a temporary file first so that readers never see a partial cache.
+
+    :param data: pd.DataFrame
+    :param cache_path: str
+    """
+    arrays = {"__columns__": np.array(data.columns, dtype=str)}
+    for column in data.columns:
+        values = data[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        arrays[column] = values
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+@instrument(rows="result")
+def read_cache(cache_path, columns=None):
+    """
+    Read the compiled cache of a workbook. Only the requested columns are read from
+    the archive.
+
+    :param cache_path: str
+    :param columns: list of str or None (default)
+        columns to be read in addition to "Scenario", "Alternative" and
+        "Customer Group", defaults to all columns
+    :return: pd.DataFrame
+    """
+    with np.load(cache_path, allow_pickle=False) as archive:
+        all_columns = [str(column) for column in archive["__columns__"]]
+        if columns is not None:
+            all_columns = _get_projected_columns(all_columns, columns)
+        return pd.DataFrame({column: archive[column] for column in all_columns})
+
+
+def _get_projected_columns(all_columns, columns):
+    missing = [column for column in columns if column not in all_columns]
+    if missing:
+        raise KeyError(f"Columns {missing} are not contained in the input data.")
+    selected = set(Dataset.index_columns) | set(columns)
+    return [column for column in all_columns if column in selected]
+
+
+@instrument
+def determine_usage_and_capacity_related_cost_contributions(
+        dt=None, ur_base=0.41, cr_base=None, file_path=None):
     """
     Determine cost contribution of peaks and capacity contraction based on the
     assumption that a cost share from literature is achieved by the status quo
-    (idx_scenario=1) with volumetric tariff (alternative=1)
+    (idx_scenario=1) with volumetric tariff (alternative=1). The peaks and contracted
+    capacities of all scenarios and alternatives are summed up in one pass over the
+    data.
 
-    :return:
+    :param dt: Dataset or None (default)
+        input data, defaults to import_data()
+    :param ur_base: float
+        share of usage-related costs in the status quo, default: 0.41 from Chanel and
+        Limoges
+    :param cr_base: float or None (default)
+        share of capacity-related costs in the status quo, defaults to 1 - ur_base
+    :param file_path: str or None (default)
+        if given, the share of usage-related costs is exported to this csv-file in the
+        format of data/cost_contribution_ur.csv
+    :return: tuple of pd.DataFrame
+        share of usage- and capacity-related costs, index: scenarios, columns:
+        alternatives
     """
-    # calculate division into usage- and capacity-related costs
-    ur_base = 0.41  # from Chanel and Limoges
-    cr_base = 0.59  # from Chanel and Limoges
+    if cr_base is None:
+        cr_base = 1 - ur_base
     # determine parameter for usage and capacity related costs
     param_ur = 'Simultaneous Peak'
     param_cr = 'Contracted Capacity'
     # get data of base scenario
-    dt = import_data()
-    base_dt = dt[(dt['Scenario'] == 1) & (dt['Alternative'] == 1)]
-    peak_base = base_dt[param_ur].sum()
-    capacity_base = base_dt[param_cr].sum()
-    # get cost contribution of peaks and capacity
-    cost_contribution_ur = pd.DataFrame()
-    cost_contribution_cr = pd.DataFrame()
-    for scenario in dt["Scenario"].unique():
-        for alternative in dt["Alternative"].unique():
-            # adapt to new alternative and scenario, Eq. (33)
-            peak = dt[(dt['Scenario'] == scenario) &
-                      (dt['Alternative'] == alternative)][param_ur].sum()
-            ur_tmp = ur_base * peak / peak_base
-            # adapt to new alternative and scenario, Eq. (34)
-            capacity = \
-                dt[(dt['Scenario'] == scenario) &
-                   (dt['Alternative'] == alternative)][param_cr].sum()
-            cr_tmp = cr_base * capacity / capacity_base
-            # normalise so sum is 1, Eq. (35)
-            cost_contribution_ur.loc[scenario, alternative] = ur_tmp/(ur_tmp+cr_tmp)
-            cost_contribution_cr.loc[scenario, alternative] = cr_tmp / (ur_tmp + cr_tmp)
+    if dt is None:
+        dt = import_data()
+    peak_base = dt.reference(1, param_ur)
+    capacity_base = dt.reference(1, param_cr)
+    # adapt to new alternative and scenario, Eq. (33) and (34)
+    ur_tmp = ur_base * dt.sums(param_ur) / peak_base
+    cr_tmp = cr_base * dt.sums(param_cr) / capacity_base
+    # normalise so sum is 1, Eq. (35)
+    cost_contribution_ur = ur_tmp / (ur_tmp + cr_tmp)
+    cost_contribution_cr = cr_tmp / (ur_tmp + cr_tmp)
+    if file_path is not None:
+        cost_contribution_ur.to_csv(file_path)
     return cost_contribution_ur, cost_contribution_cr
 
 
@@ -94,9 +597,9 @@ def get_profiles_of_different_consumer_groups(
     """
     def _get_combined_profiles(profiles_1, profiles_2):
         """
-        Method to obtain combination of all profiles in profiles_1 with all profiles in
-        profiles_2. The combined profiles will contain
-        len(profiles_1.columns)*len(profiles_2.columns) columns.
+        Method to add the profiles in profiles_2 to the profiles in the same column of
+        profiles_1. Both have to contain the same number of columns. For combinations
+        of all profiles with each other see iter_combined_profiles.
 
         :param profiles_1: pd.DataFrame
             columns determine different profiles
@@ -136,151 +639,426 @@ def get_profiles_of_different_consumer_groups(
            profiles_hh_ev_cg5, profiles_hh_ev_pv_cg5, profiles_hh_ev_pv_bess_cg5
 
 
+def get_month_starts(index):
+    """
+    Method to determine the positions at which new months start in a chronologically
+    ordered time index. The positions only have to be determined once for all profiles
+    sharing the index.
+
+    :param index: pd.DatetimeIndex
+        Time index of the profiles
+    :return: np.array of int
+        Position of the first timestep of every month
+    """
+    index = pd.DatetimeIndex(index)
+    months = index.year * 12 + index.month
+    return np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+
+
+@instrument(rows=lambda profiles, *args, **kwargs: len(profiles))
+def get_tariff_cost_drivers(profiles, tariff_type, month_starts=None,
+                            capacity_tiers=CAPACITY_TIERS):
+    """
+    Method to determine the quantity that is charged under a certain network tariff
+    for all profiles at once.
+
+    :param profiles: np.array
+        Consumption profiles of shape (timesteps, profiles)
+    :param tariff_type: str
+        "VT" (sum of consumption), "MPT" (sum of monthly peaks), "YPT" (yearly peak) or
+        "CT" (contracted capacity, see get_contracted_capacity)
+    :param month_starts: np.array of int
+        Position of the first timestep of every month, see get_month_starts, only
+        needed for "MPT"
+    :param capacity_tiers: np.array
+        Available capacity tiers in ascending order, only needed for "CT"
+    :return: np.array
+        Cost driver of every profile
+    """
+    profiles = np.asarray(profiles)
+    if tariff_type == "VT":
+        return profiles.sum(axis=0, dtype=np.float64)
+    elif tariff_type == "MPT":
+        if month_starts is None:
+            raise ValueError("Month starts are needed for the monthly peak tariff.")
+        return np.maximum.reduceat(profiles, month_starts, axis=0).sum(
+            axis=0, dtype=np.float64)
+    elif tariff_type == "YPT":
+        return profiles.max(axis=0).astype(np.float64)
+    elif tariff_type == "CT":
+        return get_contracted_capacity(profiles.max(axis=0), capacity_tiers)
+    else:
+        raise NotImplementedError
+
+
+@instrument
 def determine_cost_reduction_by_purchase_of_pv(
         profiles_hh_cg4, profiles_hh_pv_cg4, profiles_hh_pv_bess_cg4,
-        profiles_hh_ev_cg5, profiles_hh_ev_pv_cg5, profiles_hh_ev_pv_bess_cg5):
+        profiles_hh_ev_cg5, profiles_hh_ev_pv_cg5, profiles_hh_ev_pv_bess_cg5,
+        month_starts=None):
     """
     Determine possible cost reduction by purchase of PV system for different network
-    tariffs
+    tariffs. The costs of every profile with PV are compared to the costs of the
+    profile in the same column without PV, the mean of the relative costs is returned.
 
-    :param profiles_hh_cg4:
+    :param profiles_hh_cg4: pd.DataFrame or np.array
+        Profiles of shape (timesteps, profiles), the same applies to all other profiles
     :param profiles_hh_pv_cg4:
     :param profiles_hh_pv_bess_cg4:
     :param profiles_hh_ev_cg5:
     :param profiles_hh_ev_pv_cg5:
     :param profiles_hh_ev_pv_bess_cg5:
-    :return:
+    :param month_starts: np.array of int or None (default)
+        Position of the first timestep of every month, see get_month_starts, determined
+        from the index of profiles_hh_cg4 if not provided
+    :return: pd.DataFrame
+        Relative costs, index: consumer groups, columns: tariffs
     """
-    def _determine_reduction_potential(tariff_type):
-        def _get_relative_reduction(profile_new, profile_base):
-            ind_base = profile_base.apply(method)
-            ind_new = profile_new.apply(method)
-            return (ind_new / ind_base.values).mean()
-
-        def _get_monthly_peak(df):
-            return df.groupby(df.index.month).max().sum()
-
-        def _get_contracted_capacity(df):
-            def _determine_constracted_capacity(peak):
-                """
-                Method to check which capacity tier is chosen for a certain peak value.
-
-                :param peak: float
-                    Consumption peak
-                :return: float
-                    Value for contracted capacity
-                """
-                capacity_tiers = [3, 5, 7, 6*1.44, 10*1.44, 13*1.44, 16*1.44, 20*1.44,
-                                  25*1.44, 32*1.44, 35*1.44, 40*1.44, 50*1.44, 63*1.44]
-                capacity_tiers.reverse()
-                contracted_capacity = 0
-                for tier in capacity_tiers:
-                    if peak <= tier:
-                        contracted_capacity = tier
-                    elif peak > tier:
-                        break
-                return contracted_capacity
-            return _determine_constracted_capacity(df.max())
-        if tariff_type == "VT":
-            method = sum
-        elif tariff_type == "MPT":
-            method = _get_monthly_peak
-        elif tariff_type == "YPT":
-            method = max
-        elif tariff_type == "CT":
-            method = _get_contracted_capacity
-        else:
-            raise NotImplementedError
-        consumer_group = "PV"
-        reduction_potential.loc[consumer_group, tariff_type] = \
-            _get_relative_reduction(
-                profile_new=profiles_hh_pv_cg4,
-                profile_base=profiles_hh_cg4
-            )
-        consumer_group = "PV_BESS"
-        reduction_potential.loc[consumer_group, tariff_type] = \
-            _get_relative_reduction(
-                profile_new=profiles_hh_pv_bess_cg4,
-                profile_base=profiles_hh_cg4
-            )
-        consumer_group = "EV_PV"
-        reduction_potential.loc[consumer_group, tariff_type] = \
-            _get_relative_reduction(
-                profile_new=profiles_hh_ev_pv_cg5,
-                profile_base=profiles_hh_ev_cg5
-            )
-        consumer_group = "EV_PV_BESS"
-        reduction_potential.loc[consumer_group, tariff_type] = \
-            _get_relative_reduction(
-                profile_new=profiles_hh_ev_pv_bess_cg5,
-                profile_base=profiles_hh_ev_cg5
-            )
-
+    if month_starts is None:
+        month_starts = get_month_starts(profiles_hh_cg4.index)
+    profiles = {
+        "PV": (profiles_hh_pv_cg4, profiles_hh_cg4),
+        "PV_BESS": (profiles_hh_pv_bess_cg4, profiles_hh_cg4),
+        "EV_PV": (profiles_hh_ev_pv_cg5, profiles_hh_ev_cg5),
+        "EV_PV_BESS": (profiles_hh_ev_pv_bess_cg5, profiles_hh_ev_cg5),
+    }
     # Set up dataframe
     tariffs = ["VT", "MPT", "YPT", "CT"]
-    consumer_groups = ["PV", "PV_BESS", "EV_PV", "EV_PV_BESS"]
-    reduction_potential = pd.DataFrame(index=consumer_groups, columns=tariffs)
-
-    # Volumetric Tariff
-    _determine_reduction_potential("VT")
-    # Monthly Power Peak Tariff
-    _determine_reduction_potential("MPT")
-    # Monthly Yearly Peak Tariff
-    _determine_reduction_potential("YPT")
-    # Monthly Capacity Tariff
-    _determine_reduction_potential("CT")
-
+    reduction_potential = pd.DataFrame(index=list(profiles), columns=tariffs)
+    for tariff_type in tariffs:
+        for consumer_group, (profile_new, profile_base) in profiles.items():
+            cost_driver_new = get_tariff_cost_drivers(
+                profile_new, tariff_type, month_starts)
+            cost_driver_base = get_tariff_cost_drivers(
+                profile_base, tariff_type, month_starts)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                reduction_potential.loc[consumer_group, tariff_type] = \
+                    np.nanmean(cost_driver_new / cost_driver_base)
     return reduction_potential
 
 
-def determine_proxy_of_cost_reduction_der(simplified=False):
+def iter_combined_profiles(profiles, chunk_size=1024, clip=True):
     """
-    Determine proxy for reduction potential, reduction of cost driving factors compared
-    to group shares, compared are PV-owners (CG2) and PV-BESS-owners (CG4) to inflexible
-    consumers (CG1) and PV-EV-BESS (CG5) to EV-owners (CG3).
+    Generator of all combinations of the profiles in the given sets, i.e. the cross
+    product of their columns. Combined profiles are the sums of one profile of every
+    set and are generated in chunks of <chunk_size> combinations, so that memory does
+    not grow with the number of combinations.
 
-    :return:
+    :param profiles: list of np.array or pd.DataFrame
+        Sets of profiles of shape (timesteps, profiles), e.g. households, negative PV
+        generation and EVs
+    :param chunk_size: int
+        Number of combinations per chunk
+    :param clip: bool
+        Whether negative values of the combined profiles are set to 0, default: True
+    :return: iterator of tuple
+        Column of every set used in the combinations of the chunk, shape
+        (combinations, sets), and combined profiles, shape (timesteps, combinations)
+    """
+    profiles = [np.asarray(profile) for profile in profiles]
+    shape = tuple(profile.shape[1] for profile in profiles)
+    nr_combinations = int(np.prod(shape))
+    for start in range(0, nr_combinations, chunk_size):
+        combinations = np.stack(np.unravel_index(
+            np.arange(start, min(start + chunk_size, nr_combinations)), shape), axis=1)
+        combined_profiles = profiles[0][:, combinations[:, 0]].astype(np.float64)
+        for idx, profile in enumerate(profiles[1:], start=1):
+            combined_profiles += profile[:, combinations[:, idx]]
+        if clip:
+            np.maximum(combined_profiles, 0, out=combined_profiles)
+        yield combinations, combined_profiles
+
+
+@instrument
+def determine_cost_reduction_of_combinations(
+        profiles_base, profiles_der, month_starts, chunk_size=1024):
     """
-    # determine parameter for cost driving factors
-    if not simplified:
-        tariff_dict = {
-            1: {"name": "VT", "proxy": "Electricity Purchased"},
-            2: {"name": "MPT", "proxy": "Monthly Peak"},
-            3: {"name": "YPT", "proxy": "Aggregated Peak"},
-            4: {"name": "CT", "proxy": "Contracted Capacity"},
+    Determine mean relative costs of all combinations of base profiles with profiles of
+    distributed energy resources (DER) compared to the base profiles alone for
+    different network tariffs. The combinations are evaluated in chunks, see
+    iter_combined_profiles, and the mean is accumulated over the chunks.
+
+    :param profiles_base: list of np.array or pd.DataFrame
+        Sets of profiles of the reference consumers, e.g. households and EVs
+    :param profiles_der: list of np.array or pd.DataFrame
+        Sets of profiles added by the DER, e.g. negative PV generation
+    :param month_starts: np.array of int
+        Position of the first timestep of every month, see get_month_starts
+    :param chunk_size: int
+        Number of combinations evaluated at once
+    :return: pd.Series
+        Mean relative costs, index: tariffs
+    """
+    tariffs = ["VT", "MPT", "YPT", "CT"]
+    # cost drivers of the base combinations are only determined once
+    base_shape = tuple(np.shape(profile)[1] for profile in profiles_base)
+    cost_drivers_base = {tariff: np.empty(int(np.prod(base_shape)))
+                         for tariff in tariffs}
+    for combinations, combined_profiles in iter_combined_profiles(
+            profiles_base, chunk_size, clip=False):
+        idx_base = np.ravel_multi_index(combinations.T, base_shape)
+        for tariff in tariffs:
+            cost_drivers_base[tariff][idx_base] = get_tariff_cost_drivers(
+                combined_profiles, tariff, month_starts)
+    sums = dict.fromkeys(tariffs, 0.)
+    counts = dict.fromkeys(tariffs, 0)
+    for combinations, combined_profiles in iter_combined_profiles(
+            list(profiles_base) + list(profiles_der), chunk_size):
+        idx_base = np.ravel_multi_index(combinations[:, :len(base_shape)].T, base_shape)
+        for tariff in tariffs:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relative_costs = get_tariff_cost_drivers(
+                    combined_profiles, tariff, month_starts) / \
+                    cost_drivers_base[tariff][idx_base]
+            relative_costs = relative_costs[~np.isnan(relative_costs)]
+            sums[tariff] += relative_costs.sum()
+            counts[tariff] += len(relative_costs)
+    return pd.Series({tariff: sums[tariff] / counts[tariff] if counts[tariff] else np.nan
+                      for tariff in tariffs})
+
+
+def determine_cost_reduction_by_purchase_of_pv_combinations(
+        profiles_hh_cg4, profiles_pv_cg4, profiles_hh_cg5, profiles_pv_cg5,
+        profiles_bess_cg4=None, profiles_ev_cg5=None, profiles_bess_cg5=None,
+        month_starts=None, chunk_size=1024):
+    """
+    Determine possible cost reduction by purchase of PV system for different network
+    tariffs over all combinations of household, PV and EV profiles, see
+    determine_cost_reduction_of_combinations. BESS profiles are combined with the PV
+    profile in the same column, as the operation of the storage depends on the PV
+    generation.
+
+    :param profiles_hh_cg4: pd.DataFrame or np.array
+        Profiles of shape (timesteps, profiles), the same applies to all other profiles
+    :param profiles_pv_cg4:
+    :param profiles_hh_cg5:
+    :param profiles_pv_cg5:
+    :param profiles_bess_cg4:
+    :param profiles_ev_cg5:
+    :param profiles_bess_cg5:
+    :param month_starts: np.array of int or None (default)
+        Position of the first timestep of every month, see get_month_starts, determined
+        from the index of profiles_hh_cg4 if not provided
+    :param chunk_size: int
+        Number of combinations evaluated at once
+    :return: pd.DataFrame
+        Relative costs, index: consumer groups, columns: tariffs
+    """
+    if month_starts is None:
+        month_starts = get_month_starts(profiles_hh_cg4.index)
+    pv_cg4 = -np.asarray(profiles_pv_cg4)
+    pv_cg5 = -np.asarray(profiles_pv_cg5)
+    base_cg5 = [profiles_hh_cg5] if profiles_ev_cg5 is None \
+        else [profiles_hh_cg5, profiles_ev_cg5]
+    combinations = {
+        "PV": ([profiles_hh_cg4], [pv_cg4]),
+        "PV_BESS": ([profiles_hh_cg4], [pv_cg4 if profiles_bess_cg4 is None
+                                        else pv_cg4 + np.asarray(profiles_bess_cg4)]),
+        "EV_PV": (base_cg5, [pv_cg5]),
+        "EV_PV_BESS": (base_cg5, [pv_cg5 if profiles_bess_cg5 is None
+                                  else pv_cg5 + np.asarray(profiles_bess_cg5)]),
+    }
+    return pd.DataFrame({
+        consumer_group: determine_cost_reduction_of_combinations(
+            profiles_base, profiles_der, month_starts, chunk_size)
+        for consumer_group, (profiles_base, profiles_der) in combinations.items()}).T
+
+
+class ProfileStore:
+    """
+    Sets of time series profiles stored as float32 arrays of shape
+    (timesteps, profiles) that are memory-mapped on access. The metadata file contains
+    the timestamps, the names of the profiles of every set and the positions of the
+    first timestep of every month, see get_month_starts. Opening the store only reads
+    the metadata, profiles are loaded by the operating system on demand and shared
+    across processes through the page cache. The arrays are read-only and can be
+    passed to get_tariff_cost_drivers and iter_combined_profiles without copying.
+
+    :param directory: str or pathlib.Path
+        directory created by ProfileStore.create
+    """
+    metadata_file = "metadata.json"
+
+    def __init__(self, directory):
+        self.directory = pathlib.Path(directory)
+        with open(self.directory / self.metadata_file) as f:
+            metadata = json.load(f)
+        self.index = pd.DatetimeIndex(metadata["index"])
+        self.month_starts = np.array(metadata["month_starts"], dtype=np.int64)
+        self.names = metadata["names"]
+        self._arrays = {}
+
+    @classmethod
+    def create(cls, directory, profiles):
+        """
+        Write sets of profiles to a new store. All sets have to share the same index.
+        The metadata is written last, so that incomplete stores cannot be opened.
+
+        :param directory: str or pathlib.Path
+        :param profiles: dict of pd.DataFrame
+            profiles of every set, index: timestamps, columns: names of the profiles
+        :return: ProfileStore
+        """
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        index = None
+        for name, df in profiles.items():
+            if index is None:
+                index = pd.DatetimeIndex(df.index)
+            elif not index.equals(pd.DatetimeIndex(df.index)):
+                raise ValueError(f"Index of profiles {name} differs from the other "
+                                 f"profiles.")
+            np.save(directory / f"{name}.npy", df.to_numpy(dtype=np.float32))
+        metadata = {
+            "index": [timestamp.isoformat() for timestamp in index],
+            "month_starts": get_month_starts(index).tolist(),
+            "names": {name: [str(column) for column in df.columns]
+                      for name, df in profiles.items()},
         }
+        tmp_path = directory / f"{cls.metadata_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, directory / cls.metadata_file)
+        return cls(directory)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        """
+        Memory-mapped profiles of a set.
+
+        :param name: str
+        :return: np.memmap
+            read-only array of shape (timesteps, profiles)
+        """
+        if name not in self.names:
+            raise KeyError(f"Profiles {name} are not contained in the store.")
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.directory / f"{name}.npy", mmap_mode="r")
+        return self._arrays[name]
+
+    def frame(self, name, columns=None):
+        """
+        Profiles of a set as DataFrame with timestamps and profile names.
+
+        :param name: str
+        :param columns: list of str or None (default)
+            profiles to be selected, defaults to all profiles of the set
+        :return: pd.DataFrame
+        """
+        values = self[name]
+        names = self.names[name]
+        if columns is not None:
+            values = values[:, [names.index(column) for column in columns]]
+            names = list(columns)
+        return pd.DataFrame(values, index=self.index, columns=names, copy=False)
+
+
+def import_profile_workbook(file_path, directory):
+    """
+    One-time import of the sheets "grundverbrauch" (households), "PV" and "emob" (EVs)
+    of the PV calculation workbook into a ProfileStore with the sets "household",
+    "pv" and "ev".
+
+    :param file_path: str
+        path to workbook, e.g. 220530_PV_Calculations.xlsx
+    :param directory: str
+        directory of the store
+    :return: ProfileStore
+    """
+    def _read_sheet(sheet_name):
+        df = pd.read_excel(file_path, sheet_name=sheet_name, index_col=0,
+                           parse_dates=True)
+        df = df.drop(index=["SUM", "MAX"], errors="ignore")
+        df.index = pd.to_datetime(df.index)
+        return df
+
+    profiles = {
+        "household": _read_sheet("grundverbrauch")[["C1", "C2", "C3", "C4"]],
+        "pv": _read_sheet("PV")[["PV_1", "PV_2", "PV_3", "PV_4"]],
+        "ev": _read_sheet("emob")[
+            ["E_Mob_PHEV_1", "E_Mob_BEV_1", "E_Mob_PHEV_2", "E_Mob_BEV_2"]],
+    }
+    return ProfileStore.create(directory, profiles)
+
+
+def get_cost_reduction_der_cube(dt=None, simplified=False):
+    """
+    Proxy for the reduction potential of DER per scenario, i.e. the ratio of the
+    relative cost drivers (cost driving factors compared to group shares) of DER owners
+    and of a reference group under every tariff, see DER_GROUP_PAIRS. The ratios of all
+    scenarios, tariffs and pairs of customer groups are determined at once from a
+    pivot of the relative cost drivers by scenario, alternative and customer group.
+
+    :param dt: Dataset or None (default)
+        input data, defaults to import_data()
+    :param simplified: bool
+        whether the relative cost share is used as cost driver of all tariffs instead
+        of the proxies in TARIFF_PROXIES
+    :return: pd.DataFrame
+        index: ("Scenario", "Consumer Group") with the consumer groups of
+        DER_GROUP_PAIRS, columns: alternatives 1 to 4 (tariffs of TARIFF_PROXIES),
+        NaN if a customer group is missing
+    """
+    if dt is None:
+        dt = import_data()
+    tariffs = list(TARIFF_PROXIES)
+    alternatives = np.arange(1, len(tariffs) + 1)
+    scenarios = np.asarray(dt.scenarios)
+    groups = np.unique(dt.array("Customer Group"))
+    # relative cost driver of every row under its tariff (alternatives 1 to 4)
+    alternative = dt.array("Alternative")
+    rows = np.flatnonzero(np.isin(alternative, alternatives))
+    idx_tariffs = alternative[rows] - 1
+    if simplified:
+        cost_drivers = dt.array("Relative Cost Share")[rows]
     else:
-        tariff_dict = {
-            1: {"name": "VT", "proxy": "Cost Share"},
-            2: {"name": "MPT", "proxy": "Cost Share"},
-            3: {"name": "YPT", "proxy": "Cost Share"},
-            4: {"name": "CT", "proxy": "Cost Share"},
-        }
-    # get data of base scenario
-    dt = import_data()
-    # Set up dataframe
-    tariffs = ["VT", "MPT", "YPT", "CT"]
-    consumer_groups = ["PV", "PV_BESS", "EV_PV", "EV_PV_BESS"]
-    reduction_potential = pd.DataFrame(index=consumer_groups, columns=tariffs)
-    for t_index, t_inf in tariff_dict.items():
-        dt_tmp = dt.loc[(dt.Alternative == t_index) & (dt.Scenario.isin([1, 2, 3, 4]))]
-        dt_tmp["Relative Cost Driver"] = dt_tmp[t_inf["proxy"]]/dt_tmp["Group Share"]
-        reduction_pv = \
-            dt_tmp.loc[dt_tmp["Customer Group"] == 2, "Relative Cost Driver"].divide(
-                dt_tmp.loc[dt_tmp["Customer Group"] == 1, "Relative Cost Driver"].values
-            )
-        reduction_pv_bess =  \
-            dt_tmp.loc[dt_tmp["Customer Group"] == 4, "Relative Cost Driver"].divide(
-                dt_tmp.loc[dt_tmp["Customer Group"] == 1, "Relative Cost Driver"].values
-            )
-        reduction_ev_pv_bess = \
-            dt_tmp.loc[dt_tmp["Customer Group"] == 5, "Relative Cost Driver"].divide(
-                dt_tmp.loc[dt_tmp["Customer Group"] == 3, "Relative Cost Driver"].values
-            )
-        reduction_potential.loc["PV", t_inf["name"]] = reduction_pv.mean()
-        reduction_potential.loc["PV_BESS", t_inf["name"]] = reduction_pv_bess.mean()
-        reduction_potential.loc["EV_PV", t_inf["name"]] = reduction_ev_pv_bess.mean()
-        reduction_potential.loc["EV_PV_BESS", t_inf["name"]] = reduction_ev_pv_bess.mean()
+        cost_drivers = np.stack([dt.array(f"Relative Cost Driver {tariff}")[rows]
+                                 for tariff in tariffs])[idx_tariffs,
+                                                         np.arange(len(rows))]
+    # pivot to (scenario, tariff, customer group)
+    cube = np.full((len(scenarios), len(tariffs), len(groups)), np.nan)
+    cube[np.searchsorted(scenarios, dt.array("Scenario")[rows]), idx_tariffs,
+         np.searchsorted(groups, dt.array("Customer Group")[rows])] = cost_drivers
+    # ratios of all pairs of DER owners and reference groups
+    idx_der = np.searchsorted(groups, [pair[0] for pair in DER_GROUP_PAIRS.values()])
+    idx_reference = np.searchsorted(groups,
+                                    [pair[1] for pair in DER_GROUP_PAIRS.values()])
+    missing = ~np.isin([pair for pairs in DER_GROUP_PAIRS.values() for pair in pairs],
+                       groups).reshape(-1, 2).any(axis=1)
+    idx_der[missing] = idx_reference[missing] = 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratios = cube[:, :, idx_der] / cube[:, :, idx_reference]
+    ratios[:, :, missing] = np.nan
+    index = pd.MultiIndex.from_product([scenarios, list(DER_GROUP_PAIRS)],
+                                       names=["Scenario", "Consumer Group"])
+    return pd.DataFrame(ratios.transpose(0, 2, 1).reshape(-1, len(tariffs)),
+                        index=index, columns=alternatives)
+
+
+def determine_proxy_of_cost_reduction_der(simplified=False, scenarios=None, dt=None):
+    """
+    Determine proxy for reduction potential, reduction of cost driving factors compared
+    to group shares, compared are PV-owners (CG2) and PV-BESS-owners (CG4) to inflexible
+    consumers (CG1) and PV-EV-BESS (CG5) to EV-owners (CG3). The values are averaged
+    over the scenarios, see get_cost_reduction_der_cube for scenario-specific values.
+
+    :param simplified: bool
+        whether the relative cost share is used as cost driver of all tariffs
+    :param scenarios: list of int or None (default)
+        scenarios to be averaged, defaults to all scenarios
+    :param dt: Dataset or None (default)
+        input data, defaults to import_data()
+    :return: pd.DataFrame
+        index: consumer groups, columns: tariffs, format of pv_cost_reduction.csv
+    """
+    cube = get_cost_reduction_der_cube(dt, simplified)
+    if scenarios is not None:
+        cube = cube.loc[list(scenarios)]
+    reduction_potential = cube.groupby(level="Consumer Group", sort=False).mean()
+    reduction_potential.index.name = None
+    reduction_potential.columns = list(TARIFF_PROXIES)
     return reduction_potential
 
 
@@ -294,30 +1072,20 @@ if __name__ == "__main__":
         reduction_potential_pv.to_csv("pv_cost_reduction.csv")
     if calculate_pv_cost_reduction:
         data_dir = r"C:\Users\aheider\Downloads"
+        store_dir = os.path.join(data_dir, "220530_PV_Calculations")
+        if not os.path.exists(os.path.join(store_dir, ProfileStore.metadata_file)):
+            import_profile_workbook(
+                os.path.join(data_dir, "220530_PV_Calculations.xlsx"), store_dir)
+        profile_store = ProfileStore(store_dir)
         # Todo: use data of CG5 here
-        hh_profiles_cg5 = pd.read_excel(os.path.join(data_dir, "220530_PV_Calculations.xlsx"),
-                                    sheet_name='grundverbrauch', index_col=0,
-                                    parse_dates=True)[["C1", "C2", "C3", "C4"]]
-        pv_profiles_cg5 = pd.read_excel(os.path.join(data_dir, "220530_PV_Calculations.xlsx"),
-                                    sheet_name='PV', index_col=0, parse_dates=True).loc[:,
-                      ["PV_1", "PV_2", "PV_3", "PV_4"]].drop(index=["SUM", "MAX"])
-        pv_profiles_cg5.index = pd.to_datetime(pv_profiles_cg5.index)
-        ev_profiles_cg5 = pd.read_excel(os.path.join(data_dir, "220530_PV_Calculations.xlsx"),
-                                    sheet_name='emob', index_col=0, parse_dates=True).loc[:,
-                      ["E_Mob_PHEV_1", "E_Mob_BEV_1", "E_Mob_PHEV_2", "E_Mob_BEV_2"]].drop(index=["SUM", "MAX"])
-        ev_profiles_cg5.index = pd.to_datetime(ev_profiles_cg5.index)
+        hh_profiles_cg5 = profile_store.frame("household")
+        pv_profiles_cg5 = profile_store.frame("pv")
+        ev_profiles_cg5 = profile_store.frame("ev")
         bess_profiles_cg5 = pd.DataFrame(data=0, index=hh_profiles_cg5.index,
                                          columns=["B_1", "B_2", "B_3", "B_4"])
         # Todo: use data of CG4 here
-        hh_profiles_cg4 = \
-            pd.read_excel(os.path.join(data_dir, "220530_PV_Calculations.xlsx"),
-                          sheet_name='grundverbrauch', index_col=0,
-                          parse_dates=True)[["C1", "C2", "C3", "C4"]]
-        pv_profiles_cg4 = pd.read_excel(
-            os.path.join(data_dir, "220530_PV_Calculations.xlsx"),
-            sheet_name='PV', index_col=0, parse_dates=True).loc[:,
-                      ["PV_1", "PV_2", "PV_3", "PV_4"]].drop(index=["SUM", "MAX"])
-        pv_profiles_cg4.index = pd.to_datetime(pv_profiles_cg4.index)
+        hh_profiles_cg4 = profile_store.frame("household")
+        pv_profiles_cg4 = profile_store.frame("pv")
         bess_profiles_cg4 = pd.DataFrame(data=0, index=hh_profiles_cg4.index,
                                          columns=["B_1", "B_2", "B_3", "B_4"])
         # combine profiles
@@ -339,10 +1107,10 @@ if __name__ == "__main__":
             profiles_hh_pv_bess_cg4=hh_pv_bess_profiles_cg4,
             profiles_hh_ev_cg5=hh_ev_profiles_cg5,
             profiles_hh_ev_pv_cg5=hh_ev_pv_profiles_cg5,
-            profiles_hh_ev_pv_bess_cg5=hh_ev_pv_bess_profiles_cg5
+            profiles_hh_ev_pv_bess_cg5=hh_ev_pv_bess_profiles_cg5,
+            month_starts=profile_store.month_starts
         )
         reduction_potential_pv.to_csv("pv_cost_reduction.csv")
     if calculate_cost_contribution:
-        cost_contribution_ur, cost_contribution_cr = \
-            determine_usage_and_capacity_related_cost_contributions()
-        cost_contribution_ur.to_csv("cost_contribution_ur.csv")
+        determine_usage_and_capacity_related_cost_contributions(
+            file_path="cost_contribution_ur.csv")
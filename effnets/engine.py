@@ -0,0 +1,506 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+from regression import get_correlation_and_slope, get_segment_comoments, \
+    get_slope_penalty
+from indicators import names_criteria, \
+    get_share_usage_and_capacity_related_costs, get_pv_cost_reduction, \
+    get_pv_cost_reduction_values
+
+
+# Vectorised calculation of the indicators for all scenarios and alternatives
+
+class PerformanceMatrix:
+    """
+    Performance of all alternatives in all scenarios with respect to all criteria.
+
+    :param values: np.array
+        array of shape (len(scenarios), len(alternatives), len(criteria))
+    :param scenarios: list of int
+        labels of first axis
+    :param alternatives: list of int
+        labels of second axis
+    :param criteria: list of str or None (default)
+        labels of third axis, defaults to names_criteria()
+    """
+    def __init__(self, values, scenarios, alternatives, criteria=None):
+        self.values = values
+        self.scenarios = list(scenarios)
+        self.alternatives = list(alternatives)
+        self.criteria = names_criteria() if criteria is None else list(criteria)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def scenario(self, idx_scenario):
+        """
+        Performance matrix of a single scenario.
+
+        :param idx_scenario: int
+        :return: pd.DataFrame
+            index: criteria, columns: alternatives
+        """
+        return pd.DataFrame(self.values[self.scenarios.index(idx_scenario)].T,
+                            index=self.criteria, columns=self.alternatives)
+
+    def select(self, scenarios=None, alternatives=None):
+        """
+        Performance matrix restricted to the given scenarios and alternatives.
+
+        :param scenarios: list of int or None (default)
+        :param alternatives: list of int or None (default)
+        :return: PerformanceMatrix
+        """
+        scenarios = self.scenarios if scenarios is None else list(scenarios)
+        alternatives = self.alternatives if alternatives is None else \
+            list(alternatives)
+        idx_scenarios = [self.scenarios.index(s) for s in scenarios]
+        idx_alternatives = [self.alternatives.index(a) for a in alternatives]
+        return PerformanceMatrix(
+            self.values[np.ix_(idx_scenarios, idx_alternatives)], scenarios,
+            alternatives, self.criteria)
+
+    def to_frame(self, alternative_names=None):
+        """
+        Performance matrices of all scenarios below each other, format of
+        results/result_matrix.csv.
+
+        :param alternative_names: list of str or None (default)
+            names of alternatives, defaults to the alternative labels
+        :return: pd.DataFrame
+            index: criteria, columns: alternatives and "Scenario"
+        """
+        nr_scenarios, nr_alternatives, nr_criteria = self.shape
+        result_matrix = pd.DataFrame(
+            self.values.transpose(0, 2, 1).reshape(-1, nr_alternatives),
+            index=self.criteria * nr_scenarios,
+            columns=self.alternatives if alternative_names is None else
+            alternative_names)
+        result_matrix['Scenario'] = np.repeat(self.scenarios, nr_criteria)
+        return result_matrix
+
+
+class Segments:
+    """
+    Rows of a Dataset grouped into segments of (scenario, alternative) combinations.
+    Segments are ordered by scenario first and alternative second, so that reductions
+    over the segments can be reshaped into arrays of shape (len(scenarios),
+    len(alternatives)).
+
+    :param dt: Dataset
+        input data
+    :param scenarios: list of int
+    :param alternatives: list of int
+    """
+    def __init__(self, dt, scenarios, alternatives):
+        self.dt = dt
+        self.scenarios = list(scenarios)
+        self.alternatives = list(alternatives)
+        self.shape = (len(self.scenarios), len(self.alternatives))
+        starts, stops = dt.segments(self.scenarios, self.alternatives)
+        self.rows, self.starts, self.counts = _gather(starts, stops)
+        self._reference = None
+
+    def column(self, column):
+        """
+        Values of <column> of all rows in the order of the segments.
+
+        :param column: str
+        :return: np.array
+        """
+        values = self.dt.array(column)
+        if isinstance(self.rows, slice):
+            return values[self.rows]
+        return values.take(self.rows)
+
+    def sum(self, column):
+        """
+        Sum of <column> over all rows of every segment.
+
+        :param column: str
+        :return: np.array
+            shape (len(scenarios), len(alternatives))
+        """
+        return np.add.reduceat(self.column(column), self.starts).reshape(self.shape)
+
+    def value(self, customer_group, column):
+        """
+        Value of <column> for <customer_group> in every segment.
+
+        :param customer_group: int
+        :param column: str
+        :return: np.array
+            shape (len(scenarios), len(alternatives))
+        """
+        mask = self.column("Customer Group") == customer_group
+        idx_segments = np.repeat(np.arange(self.counts.size), self.counts)[mask]
+        if not np.array_equal(np.unique(idx_segments), np.arange(self.counts.size)):
+            raise KeyError(f"Customer group {customer_group} is missing in at least "
+                           f"one combination of scenario and alternative.")
+        values = np.empty(self.counts.size)
+        values[idx_segments] = self.column(column)[mask]
+        return values.reshape(self.shape)
+
+    def broadcast(self, values):
+        """
+        Repeat values per segment for every row of the segment.
+
+        :param values: np.array
+            shape (len(scenarios), len(alternatives))
+        :return: np.array
+        """
+        return np.repeat(np.asarray(values).ravel(), self.counts)
+
+    @property
+    def reference(self):
+        """
+        Segments of the reference alternative (1), the volumetric tariff, in the same
+        scenarios.
+
+        :return: Segments
+        """
+        if self._reference is None:
+            self._reference = Segments(self.dt, self.scenarios, [1])
+        return self._reference
+
+
+def _gather(starts, stops):
+    """
+    Determine rows and segment starts for the segments given by starts and stops.
+
+    :param starts: np.array
+    :param stops: np.array
+    :return: tuple
+        rows (slice if the segments are contiguous, otherwise np.array of indices),
+        start of every segment in the gathered rows and number of rows per segment
+    """
+    starts = starts.ravel()
+    counts = stops.ravel() - starts
+    segment_starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+    if np.array_equal(starts - starts[0], segment_starts):
+        rows = slice(starts[0], starts[0] + counts.sum())
+    else:
+        rows = np.repeat(starts - segment_starts, counts) + np.arange(counts.sum())
+    return rows, segment_starts, counts
+
+
+def _get_rows_segments(segments, *args, **kwargs):
+    # number of rows of all segments, recorded by instrument
+    return segments.counts.sum()
+
+
+def _get_correlation_and_slope(x, y, segments):
+    # correlation and slope within every segment, shape (len(scenarios),
+    # len(alternatives))
+    correlation, slope = get_correlation_and_slope(x, y, starts=segments.starts)
+    return correlation.reshape(segments.shape), slope.reshape(segments.shape)
+
+
+@instrument(rows=_get_rows_segments)
+def get_relative_reduction_matrix(segments, parameter):
+    """
+    Vectorised version of indicators.get_relative_reduction.
+
+    :param segments: Segments
+    :param parameter: str
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    reference = segments.dt.references(segments.scenarios, parameter)[:, None]
+    return 1.5 - segments.sum(parameter) / reference
+
+
+@instrument(rows=_get_rows_segments)
+def get_reflection_of_costs_matrix(segments, cost_contribution_ur,
+                                   cost_contribution_cr):
+    """
+    Vectorised version of indicators.get_reflection_of_costs.
+
+    :param segments: Segments
+    :param cost_contribution_ur: np.array
+        share of usage-related costs, shape (len(scenarios), len(alternatives))
+    :param cost_contribution_cr: np.array
+        share of capacity-related costs, shape (len(scenarios), len(alternatives))
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    # scale to costs, Eq. (8) and (9)
+    cost_driver_share = \
+        segments.broadcast(cost_contribution_ur) * segments.column("Peak Share") + \
+        segments.broadcast(cost_contribution_cr) * segments.column("Capacity Share")
+    correlation, slope = _get_correlation_and_slope(
+        segments.column("Cost Share"), cost_driver_share, segments)
+    return correlation * get_slope_penalty(slope)
+
+
+@instrument(rows=_get_rows_segments)
+def get_efficient_grid_matrix(segments, cost_contribution_ur, cost_contribution_cr):
+    """
+    Vectorised version of indicators.get_efficient_grid.
+
+    :param segments: Segments
+    :param cost_contribution_ur: np.array
+        share of usage-related costs, shape (len(scenarios), len(alternatives))
+    :param cost_contribution_cr: np.array
+        share of capacity-related costs, shape (len(scenarios), len(alternatives))
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    reflection_of_costs = get_reflection_of_costs_matrix(
+        segments, cost_contribution_ur, cost_contribution_cr)
+    reduction_of_usage_related_costs = \
+        get_relative_reduction_matrix(segments, "Simultaneous Peak")
+    reduction_of_capacity_related_costs = \
+        get_relative_reduction_matrix(segments, "Contracted Capacity")
+    return combine_efficient_grid(
+        reflection_of_costs, reduction_of_usage_related_costs,
+        reduction_of_capacity_related_costs, cost_contribution_ur,
+        cost_contribution_cr)
+
+
+def combine_efficient_grid(reflection_of_costs, reduction_of_usage_related_costs,
+                           reduction_of_capacity_related_costs, cost_contribution_ur,
+                           cost_contribution_cr):
+    """
+    Combine the sub-indicators of the criterion Efficient Grid.
+
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    return 0.5 * (reflection_of_costs +
+                  cost_contribution_ur * reduction_of_usage_related_costs +
+                  cost_contribution_cr * reduction_of_capacity_related_costs)
+
+
+@instrument(rows=_get_rows_segments)
+def get_cost_contribution_sweep(segments, ur_base):
+    """
+    Vectorised version of
+    data.data_preparation.determine_usage_and_capacity_related_cost_contributions for
+    several assumptions of the share of usage-related costs in the status quo
+    (scenario 1 with alternative 1).
+
+    :param segments: Segments
+    :param ur_base: np.array
+        shares of usage-related costs in the status quo, shape (U,)
+    :return: np.array
+        share of usage-related costs, shape (U, len(scenarios), len(alternatives))
+    """
+    ur_base = np.asarray(ur_base, dtype=float)[:, None, None]
+    # adapt to new alternative and scenario, Eq. (33) and (34)
+    peak = segments.sum("Simultaneous Peak") / \
+        segments.dt.reference(1, "Simultaneous Peak")
+    capacity = segments.sum("Contracted Capacity") / \
+        segments.dt.reference(1, "Contracted Capacity")
+    cost_contribution_ur = ur_base * peak
+    cost_contribution_cr = (1 - ur_base) * capacity
+    # normalise so sum is 1, Eq. (35)
+    return cost_contribution_ur / (cost_contribution_ur + cost_contribution_cr)
+
+
+@instrument(rows=_get_rows_segments)
+def get_reflection_of_costs_sweep(segments, cost_contribution_ur):
+    """
+    Vectorised version of get_reflection_of_costs_matrix for several splits into
+    usage- and capacity-related costs. The co-moments of cost, peak and capacity
+    shares are determined once, correlation and slope for every split follow from
+    them, as the cost driver share is linear in the split.
+
+    :param segments: Segments
+    :param cost_contribution_ur: np.array
+        share of usage-related costs, shape (U, len(scenarios), len(alternatives))
+    :return: np.array
+        shape (U, len(scenarios), len(alternatives))
+    """
+    comoments = get_segment_comoments(
+        np.column_stack([segments.column("Cost Share"), segments.column("Peak Share"),
+                         segments.column("Capacity Share")]),
+        segments.starts).reshape(segments.shape + (3, 3))
+    ur = cost_contribution_ur
+    cr = 1 - cost_contribution_ur
+    # co-moments of cost share and cost driver share, Eq. (8) and (9)
+    sxx = comoments[..., 0, 0]
+    sxy = ur * comoments[..., 0, 1] + cr * comoments[..., 0, 2]
+    syy = ur * ur * comoments[..., 1, 1] + 2 * ur * cr * comoments[..., 1, 2] + \
+        cr * cr * comoments[..., 2, 2]
+    correlation = sxy / np.sqrt(sxx * syy)
+    return correlation * get_slope_penalty(sxy / sxx)
+
+
+@instrument(rows=_get_rows_segments)
+def get_efficient_grid_sweep(segments, ur_base):
+    """
+    Criterion Efficient Grid for several assumptions of the share of usage-related
+    costs in the status quo, see get_cost_contribution_sweep.
+
+    :param segments: Segments
+    :param ur_base: np.array
+        shares of usage-related costs in the status quo, shape (U,)
+    :return: tuple of np.array
+        share of usage-related costs and Efficient Grid, both of shape
+        (U, len(scenarios), len(alternatives))
+    """
+    cost_contribution_ur = get_cost_contribution_sweep(segments, ur_base)
+    reflection_of_costs = get_reflection_of_costs_sweep(segments, cost_contribution_ur)
+    reduction_of_usage_related_costs = \
+        get_relative_reduction_matrix(segments, "Simultaneous Peak")
+    reduction_of_capacity_related_costs = \
+        get_relative_reduction_matrix(segments, "Contracted Capacity")
+    efficient_grid = combine_efficient_grid(
+        reflection_of_costs, reduction_of_usage_related_costs,
+        reduction_of_capacity_related_costs, cost_contribution_ur,
+        1 - cost_contribution_ur)
+    return cost_contribution_ur, efficient_grid
+
+
+@instrument(rows=_get_rows_segments)
+def get_fairness_matrix(segments):
+    """
+    Vectorised version of indicators.get_fairness.
+
+    :param segments: Segments
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    # get base value for inflexible consumer group under energy based tariff
+    cost_share_inflex_base = segments.dt.reference(1, "Relative Cost Share")
+    relative_cost_share_inflex = segments.value(1, "Relative Cost Share")
+    return 1.5 - relative_cost_share_inflex / cost_share_inflex_base
+
+
+@instrument(rows=_get_rows_segments)
+def get_expansion_der_matrix(segments, pv_cost_reduction):
+    """
+    Vectorised version of indicators.get_expansion_der.
+
+    :param segments: Segments
+    :param pv_cost_reduction: pd.DataFrame
+        relative costs after purchase of PV system, index: consumer groups ("PV",
+        "PV_BESS", "EV_PV", "EV_PV_BESS") or ("Scenario", "Consumer Group") for
+        scenario-specific values, columns: alternatives, see
+        indicators.get_pv_cost_reduction_values
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    pv_cost_reduction = get_pv_cost_reduction_values(
+        pv_cost_reduction, segments.scenarios, segments.alternatives)
+    # get customer shares of non-PV-owners
+    cg1_share = segments.reference.value(1, "Group Share")
+    cg2_share = segments.reference.value(3, "Group Share")
+    cu = cg1_share + cg2_share
+    # get PV rentability, Eq. (21)-(24)
+    pv_cost_change = \
+        cg1_share / cu * (0.5 * pv_cost_reduction[:, 0] +
+                          0.5 * pv_cost_reduction[:, 1]) + \
+        cg2_share / cu * (0.5 * pv_cost_reduction[:, 2] +
+                          0.5 * pv_cost_reduction[:, 3])
+    # normalise PV rentability, Eq. (25)
+    return 1.5 - pv_cost_change
+
+
+@instrument(rows=_get_rows_segments)
+def get_efficient_electricity_usage_matrix(segments):
+    """
+    Vectorised version of indicators.get_efficient_electricity_usage.
+
+    :param segments: Segments
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    reflection_of_electricity = get_reflection_of_electricity_matrix(segments)
+    reduction_of_purchased_electricity = \
+        get_relative_reduction_matrix(segments, "Electricity Purchased")
+    return combine_efficient_electricity_usage(
+        reflection_of_electricity, reduction_of_purchased_electricity)
+
+
+@instrument(rows=_get_rows_segments)
+def get_reflection_of_electricity_matrix(segments):
+    """
+    Correlation of cost shares and energy shares, penalised by the deviation of the
+    slope from 1.
+
+    :param segments: Segments
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    correlation, slope = _get_correlation_and_slope(
+        segments.column("Cost Share"), segments.column("Energy Share"), segments)
+    return correlation * get_slope_penalty(slope)
+
+
+def combine_efficient_electricity_usage(reflection_of_electricity,
+                                        reduction_of_purchased_electricity):
+    """
+    Combine the sub-indicators of the criterion Efficient Electricity Usage.
+
+    :return: np.array
+        shape (len(scenarios), len(alternatives))
+    """
+    return 0.5 * (reflection_of_electricity + reduction_of_purchased_electricity)
+
+
+@instrument
+def get_performance_matrix(dt, scenarios=None, alternatives=None, inputs=None,
+                           cost_contribution_ur=None, pv_cost_reduction=None,
+                           workers=None):
+    """
+    Calculate all criteria for all scenarios and alternatives at once.
+
+    :param dt: Dataset
+        input data
+    :param scenarios: list of int or None (default)
+        scenarios to be analysed, defaults to all scenarios in dt
+    :param alternatives: list of int or None (default)
+        alternatives to be analysed, defaults to all alternatives in dt
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :param cost_contribution_ur: pd.DataFrame or None (default)
+        share of usage-related costs, index: scenarios, columns: alternatives,
+        overrides the table of the inputs
+    :param pv_cost_reduction: pd.DataFrame or None (default)
+        relative costs after purchase of PV system, overrides the table of the inputs
+    :param workers: int or None (default)
+        number of processes, scenarios are distributed over a process pool sharing
+        the input data in shared memory if larger than 1, see parallel.py. Results
+        are identical to the evaluation in the calling process.
+    :return: PerformanceMatrix
+    """
+    scenarios = dt.scenarios if scenarios is None else list(scenarios)
+    alternatives = dt.alternatives if alternatives is None else list(alternatives)
+    if cost_contribution_ur is None:
+        cost_contribution_ur = get_share_usage_and_capacity_related_costs(inputs)[1]
+    if pv_cost_reduction is None:
+        pv_cost_reduction = get_pv_cost_reduction(inputs)
+    if workers is not None and workers > 1:
+        from parallel import get_performance_values_parallel
+        values = get_performance_values_parallel(
+            dt, scenarios, alternatives, cost_contribution_ur, pv_cost_reduction,
+            workers)
+    else:
+        values = get_performance_values(
+            dt, scenarios, alternatives, cost_contribution_ur, pv_cost_reduction)
+    return PerformanceMatrix(values, scenarios, alternatives)
+
+
+@instrument
+def get_performance_values(dt, scenarios, alternatives, cost_contribution_ur,
+                           pv_cost_reduction):
+    """
+    Calculate all criteria for the given scenarios and alternatives, see
+    get_performance_matrix.
+
+    :return: np.array
+        shape (len(scenarios), len(alternatives), len(criteria))
+    """
+    segments = Segments(dt, scenarios, alternatives)
+    weight_ur = cost_contribution_ur.loc[scenarios, alternatives].to_numpy(float)
+    weight_cr = 1 - weight_ur
+    return np.stack([
+        get_efficient_grid_matrix(segments, weight_ur, weight_cr),
+        get_fairness_matrix(segments),
+        get_expansion_der_matrix(segments, pv_cost_reduction),
+        get_efficient_electricity_usage_matrix(segments)
+    ], axis=-1)
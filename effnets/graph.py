@@ -0,0 +1,314 @@
+import functools
+import hashlib
+import os
+import pathlib
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from engine import PerformanceMatrix, Segments, get_relative_reduction_matrix, \
+    get_reflection_of_costs_matrix, get_reflection_of_electricity_matrix, \
+    get_fairness_matrix, get_expansion_der_matrix, combine_efficient_grid, \
+    combine_efficient_electricity_usage
+from inputs import get_default_inputs
+from results import rate_many
+
+
+# Incremental evaluation of the indicator chain with results cached on disk
+
+CODE_DIR = pathlib.Path(__file__).parent.resolve()
+
+
+@functools.lru_cache(maxsize=None)
+def get_code_hash():
+    """
+    SHA-256 hash of the source files of the framework (effnets and effnets/data). It
+    is part of the key of every cached output, so that outputs computed by a
+    different version of the code are never read.
+
+    :return: str
+    """
+    code_hash = hashlib.sha256()
+    for path in sorted(CODE_DIR.glob("*.py")) + sorted(CODE_DIR.glob("data/*.py")):
+        code_hash.update(path.relative_to(CODE_DIR).as_posix().encode())
+        code_hash.update(path.read_bytes())
+    return code_hash.hexdigest()
+
+
+class Node:
+    """
+    Node of a Graph. The output of the node is the result of <func> applied to the
+    outputs of its dependencies.
+
+    :param name: str
+    :param func: callable
+        takes the outputs of the dependencies as positional arguments
+    :param dependencies: list of str
+        names of the nodes the output depends on
+    :param persist: bool
+        whether the output is cached on disk, outputs that are cheap to compute or
+        cannot be pickled (e.g. Segments) are only kept in memory
+    :param version: str
+        version of <func>, has to be changed whenever the implementation changes the
+        output so that cached outputs are invalidated
+    """
+    def __init__(self, name, func, dependencies=(), persist=True, version=""):
+        self.name = name
+        self.func = func
+        self.dependencies = list(dependencies)
+        self.persist = persist
+        self.version = version
+
+
+class Graph:
+    """
+    Dependency graph of inputs and derived values. Every node is identified by the
+    content hash of its inputs, i.e. its name, version, the hash of the code (see
+    get_code_hash) and the hashes of the outputs of its dependencies. Outputs of
+    persisted nodes are stored on disk under this key, so that a node is only
+    recomputed if one of its inputs or the code changed. Outputs are loaded
+    lazily, nodes whose output is not needed for recomputation are not read at all.
+
+    :param cache_dir: str or pathlib.Path or None (default)
+        directory of the cache, nothing is stored on disk if None
+    :param code_hash: str or None (default)
+        version of the code, defaults to get_code_hash
+    """
+    def __init__(self, cache_dir=None, code_hash=None):
+        self.cache_dir = None if cache_dir is None else pathlib.Path(cache_dir)
+        self.code_hash = get_code_hash() if code_hash is None else code_hash
+        self.nodes = {}
+        self.computed = []
+        self._hashes = {}
+        self._values = {}
+        self._loaders = {}
+
+    def add_input(self, name, loader, content_hash):
+        """
+        Add an input whose content hash is known without loading it, e.g. a file.
+
+        :param name: str
+        :param loader: callable
+            called without arguments when the value is needed
+        :param content_hash: str
+        """
+        self.nodes[name] = Node(name, None, persist=False)
+        self._hashes[name] = content_hash
+        self._loaders[name] = loader
+
+    def add_value(self, name, value):
+        """
+        Add an input that is already in memory.
+
+        :param name: str
+        :param value:
+        """
+        self.nodes[name] = Node(name, None, persist=False)
+        self._hashes[name] = get_content_hash(value)
+        self._values[name] = value
+
+    def add_node(self, name, func, dependencies, persist=True, version=""):
+        """
+        Add a derived value, see Node.
+        """
+        for dependency in dependencies:
+            if dependency not in self.nodes:
+                raise KeyError(f"Dependency {dependency} of {name} is not defined.")
+        self.nodes[name] = Node(name, func, dependencies, persist, version)
+
+    def hash(self, name):
+        """
+        Content hash of the output of a node. Computing the hash only evaluates the
+        nodes that are not cached.
+
+        :param name: str
+        :return: str
+        """
+        if name not in self._hashes:
+            node = self.nodes[name]
+            key = self._get_key(node)
+            path = self._get_path(node, key)
+            if path is not None and path.with_suffix(".hash").exists():
+                self._hashes[name] = path.with_suffix(".hash").read_text()
+            elif not node.persist:
+                # outputs in memory are identified by their inputs
+                self._hashes[name] = key
+            else:
+                self._evaluate(node, key)
+        return self._hashes[name]
+
+    def get(self, name):
+        """
+        Output of a node, loaded from the cache or computed if its inputs changed.
+
+        :param name: str
+        :return:
+        """
+        if name not in self._values:
+            if name in self._loaders:
+                self._values[name] = self._loaders[name]()
+                return self._values[name]
+            node = self.nodes[name]
+            key = self._get_key(node)
+            path = self._get_path(node, key)
+            if path is not None and path.exists():
+                with open(path, "rb") as f:
+                    self._values[name] = pickle.load(f)
+                self._hashes.setdefault(name, path.with_suffix(".hash").read_text())
+            else:
+                self._evaluate(node, key)
+        return self._values[name]
+
+    def _get_key(self, node):
+        key = hashlib.sha256(
+            f"{node.name}\0{node.version}\0{self.code_hash}".encode())
+        for dependency in node.dependencies:
+            key.update(self.hash(dependency).encode())
+        return key.hexdigest()
+
+    def _get_path(self, node, key):
+        if self.cache_dir is None or not node.persist:
+            return None
+        return self.cache_dir / f"{node.name}-{key}.pkl"
+
+    def _evaluate(self, node, key):
+        value = node.func(*[self.get(dependency) for dependency in node.dependencies])
+        self.computed.append(node.name)
+        self._values[node.name] = value
+        path = self._get_path(node, key)
+        if path is None:
+            self._hashes[node.name] = key
+            return
+        self._hashes[node.name] = get_content_hash(value)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # the hash is written first, outputs without hash are never read
+            path.with_suffix(".hash").write_text(self._hashes[node.name])
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            # e.g. read-only cache directory, continue without cache
+            pass
+
+
+def get_content_hash(value):
+    """
+    SHA-256 hash of the content of a value. Arrays and pandas objects are hashed by
+    their data and labels, containers and objects element by element and all other
+    values by their pickled representation.
+
+    :param value:
+    :return: str
+    """
+    content_hash = hashlib.sha256()
+    _update_hash(content_hash, value)
+    return content_hash.hexdigest()
+
+
+def _update_hash(content_hash, value):
+    content_hash.update(type(value).__name__.encode())
+    if isinstance(value, np.ndarray):
+        content_hash.update(f"{value.dtype.str}{value.shape}".encode())
+        content_hash.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        _update_hash(content_hash, pd.util.hash_pandas_object(value).to_numpy())
+        if isinstance(value, pd.DataFrame):
+            _update_hash(content_hash, [str(column) for column in value.columns])
+    elif isinstance(value, dict):
+        for key in value:
+            _update_hash(content_hash, key)
+            _update_hash(content_hash, value[key])
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _update_hash(content_hash, item)
+    elif hasattr(value, "__dict__"):
+        # e.g. PerformanceMatrix or Ratings
+        _update_hash(content_hash, vars(value))
+    else:
+        content_hash.update(pickle.dumps(value, protocol=4))
+
+
+def build_analysis_graph(weights, inputs=None, scenarios=None, alternatives=None,
+                         cache_dir=None):
+    """
+    Graph of the indicator chain from the input tables over the sub-indicators and
+    criteria to the ratings of all alternatives, see engine.get_performance_matrix and
+    results.rate_many. A change of e.g. pv_cost_reduction.csv only recomputes
+    "Expansion of DER", the performance matrix and the ratings; new weights only
+    recompute the ratings.
+
+    :param weights: pd.DataFrame
+        weightings of the criteria, one row per weighting, see results.rate_many
+    :param inputs: InputBundle or None (default)
+        input files, defaults to the input files in effnets/data
+    :param scenarios: list of int or None (default)
+        scenarios to be analysed, defaults to all scenarios of the input data
+    :param alternatives: list of int or None (default)
+        alternatives to be analysed, defaults to all alternatives of the input data
+    :param cache_dir: str or pathlib.Path or None (default)
+        directory of the cache, nothing is stored on disk if None
+    :return: Graph
+        nodes "performance" (PerformanceMatrix) and "ratings" (Ratings) contain the
+        results
+    """
+    if inputs is None:
+        inputs = get_default_inputs()
+    graph = Graph(cache_dir)
+    # input tables
+    for name in ["dataset", "cost_contribution_ur", "pv_cost_reduction"]:
+        graph.add_input(name, inputs.files[name].get, inputs.files[name].hash())
+    graph.add_value("weights", weights)
+    graph.add_value("selection", (scenarios, alternatives))
+    # derived values
+    graph.add_node("labels", _get_labels, ["dataset", "selection"])
+    graph.add_node("segments", lambda dt, labels: Segments(dt, *labels),
+                   ["dataset", "labels"], persist=False)
+    graph.add_node("weight_ur", _get_weight_ur, ["cost_contribution_ur", "labels"])
+    # sub-indicators
+    graph.add_node("Reflection of Costs",
+                   lambda segments, weight_ur: get_reflection_of_costs_matrix(
+                       segments, weight_ur, 1 - weight_ur),
+                   ["segments", "weight_ur"])
+    for name, parameter in [
+            ("Reduction of Usage-related Costs", "Simultaneous Peak"),
+            ("Reduction of Capacity-related Costs", "Contracted Capacity"),
+            ("Reduction of Purchased Electricity", "Electricity Purchased")]:
+        graph.add_node(name, lambda segments, parameter=parameter:
+                       get_relative_reduction_matrix(segments, parameter),
+                       ["segments"], version=parameter)
+    graph.add_node("Reflection of Electricity", get_reflection_of_electricity_matrix,
+                   ["segments"])
+    # criteria
+    graph.add_node("Efficient Grid",
+                   lambda roc, red_ur, red_cr, weight_ur: combine_efficient_grid(
+                       roc, red_ur, red_cr, weight_ur, 1 - weight_ur),
+                   ["Reflection of Costs", "Reduction of Usage-related Costs",
+                    "Reduction of Capacity-related Costs", "weight_ur"])
+    graph.add_node("Fairness and Customer Acceptance", get_fairness_matrix,
+                   ["segments"])
+    graph.add_node("Expansion of DER", get_expansion_der_matrix,
+                   ["segments", "pv_cost_reduction"])
+    graph.add_node("Efficient Electricity Usage", combine_efficient_electricity_usage,
+                   ["Reflection of Electricity", "Reduction of Purchased Electricity"])
+    # performance and ratings
+    graph.add_node("performance",
+                   lambda labels, *criteria: PerformanceMatrix(
+                       np.stack(criteria, axis=-1), *labels),
+                   ["labels", "Efficient Grid", "Fairness and Customer Acceptance",
+                    "Expansion of DER", "Efficient Electricity Usage"])
+    graph.add_node("ratings", rate_many, ["performance", "weights"])
+    return graph
+
+
+def _get_labels(dt, selection):
+    scenarios, alternatives = selection
+    return (dt.scenarios if scenarios is None else list(scenarios),
+            dt.alternatives if alternatives is None else list(alternatives))
+
+
+def _get_weight_ur(cost_contribution_ur, labels):
+    scenarios, alternatives = labels
+    return cost_contribution_ur.loc[scenarios, alternatives].to_numpy(float)
@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 
+from inputs import get_default_inputs
+from instrumentation import instrument
+from regression import get_correlation_and_slope, get_slope_penalty
+
 
 # Implementation of the indicators with functions
 
@@ -23,6 +27,74 @@ def add_names_criteria(df):
     return df
 
 
+class IndicatorResult:
+    """
+    Values of an indicator for all alternatives of a scenario, stored in a single
+    float64 array. Conversion to pandas objects shares the array without copying.
+
+    :param values: np.array
+        value per alternative
+    :param alternatives: list of int
+        labels of the alternatives
+    """
+    __slots__ = ("values", "alternatives")
+
+    def __init__(self, values, alternatives):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.alternatives = list(alternatives)
+
+    def __len__(self):
+        return len(self.alternatives)
+
+    def __getitem__(self, alternative):
+        return self.values[self.alternatives.index(alternative)]
+
+    def __repr__(self):
+        return f"IndicatorResult({dict(zip(self.alternatives, self.values.tolist()))})"
+
+    def to_series(self, name=None):
+        """
+        :return: pd.Series
+            index: alternatives
+        """
+        return pd.Series(self.values, index=self.alternatives, name=name, copy=False)
+
+    def to_frame(self):
+        """
+        Values in the former output format of the indicators.
+
+        :return: pd.DataFrame
+            single row with index 0, columns: alternatives
+        """
+        return pd.DataFrame(self.values[None, :], columns=self.alternatives, copy=False)
+
+
+def _get_rows_scenario(dt, idx_scenario, nr_alternatives, *args, **kwargs):
+    # number of rows of all alternatives of a scenario, recorded by instrument
+    starts, stops = dt.segments([idx_scenario], range(1, nr_alternatives + 1))
+    return (stops - starts).sum()
+
+
+def _get_rows_alternative(dt, idx_scenario, alternative, *args, **kwargs):
+    rows = dt.rows(idx_scenario, alternative)
+    return rows.stop - rows.start
+
+
+def _get_segments_scenario(dt, idx_scenario, alternatives):
+    # start of every alternative in the output of _get_column_scenario and number of
+    # rows per alternative
+    starts, stops = dt.segments([idx_scenario], alternatives)
+    counts = (stops - starts).ravel()
+    return np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int), counts
+
+
+def _get_column_scenario(dt, idx_scenario, alternatives, column):
+    # values of <column> of all alternatives of a scenario, ordered by alternative
+    return np.concatenate([dt.column(idx_scenario, alternative, column)
+                           for alternative in alternatives])
+
+
+@instrument(rows=_get_rows_scenario)
 def get_relative_reduction(dt, idx_scenario, nr_alternatives, parameter):
     """
     Calculating reduction indicator of absolute value of <parameter> (e.g. 'Simultaneous
@@ -33,7 +105,7 @@ def get_relative_reduction(dt, idx_scenario, nr_alternatives, parameter):
     Negative values indicate an increase >50%, positive values can reach up to 1.5, if
     the parameter value is reduced to 0.
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
@@ -41,33 +113,33 @@ def get_relative_reduction(dt, idx_scenario, nr_alternatives, parameter):
         total number of alternatives
     :param parameter: str
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
+    alternatives = range(1, nr_alternatives + 1)
     # get reference peak for volumetric tariff
-    reference = dt[(dt['Scenario'] == idx_scenario) &
-                   (dt['Alternative'] == 1)][parameter].sum()
+    reference = dt.reference(idx_scenario, parameter)
     # calculate simultaneous power peaks
-    parameter_values = pd.DataFrame()
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt[(dt['Scenario'] == idx_scenario) & (dt['Alternative'] == alternative)]
-        parameter_values.loc[0, alternative] = tmp[parameter].sum()
+    parameter_values = np.empty(nr_alternatives)
+    for idx, alternative in enumerate(alternatives):
+        parameter_values[idx] = dt.column(idx_scenario, alternative, parameter).sum()
     # calculate relative reduction, e.g. Eq. (3)
-    reduction_indicator = 1.5 - parameter_values.divide(reference)
-    return reduction_indicator
+    reduction_indicator = 1.5 - parameter_values / reference
+    return IndicatorResult(reduction_indicator, alternatives)
 
 
+@instrument(rows=_get_rows_scenario)
 def get_reduction_of_usage_related_costs(dt, idx_scenario, nr_alternatives):
     """
     Calculating Usage (Peak) Related Distribution Factor for All Alternatives in given
     Scenario
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # rated reflection of usage related costs, Eq. (9)
     reflection_usage_related = \
@@ -75,17 +147,18 @@ def get_reduction_of_usage_related_costs(dt, idx_scenario, nr_alternatives):
     return reflection_usage_related
 
 
+@instrument(rows=_get_rows_scenario)
 def get_reduction_of_capacity_related_costs(dt, idx_scenario, nr_alternatives):
     """
     Calculating Capacity Related Distribution Factor for All Alternatives
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # reflection of capacity related costs, Eq. (16)
     reflection_capacity_related = \
@@ -93,252 +166,296 @@ def get_reduction_of_capacity_related_costs(dt, idx_scenario, nr_alternatives):
     return reflection_capacity_related
 
 
-def get_reflection_of_costs(dt, idx_scenario, nr_alternatives):
+@instrument(rows=_get_rows_scenario)
+def get_reflection_of_costs(dt, idx_scenario, nr_alternatives, inputs=None):
     """
     Calculating Reflection of Costs for All Alternatives
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :return: IndicatorResult
     """
     cost_contribution_cr, cost_contribution_ur = \
-        get_share_usage_and_capacity_related_costs()
+        get_share_usage_and_capacity_related_costs(inputs)
+    alternatives = range(1, nr_alternatives + 1)
     # calculate share on aggregated peak
-    correlation = pd.DataFrame()
-    slope = pd.DataFrame()
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt[(dt['Scenario'] == idx_scenario) & (dt['Alternative'] == alternative)]
-        cost_share = tmp["Cost Share"].values
-        peak_share = tmp['Peak Share'].values
-        capacity_share = tmp['Capacity Share'].values
-        # scale to costs, Eq. (8)
-        peak_share_scaled = \
-            cost_contribution_ur.loc[idx_scenario, alternative] * peak_share
-        # scale to costs, Eq. (9)
-        capacity_share_scaled = \
-            cost_contribution_cr.loc[idx_scenario, alternative] * capacity_share
-        # extract correlation, Eq.()
-        correlation.loc[0, alternative] = \
-            np.corrcoef(cost_share, peak_share_scaled + capacity_share_scaled)[0, 1]
-        # extract slope, Eq. () Todo: is a slope > 1 bad? Punishment too high then
-        beta_1 = np.polyfit(cost_share, peak_share_scaled + capacity_share_scaled, 1)[0]
-        slope.loc[0, alternative] = min([abs(beta_1), abs(1/beta_1)])
-    return correlation.multiply(slope)
-
-
-def get_share_usage_and_capacity_related_costs():
-    # calculate division into usage- and capacity-related costs
-    cost_contribution_ur = pd.read_csv("data/cost_contribution_ur.csv", index_col=0,
-                                       dtype={0: int})
-    cost_contribution_ur.columns = cost_contribution_ur.columns.astype(int)
-    cost_contribution_cr = 1 - cost_contribution_ur
-    return cost_contribution_cr, cost_contribution_ur
-
-
-def get_efficient_grid(dt, idx_scenario, nr_alternatives):
+    starts, counts = _get_segments_scenario(dt, idx_scenario, alternatives)
+    cost_share = _get_column_scenario(dt, idx_scenario, alternatives, "Cost Share")
+    peak_share = _get_column_scenario(dt, idx_scenario, alternatives, "Peak Share")
+    capacity_share = \
+        _get_column_scenario(dt, idx_scenario, alternatives, "Capacity Share")
+    # scale to costs, Eq. (8)
+    peak_share_scaled = np.repeat(
+        cost_contribution_ur.loc[idx_scenario, alternatives].to_numpy(float),
+        counts) * peak_share
+    # scale to costs, Eq. (9)
+    capacity_share_scaled = np.repeat(
+        cost_contribution_cr.loc[idx_scenario, alternatives].to_numpy(float),
+        counts) * capacity_share
+    # extract correlation and slope, Eq.() Todo: is a slope > 1 bad? Punishment too
+    # high then
+    correlation, beta_1 = get_correlation_and_slope(
+        cost_share, peak_share_scaled + capacity_share_scaled, starts=starts)
+    return IndicatorResult(correlation * get_slope_penalty(beta_1), alternatives)
+
+
+@instrument
+def get_share_usage_and_capacity_related_costs(inputs=None):
+    # division into usage- and capacity-related costs
+    if inputs is None:
+        inputs = get_default_inputs()
+    return inputs.cost_contribution_cr, inputs.cost_contribution_ur
+
+
+@instrument(rows=_get_rows_scenario)
+def get_efficient_grid(dt, idx_scenario, nr_alternatives, inputs=None):
     """
     Get indicator for efficient grid
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :return: IndicatorResult
     """
     cost_contribution_cr, cost_contribution_ur = \
-        get_share_usage_and_capacity_related_costs()
-    weight_ur = cost_contribution_ur.loc[idx_scenario]
-    weight_cr = cost_contribution_cr.loc[idx_scenario]
-    reflection_of_costs = get_reflection_of_costs(dt, idx_scenario, nr_alternatives)
+        get_share_usage_and_capacity_related_costs(inputs)
+    alternatives = range(1, nr_alternatives + 1)
+    weight_ur = cost_contribution_ur.loc[idx_scenario, alternatives].to_numpy(float)
+    weight_cr = cost_contribution_cr.loc[idx_scenario, alternatives].to_numpy(float)
+    reflection_of_costs = \
+        get_reflection_of_costs(dt, idx_scenario, nr_alternatives, inputs)
     reduction_of_usage_related_costs = \
         get_reduction_of_usage_related_costs(dt, idx_scenario, nr_alternatives)
     reduction_of_capacity_related_costs = \
         get_reduction_of_capacity_related_costs(dt, idx_scenario, nr_alternatives)
     efficient_grid = \
-        0.5 * (reflection_of_costs + weight_ur * reduction_of_usage_related_costs +
-               weight_cr * reduction_of_capacity_related_costs)
-    return efficient_grid
+        0.5 * (reflection_of_costs.values +
+               weight_ur * reduction_of_usage_related_costs.values +
+               weight_cr * reduction_of_capacity_related_costs.values)
+    return IndicatorResult(efficient_grid, alternatives)
 
 
+@instrument(rows=_get_rows_scenario)
 def get_fairness(dt, idx_scenario, nr_alternatives):
     """
     Relative Cost Share of Inflexible Customers (Reference Value)
     Todo: overthink this value, should it really be coupled to energy utilisation? Or just share from scenario? Or use values from cost reflection?
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
-    # get relative cost share, Eq. (18)
-    dt['Relative Cost Share'] = dt['Cost Share'] / dt['Group Share']
     # get base value for inflexible consumer group under energy based tariff
-    dt_inflex_base = \
-        dt[(dt['Scenario'] == 1) & (dt['Alternative'] == 1) &
-           (dt['Customer Group'] == 1)]
-    cost_share_inflex_base = dt_inflex_base.loc[0, 'Relative Cost Share']
+    cost_share_inflex_base = dt.reference(1, "Relative Cost Share")
 
     # Calculating Fairness and Customer Acceptance Ratio
-    dt_inflex = dt[(dt['Customer Group'] == 1)].copy()
-    dt_inflex['Fairness'] = \
-        1.5 - dt_inflex['Relative Cost Share'] / cost_share_inflex_base
+    alternatives = range(1, nr_alternatives + 1)
+    fairness = np.empty(nr_alternatives)
+    for idx, alternative in enumerate(alternatives):
+        fairness[idx] = \
+            1.5 - get_relative_cost_share(dt, idx_scenario, alternative, 1) / \
+            cost_share_inflex_base
+    return IndicatorResult(fairness, alternatives)
+
 
-    fairness = pd.DataFrame()
+@instrument(rows=_get_rows_alternative)
+def get_relative_cost_share(dt, idx_scenario, alternative, customer_group):
+    """
+    Relative cost share of a customer group, i.e. its cost share divided by its group
+    share, Eq. (18)
 
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt_inflex[(dt_inflex['Scenario'] == idx_scenario) &
-                        (dt_inflex['Alternative'] == alternative)]
-        fairness.loc[0, alternative] = tmp['Fairness'].values[0]
-    return fairness
+    :param dt: Dataset
+        input data
+    :param idx_scenario: int
+        scenario to be analysed
+    :param alternative: int
+        alternative to be analysed
+    :param customer_group: int
+        customer group to be analysed
+    :return: float
+    """
+    return dt.value(idx_scenario, alternative, customer_group, 'Relative Cost Share')
 
 
+@instrument(rows=_get_rows_scenario)
 def get_cost_change_pv(dt, idx_scenario, nr_alternatives):
     """
     Do PV Owners pay more or less under a given tariff than under a volumetric tariff
     (relative to their purchased electricity share)
     # Todo: include other consumer groups as well? Battery might be more helpful
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # Relative Cost Share of Customer Group 2 (Reference Value)
-    dt_pv_owners_base = dt[(dt['Scenario'] == idx_scenario) &
-                           (dt['Alternative'] == 1) & (dt['Customer Group'] == 2)]
-    cost_share_pv_owner_base = dt_pv_owners_base['Relative Cost Share'].values[0]
-    df_inflex_base = dt[(dt['Scenario'] == idx_scenario) &
-                        (dt['Alternative'] == 1) & (dt['Customer Group'] == 1)]
-    cost_share_inflex_base = df_inflex_base['Relative Cost Share'].values[0]
+    cost_share_pv_owner_base = get_relative_cost_share(dt, idx_scenario, 1, 2)
+    cost_share_inflex_base = get_relative_cost_share(dt, idx_scenario, 1, 1)
     relative_costs_base = cost_share_pv_owner_base/cost_share_inflex_base
 
     # Calculating the PV Cost Ratio under given alternatives, Eq. (26)
-    dt_pv_owners = dt[(dt['Customer Group'] == 2)].copy()
-    dt_inflex = dt[(dt['Customer Group'] == 1)].copy()
-    dt_pv_owners['PV Cost Ratio'] = \
-        dt_pv_owners['Relative Cost Share'] / dt_inflex['Relative Cost Share'].values / \
-        relative_costs_base
-    pv_cost_ratio = pd.DataFrame()
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt_pv_owners[(dt_pv_owners['Scenario'] == idx_scenario) &
-                           (dt_pv_owners['Alternative'] == alternative)]
-        pv_cost_ratio.loc[0, alternative] = 1.5 - tmp['PV Cost Ratio'].values[0]
-    return pv_cost_ratio
-
-
-def get_expansion_der(dt, idx_scenario, nr_alternatives):
+    alternatives = range(1, nr_alternatives + 1)
+    pv_cost_ratio = np.empty(nr_alternatives)
+    for idx, alternative in enumerate(alternatives):
+        ratio = get_relative_cost_share(dt, idx_scenario, alternative, 2) / \
+            get_relative_cost_share(dt, idx_scenario, alternative, 1) / \
+            relative_costs_base
+        pv_cost_ratio[idx] = 1.5 - ratio
+    return IndicatorResult(pv_cost_ratio, alternatives)
+
+
+@instrument(rows=_get_rows_scenario)
+def get_expansion_der(dt, idx_scenario, nr_alternatives, inputs=None):
     """
     How much can consumers not owning a PV system yet save by purchasing one?
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :return: IndicatorResult
     """
+    alternatives = range(1, nr_alternatives + 1)
     # read data
-    dt_pv_cost_change = pd.read_csv("data/pv_cost_reduction.csv", index_col=0).rename(
-        columns={"VT": 1, "MPT": 2, "YPT": 3, "CT": 4}
-    )
+    dt_pv_cost_change = get_pv_cost_reduction_values(
+        get_pv_cost_reduction(inputs), [idx_scenario], alternatives)[0]
     # get customer shares of non-PV-owners
-    cg1_share = dt.loc[(dt.Scenario == idx_scenario)&(dt["Customer Group"] == 1),
-                       "Group Share"].unique()[0]
-    cg2_share = dt.loc[(dt.Scenario == idx_scenario) & (dt["Customer Group"] == 3),
-                       "Group Share"].unique()[0]
+    cg1_share = dt.value(idx_scenario, 1, 1, "Group Share")
+    cg2_share = dt.value(idx_scenario, 1, 3, "Group Share")
     cu = cg1_share + cg2_share
     # get PV rentability, Eq. (21)-(24)
-    pv_cost_change = cg1_share/cu * (0.5 * dt_pv_cost_change.loc["PV"] +
-                                     0.5 * dt_pv_cost_change.loc["PV_BESS"]) + \
-                     cg2_share/cu * (0.5 * dt_pv_cost_change.loc["EV_PV"] +
-                                     0.5 * dt_pv_cost_change.loc["EV_PV_BESS"])
-    df_pv_cost_change = pd.DataFrame(index=[1, 2, 3, 4])
-    df_pv_cost_change[0] = pv_cost_change
+    pv_cost_change = cg1_share/cu * (0.5 * dt_pv_cost_change[0] +
+                                     0.5 * dt_pv_cost_change[1]) + \
+                     cg2_share/cu * (0.5 * dt_pv_cost_change[2] +
+                                     0.5 * dt_pv_cost_change[3])
     # normalise PV rentability, Eq. (25) - Todo: necessary?
-    pv_rentability = 1.5 - df_pv_cost_change.T
-    return pv_rentability
+    pv_rentability = 1.5 - pv_cost_change
+    return IndicatorResult(pv_rentability, alternatives)
 
 
+@instrument
+def get_pv_cost_reduction(inputs=None):
+    # relative cost reduction by purchase of PV systems
+    if inputs is None:
+        inputs = get_default_inputs()
+    return inputs.pv_cost_reduction
+
+
+def get_pv_cost_reduction_values(pv_cost_reduction, scenarios, alternatives):
+    """
+    Relative costs after purchase of DER of the consumer groups "PV", "PV_BESS",
+    "EV_PV" and "EV_PV_BESS" for the given scenarios and alternatives.
+
+    :param pv_cost_reduction: pd.DataFrame
+        relative costs after purchase of DER, either the same for all scenarios
+        (index: consumer groups, format of pv_cost_reduction.csv) or per scenario
+        (index: ("Scenario", "Consumer Group"), see
+        data.data_preparation.get_cost_reduction_der_cube), columns: alternatives
+    :param scenarios: list of int
+    :param alternatives: list of int
+    :return: np.array
+        shape (len(scenarios), 4, len(alternatives))
+    """
+    consumer_groups = ["PV", "PV_BESS", "EV_PV", "EV_PV_BESS"]
+    if isinstance(pv_cost_reduction.index, pd.MultiIndex):
+        values = pv_cost_reduction.loc[
+            pd.MultiIndex.from_product([list(scenarios), consumer_groups]),
+            list(alternatives)].to_numpy(float)
+        return values.reshape(len(scenarios), len(consumer_groups), -1)
+    values = pv_cost_reduction.loc[consumer_groups, list(alternatives)].to_numpy(float)
+    return np.broadcast_to(values, (len(scenarios),) + values.shape)
+
+
+@instrument(rows=_get_rows_scenario)
 def get_reflection_of_electricity(dt, idx_scenario, nr_alternatives):
     """
     Calculating Efficient Electricity Usage Ratio for an Alternative and Scenario
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # calculate correlation and slope between cost share and energy share
-    correlation = pd.DataFrame()
-    slope = pd.DataFrame()
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt[(dt['Scenario'] == idx_scenario) & (dt['Alternative'] == alternative)]
-        cost_share = tmp["Cost Share"].values
-        energy_share = tmp['Energy Share'].values
-        # extract correlation, Eq.()
-        correlation.loc[0, alternative] = \
-            np.corrcoef(cost_share, energy_share)[0, 1]
-        # extract slope, Eq. () Todo: is a slope > 1 bad? Punishment too high then
-        beta_3 = np.polyfit(cost_share, energy_share, 1)[0]
-        slope.loc[0, alternative] = min([abs(beta_3), abs(1/beta_3)])
-    return correlation.multiply(slope)
-
-
+    alternatives = range(1, nr_alternatives + 1)
+    starts, _ = _get_segments_scenario(dt, idx_scenario, alternatives)
+    cost_share = _get_column_scenario(dt, idx_scenario, alternatives, "Cost Share")
+    energy_share = _get_column_scenario(dt, idx_scenario, alternatives, "Energy Share")
+    # extract correlation and slope, Eq.() Todo: is a slope > 1 bad? Punishment too
+    # high then
+    correlation, beta_3 = get_correlation_and_slope(cost_share, energy_share,
+                                                    starts=starts)
+    return IndicatorResult(correlation * get_slope_penalty(beta_3), alternatives)
+
+
+@instrument(rows=_get_rows_scenario)
 def get_reduction_of_purchased_electricity(dt, idx_scenario, nr_alternatives):
     """
     Calculating the total Electricity Purchased for an Alternative and Scenario
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # get base value for volumetric tariff
-    dt_base = dt[(dt['Scenario'] == idx_scenario) & (dt['Alternative'] == 1)]
-    purchased_electricity_base = dt_base["Electricity Purchased"].sum()
+    purchased_electricity_base = dt.reference(idx_scenario, "Electricity Purchased")
     # get reduction of purchased electricity, Eq. (33) - Todo: overthink
-    purchased_electricity = pd.DataFrame()
-    for alternative in range(1, nr_alternatives + 1):
-        tmp = dt[(dt['Scenario'] == idx_scenario) & (dt['Alternative'] == alternative)]
-        purchased_electricity.loc[0, alternative] = \
-            1.5 - tmp['Electricity Purchased'].sum() / purchased_electricity_base
-    return purchased_electricity
+    alternatives = range(1, nr_alternatives + 1)
+    purchased_electricity = np.empty(nr_alternatives)
+    for idx, alternative in enumerate(alternatives):
+        purchased_electricity[idx] = \
+            1.5 - dt.column(idx_scenario, alternative, "Electricity Purchased").sum() / \
+            purchased_electricity_base
+    return IndicatorResult(purchased_electricity, alternatives)
 
 
+@instrument(rows=_get_rows_scenario)
 def get_efficient_electricity_usage(dt, idx_scenario, nr_alternatives):
     """
     Calculating Efficient Electricity Usage for all Alternatives
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
-    :return:
+    :return: IndicatorResult
     """
     # combine and normalise electricity cost ratio and reduction in purchased
     # electricity, Eq.(34)
     efficient_electricity_usage = 0.5 * (
-            get_reflection_of_electricity(dt, idx_scenario, nr_alternatives) +
-            get_reduction_of_purchased_electricity(dt, idx_scenario, nr_alternatives))
-    return efficient_electricity_usage
+            get_reflection_of_electricity(dt, idx_scenario, nr_alternatives).values +
+            get_reduction_of_purchased_electricity(
+                dt, idx_scenario, nr_alternatives).values)
+    return IndicatorResult(efficient_electricity_usage, range(1, nr_alternatives + 1))
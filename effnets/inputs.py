@@ -0,0 +1,278 @@
+import hashlib
+import os
+import pathlib
+import threading
+
+import pandas as pd
+
+from data.data_preparation import import_data, \
+    determine_usage_and_capacity_related_cost_contributions, \
+    get_cost_reduction_der_cube
+from instrumentation import instrument
+
+DATA_DIR = pathlib.Path(__file__).parent.resolve() / "data"
+
+
+class InputFile:
+    """
+    Input file that is loaded once and kept in memory. The file is only reloaded if
+    its modification time changed and the hash of its content differs from the loaded
+    version.
+
+    :param path: str or pathlib.Path
+        path to the file
+    :param loader: callable
+        method that reads the file, takes the path as only argument
+    """
+    def __init__(self, path, loader):
+        self.path = pathlib.Path(path)
+        self.loader = loader
+        self.mtime = None
+        self.content_hash = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Loaded content of the file, reloaded if the file changed on disk.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self.mtime:
+            with self._lock:
+                if mtime != self.mtime:
+                    self._update(mtime)
+        return self._value
+
+    def changed(self):
+        """
+        Check whether the file on disk differs from the loaded version without
+        reloading it.
+
+        :return: bool
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return False
+        return get_file_hash(self.path) != self.content_hash
+
+    def hash(self):
+        """
+        Hash of the content of the file on disk.
+
+        :return: str
+        """
+        return get_file_hash(self.path)
+
+    def _update(self, mtime):
+        content_hash = get_file_hash(self.path)
+        if content_hash != self.content_hash:
+            self._value = self.loader(self.path)
+            self.content_hash = content_hash
+        self.mtime = mtime
+
+
+class DerivedInput:
+    """
+    Input derived in memory from another input, e.g. the cost contributions derived
+    from the network data. The value is only derived again if the source changed.
+
+    :param source: InputFile
+        input the value is derived from
+    :param func: callable
+        method deriving the value, takes the content of the source as only argument
+    :param parameters: tuple
+        parameters of func that are not contained in the source, part of the hash
+    """
+    def __init__(self, source, func, parameters=()):
+        self.source = source
+        self.func = func
+        self.parameters = parameters
+        self.source_hash = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Derived value, derived again if the source changed.
+        """
+        source = self.source.get()
+        if self.source.content_hash != self.source_hash:
+            with self._lock:
+                if self.source.content_hash != self.source_hash:
+                    self._value = self.func(source)
+                    self.source_hash = self.source.content_hash
+        return self._value
+
+    def changed(self):
+        return self.source.changed()
+
+    def hash(self):
+        """
+        Hash of the source and the parameters.
+
+        :return: str
+        """
+        return hashlib.sha256(
+            f"{self.source.hash()}{self.parameters!r}".encode()).hexdigest()
+
+
+class InputBundle:
+    """
+    All inputs of the framework, i.e. the simulated network data and the tables of
+    cost contributions and PV cost reductions. Files are read on first use, kept in
+    memory and only read again if they changed on disk.
+
+    :param data_dir: str or pathlib.Path or None (default)
+        directory containing the input files, defaults to effnets/data independent of
+        the working directory
+    :param input_file: str
+        name of the workbook with the simulated network data
+    :param cost_contribution_file: str
+        name of the csv with the share of usage-related costs
+    :param pv_cost_reduction_file: str
+        name of the csv with the relative costs after purchase of a PV system
+    :param columns: list of str or None (default)
+        columns of the simulated network data to be read, e.g.
+        data.data_preparation.INDICATOR_COLUMNS, defaults to all columns
+    :param ur_base: float or None (default)
+        share of usage-related costs in the status quo. If given, the cost
+        contributions are derived from the network data in memory, see
+        data.data_preparation.determine_usage_and_capacity_related_cost_contributions,
+        instead of being read from <cost_contribution_file>.
+    :param der_proxy: bool
+        whether the scenario-specific proxy of the cost reduction by DER is derived
+        from the network data in memory, see
+        data.data_preparation.get_cost_reduction_der_cube, instead of reading the
+        values of <pv_cost_reduction_file>, default: False
+    """
+    def __init__(self, data_dir=None, input_file="inputdata_new.xlsx",
+                 cost_contribution_file="cost_contribution_ur.csv",
+                 pv_cost_reduction_file="pv_cost_reduction.csv", columns=None,
+                 ur_base=None, der_proxy=False):
+        self.data_dir = DATA_DIR if data_dir is None else pathlib.Path(data_dir)
+        self.files = {
+            "dataset": InputFile(self.data_dir / input_file,
+                                 lambda path: import_data(path, columns=columns)),
+            "cost_contribution_ur": InputFile(
+                self.data_dir / cost_contribution_file, read_cost_contribution_ur),
+            "pv_cost_reduction": InputFile(
+                self.data_dir / pv_cost_reduction_file, read_pv_cost_reduction),
+        }
+        self._cost_contribution_cr = (None, None)
+        if ur_base is not None:
+            self.files["cost_contribution_ur"] = DerivedInput(
+                self.files["dataset"],
+                lambda dt: determine_usage_and_capacity_related_cost_contributions(
+                    dt, ur_base)[0], (ur_base,))
+        if der_proxy:
+            self.files["pv_cost_reduction"] = DerivedInput(
+                self.files["dataset"], get_cost_reduction_der_cube, ("proxy",))
+
+    @property
+    def dataset(self):
+        """
+        Simulated network data, see data.data_preparation.import_data
+
+        :return: Dataset
+        """
+        return self.files["dataset"].get()
+
+    @property
+    def cost_contribution_ur(self):
+        """
+        Share of usage-related costs, index: scenarios, columns: alternatives
+
+        :return: pd.DataFrame
+        """
+        return self.files["cost_contribution_ur"].get()
+
+    @property
+    def cost_contribution_cr(self):
+        """
+        Share of capacity-related costs, index: scenarios, columns: alternatives
+
+        :return: pd.DataFrame
+        """
+        cost_contribution_ur = self.cost_contribution_ur
+        # derived once per loaded version of the usage-related share
+        if self._cost_contribution_cr[0] is not cost_contribution_ur:
+            self._cost_contribution_cr = (cost_contribution_ur,
+                                          1 - cost_contribution_ur)
+        return self._cost_contribution_cr[1]
+
+    @property
+    def pv_cost_reduction(self):
+        """
+        Relative costs after purchase of PV system, index: consumer groups, columns:
+        alternatives
+
+        :return: pd.DataFrame
+        """
+        return self.files["pv_cost_reduction"].get()
+
+    def changed(self):
+        """
+        Names of the inputs whose files changed since they were last loaded.
+
+        :return: list of str
+        """
+        return [name for name, file in self.files.items() if file.changed()]
+
+    def reload(self):
+        """
+        Reload all inputs whose files changed.
+        """
+        for file in self.files.values():
+            file.get()
+
+
+@instrument
+def get_file_hash(path):
+    """
+    SHA-256 hash of the content of a file.
+
+    :param path: str or pathlib.Path
+    :return: str
+    """
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+@instrument(rows="result")
+def read_cost_contribution_ur(path):
+    cost_contribution_ur = pd.read_csv(path, index_col=0, dtype={0: int})
+    cost_contribution_ur.columns = cost_contribution_ur.columns.astype(int)
+    return cost_contribution_ur
+
+
+@instrument(rows="result")
+def read_pv_cost_reduction(path):
+    # scenario-specific values have a second index level, see
+    # get_cost_reduction_der_cube
+    header = pd.read_csv(path, nrows=0).columns
+    pv_cost_reduction = pd.read_csv(
+        path, index_col=[0, 1] if header[0] == "Scenario" else 0)
+    pv_cost_reduction = pv_cost_reduction.rename(
+        columns={"VT": 1, "MPT": 2, "YPT": 3, "CT": 4}
+    )
+    # further alternatives are labelled by their number
+    pv_cost_reduction.columns = pv_cost_reduction.columns.astype(int)
+    return pv_cost_reduction
+
+
+_default_inputs = None
+
+
+def get_default_inputs():
+    """
+    Input bundle of the default input files in effnets/data, shared by all calls.
+
+    :return: InputBundle
+    """
+    global _default_inputs
+    if _default_inputs is None:
+        _default_inputs = InputBundle()
+    return _default_inputs
@@ -0,0 +1,185 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Opt-in instrumentation of the evaluation pipeline. Instrumentation is enabled by
+# setting the environment variable EFFNETS_TRACE before the modules are imported:
+#
+#   EFFNETS_TRACE=1       call counts, cumulative and self time and rows scanned
+#   EFFNETS_TRACE=memory  additionally bytes allocated, i.e. the peak of the memory
+#                         traced with tracemalloc above the memory at the start of
+#                         a call
+#
+# If disabled, instrument returns the functions unchanged and causes no overhead.
+# When enabled, the statistics and a Chrome/Perfetto trace are written to the
+# directory EFFNETS_TRACE_DIR (default: working directory) at exit, see
+# export_statistics and export_trace.
+
+TRACE_MODE = os.environ.get("EFFNETS_TRACE", "").strip().lower()
+ENABLED = TRACE_MODE not in ["", "0", "false", "off"]
+TRACE_MEMORY = TRACE_MODE == "memory"
+
+
+class Recorder:
+    """
+    Statistics per instrumented function and trace events of all calls.
+    """
+    def __init__(self):
+        self.statistics = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start = time.perf_counter_ns()
+
+    def reset(self):
+        with self._lock:
+            self.statistics.clear()
+            self.events.clear()
+
+    def call(self, name, func, rows, args, kwargs):
+        stack = self._local.__dict__.setdefault("stack", [])
+        # time spent in instrumented functions called by this function
+        stack.append(0)
+        memory_before = self._start_memory() \
+            if TRACE_MEMORY and tracemalloc.is_tracing() else None
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter_ns() - start
+            child_time = stack.pop()
+            if stack:
+                stack[-1] += duration
+            bytes_allocated = self._stop_memory(memory_before) \
+                if memory_before is not None else None
+        if rows is None:
+            nr_rows = None
+        elif rows == "result":
+            nr_rows = len(result)
+        else:
+            nr_rows = int(rows(*args, **kwargs))
+        self._record(name, start, duration, duration - child_time, nr_rows,
+                     bytes_allocated)
+        return result
+
+    def _start_memory(self):
+        # peak of traced memory since the last reset is kept for the calling function,
+        # the peak is reset so that it is the peak of this call when it returns
+        peaks = self._local.__dict__.setdefault("peaks", [])
+        current, peak = tracemalloc.get_traced_memory()
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+        peaks.append(current)
+        tracemalloc.reset_peak()
+        return current
+
+    def _stop_memory(self, memory_before):
+        # peak of traced memory during the call above the memory at its start
+        peaks = self._local.peaks
+        peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+        return peak - memory_before
+
+    def _record(self, name, start, duration, self_time, nr_rows, bytes_allocated):
+        with self._lock:
+            statistics = self.statistics.setdefault(name, {
+                "calls": 0, "cumulative_time": 0., "self_time": 0.,
+                "rows_scanned": 0, "bytes_allocated": 0})
+            statistics["calls"] += 1
+            statistics["cumulative_time"] += duration / 1e9
+            statistics["self_time"] += self_time / 1e9
+            event_args = {}
+            if nr_rows is not None:
+                statistics["rows_scanned"] += nr_rows
+                event_args["rows"] = nr_rows
+            if bytes_allocated is not None:
+                statistics["bytes_allocated"] += bytes_allocated
+                event_args["bytes"] = bytes_allocated
+            self.events.append({
+                "name": name, "cat": name.split(".")[0], "ph": "X",
+                "ts": (start - self._start) / 1e3, "dur": duration / 1e3,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": event_args})
+
+
+recorder = Recorder()
+
+
+def instrument(func=None, rows=None):
+    """
+    Decorator recording calls of a function if instrumentation is enabled, see module
+    description. Can be used with or without arguments.
+
+    :param func: callable
+    :param rows: callable or str or None (default)
+        number of rows scanned by a call, either a callable taking the arguments of
+        the function or "result" for the length of the returned value
+    :return: callable
+        the function itself if instrumentation is disabled
+    """
+    if func is None:
+        return functools.partial(instrument, rows=rows)
+    if not ENABLED:
+        return func
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return recorder.call(name, func, rows, args, kwargs)
+    return wrapper
+
+
+def get_statistics():
+    """
+    Statistics per instrumented function, sorted by self time.
+
+    :return: dict
+        "calls", "cumulative_time" and "self_time" in seconds, "rows_scanned" and
+        "bytes_allocated" (sum of the peaks of memory above the memory at the start of
+        the calls, only traced in memory mode) per function
+    """
+    with recorder._lock:
+        return dict(sorted(recorder.statistics.items(),
+                           key=lambda item: -item[1]["self_time"]))
+
+
+def export_statistics(path):
+    """
+    Write the statistics per function to a JSON file, see get_statistics.
+
+    :param path: str
+    """
+    with open(path, "w") as f:
+        json.dump(get_statistics(), f, indent=2)
+
+
+def export_trace(path):
+    """
+    Write all recorded calls in the Chrome trace event format, which can be opened in
+    chrome://tracing or https://ui.perfetto.dev.
+
+    :param path: str
+    """
+    with recorder._lock:
+        events = list(recorder.events)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _export_at_exit():
+    if not recorder.statistics:
+        return
+    trace_dir = os.environ.get("EFFNETS_TRACE_DIR", os.getcwd())
+    os.makedirs(trace_dir, exist_ok=True)
+    export_statistics(os.path.join(trace_dir, "effnets_statistics.json"))
+    export_trace(os.path.join(trace_dir, "effnets_trace.json"))
+
+
+if ENABLED:
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    atexit.register(_export_at_exit)
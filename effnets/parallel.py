@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data.data_preparation import Dataset, INDICATOR_COLUMNS
+from engine import get_performance_values
+
+
+# Evaluation of scenarios in a process pool with the input data in shared memory
+
+class SharedDataset:
+    """
+    Columns of a Dataset copied once into a single block of shared memory. Worker
+    processes attach to the block by name and use the columns without copying or
+    pickling them.
+
+    :param dt: Dataset
+        input data
+    :param columns: list of str or None (default)
+        columns to be shared in addition to the index columns, defaults to the columns
+        used by the indicators
+    """
+    def __init__(self, dt, columns=None):
+        if columns is None:
+            columns = [column for column in INDICATOR_COLUMNS if column in dt.columns]
+        columns = Dataset.index_columns + \
+            [column for column in columns if column not in Dataset.index_columns]
+        self.layout = []
+        offset = 0
+        for column in columns:
+            values = dt.array(column)
+            # align every column to 8 bytes
+            offset = -(-offset // 8) * 8
+            self.layout.append((column, values.dtype.str, offset, len(values)))
+            offset += values.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for column, dtype, offset, length in self.layout:
+            np.ndarray(length, dtype=dtype, buffer=self.shm.buf, offset=offset)[:] = \
+                dt.array(column)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def attach_dataset(name, layout):
+    """
+    Attach to a SharedDataset created in another process.
+
+    :param name: str
+        name of the shared memory block
+    :param layout: list of tuple
+        column name, dtype, offset and length of every column
+    :return: tuple
+        shared memory block, which has to be kept alive as long as the dataset is
+        used, and Dataset with the shared columns. The block is unlinked by the
+        creating process.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {column: np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)
+              for column, dtype, offset, length in layout}
+    return shm, Dataset.from_arrays(arrays)
+
+
+_worker_state = {}
+
+
+def _init_worker(name, layout, cost_contribution_ur, pv_cost_reduction):
+    shm, dt = attach_dataset(name, layout)
+    _worker_state.update(shm=shm, dt=dt, cost_contribution_ur=cost_contribution_ur,
+                         pv_cost_reduction=pv_cost_reduction)
+
+
+def _evaluate_scenarios(scenarios, alternatives):
+    return get_performance_values(
+        _worker_state["dt"], scenarios, alternatives,
+        _worker_state["cost_contribution_ur"], _worker_state["pv_cost_reduction"])
+
+
+def get_performance_values_parallel(dt, scenarios, alternatives, cost_contribution_ur,
+                                    pv_cost_reduction, workers, chunks_per_worker=4):
+    """
+    Calculate all criteria for the given scenarios and alternatives in a process pool,
+    see engine.get_performance_matrix. The scenarios are split into chunks that are
+    evaluated independently, results are gathered in the order of the scenarios.
+
+    :param dt: Dataset
+    :param scenarios: list of int
+    :param alternatives: list of int
+    :param cost_contribution_ur: pd.DataFrame
+    :param pv_cost_reduction: pd.DataFrame
+    :param workers: int
+        number of processes
+    :param chunks_per_worker: int
+        number of chunks per process, more chunks balance the load better
+    :return: np.array
+        shape (len(scenarios), len(alternatives), len(criteria))
+    """
+    nr_chunks = max(1, min(len(scenarios), workers * chunks_per_worker))
+    chunks = [[int(scenario) for scenario in chunk]
+              for chunk in np.array_split(np.asarray(scenarios), nr_chunks)]
+    with SharedDataset(dt) as shared_dataset:
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(shared_dataset.name, shared_dataset.layout,
+                          cost_contribution_ur, pv_cost_reduction)) as executor:
+            values = list(executor.map(_evaluate_scenarios, chunks,
+                                       [alternatives] * len(chunks)))
+    return np.concatenate(values, axis=0)
@@ -0,0 +1,208 @@
+import numpy as np
+
+from instrumentation import instrument
+
+
+# Pearson correlation and slope of the linear regression of y on x within segments of
+# customer-level data, e.g. all customer groups of one combination of scenario and
+# alternative. Segments are either contiguous (given by their starts) or labelled by
+# an index per row. The moments are determined in two passes (means first, centred
+# sums second) or, for data that does not fit into memory, merged chunk by chunk with
+# the pairwise update of Chan et al., see SegmentMoments.
+
+
+def _get_segment_sums(values, starts=None, segment_ids=None, nr_segments=None):
+    """
+    Sum of values within every segment.
+
+    :param values: np.array
+    :param starts: np.array or None (default)
+        first row of every segment if the segments are contiguous
+    :param segment_ids: np.array or None (default)
+        segment of every row, used if starts are not given
+    :param nr_segments: int or None (default)
+        number of segments if segment_ids are given, defaults to the largest index + 1
+    :return: np.array
+    """
+    if starts is not None:
+        return np.add.reduceat(values, starts)
+    return np.bincount(segment_ids, weights=values, minlength=nr_segments or 0)
+
+
+def _get_segment_lengths(length, starts=None, segment_ids=None, nr_segments=None):
+    if starts is not None:
+        return np.diff(np.append(starts, length))
+    return np.bincount(segment_ids, minlength=nr_segments or 0)
+
+
+def get_segment_moments(x, y, starts=None, segment_ids=None, nr_segments=None):
+    """
+    Number of rows, means and centred second moments of x and y within every segment.
+    Segments are given either by their starts or by the segment of every row.
+
+    :param x: np.array
+    :param y: np.array
+    :param starts: np.array or None (default)
+        first row of every segment if the segments are contiguous
+    :param segment_ids: np.array or None (default)
+        segment of every row, used if starts are not given
+    :param nr_segments: int or None (default)
+        number of segments if segment_ids are given, defaults to the largest index + 1
+    :return: SegmentMoments
+    """
+    if starts is None and segment_ids is None:
+        raise ValueError("Either starts or segment_ids have to be given.")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if starts is not None:
+        starts = np.asarray(starts)
+        segment_ids = None
+    else:
+        segment_ids = np.asarray(segment_ids)
+    counts = _get_segment_lengths(len(x), starts, segment_ids, nr_segments)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = _get_segment_sums(x, starts, segment_ids, nr_segments) / counts
+        mean_y = _get_segment_sums(y, starts, segment_ids, nr_segments) / counts
+    rows = np.repeat(np.arange(len(counts)), counts) if segment_ids is None else \
+        segment_ids
+    dx = x - mean_x[rows]
+    dy = y - mean_y[rows]
+    moments = SegmentMoments(len(counts))
+    moments.count = counts.astype(float)
+    moments.mean_x = np.nan_to_num(mean_x)
+    moments.mean_y = np.nan_to_num(mean_y)
+    moments.m2_x = _get_segment_sums(dx * dx, starts, segment_ids, nr_segments)
+    moments.m2_y = _get_segment_sums(dy * dy, starts, segment_ids, nr_segments)
+    moments.c_xy = _get_segment_sums(dx * dy, starts, segment_ids, nr_segments)
+    return moments
+
+
+class SegmentMoments:
+    """
+    Number of rows, means and centred second moments (sums of squared deviations
+    and co-moment) of x and y per segment. Moments of different chunks of rows are
+    combined with merge, so that the correlation and slope of data that does not fit
+    into memory can be determined in one pass:
+
+        moments = SegmentMoments(nr_segments)
+        for segment_ids, x, y in chunks:
+            moments.update(segment_ids, x, y)
+        correlation, slope = moments.correlation(), moments.slope()
+
+    :param nr_segments: int
+    """
+    def __init__(self, nr_segments):
+        self.count = np.zeros(nr_segments)
+        self.mean_x = np.zeros(nr_segments)
+        self.mean_y = np.zeros(nr_segments)
+        self.m2_x = np.zeros(nr_segments)
+        self.m2_y = np.zeros(nr_segments)
+        self.c_xy = np.zeros(nr_segments)
+
+    def __len__(self):
+        return len(self.count)
+
+    def update(self, segment_ids, x, y):
+        """
+        Add a chunk of rows.
+
+        :param segment_ids: np.array
+            segment of every row
+        :param x: np.array
+        :param y: np.array
+        :return: SegmentMoments
+            self
+        """
+        return self.merge(get_segment_moments(x, y, segment_ids=segment_ids,
+                                              nr_segments=len(self)))
+
+    def merge(self, other):
+        """
+        Combine with the moments of other rows of the same segments, Chan et al.
+        (1979).
+
+        :param other: SegmentMoments
+        :return: SegmentMoments
+            self
+        """
+        if len(other) != len(self):
+            raise ValueError(f"Moments of {len(other)} segments cannot be merged "
+                             f"with moments of {len(self)} segments.")
+        count = self.count + other.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share_other = np.where(count > 0, other.count / count, 0.)
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        weight = self.count * share_other
+        self.m2_x += other.m2_x + delta_x * delta_x * weight
+        self.m2_y += other.m2_y + delta_y * delta_y * weight
+        self.c_xy += other.c_xy + delta_x * delta_y * weight
+        self.mean_x += delta_x * share_other
+        self.mean_y += delta_y * share_other
+        self.count = count
+        return self
+
+    def correlation(self):
+        """
+        Pearson correlation of x and y per segment.
+
+        :return: np.array
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+    def slope(self):
+        """
+        Slope of the linear regression of y on x per segment.
+
+        :return: np.array
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.c_xy / self.m2_x
+
+
+def get_segment_comoments(values, starts):
+    """
+    Centred co-moments of several variables within every contiguous segment, i.e.
+    sums of the products of the deviations from the segment means. Correlation and
+    slope of linear combinations of the variables follow from the co-moments
+    without revisiting the rows.
+
+    :param values: np.array
+        array of shape (N, M) with M variables
+    :param starts: np.array
+        first row of every segment
+    :return: np.array
+        array of shape (len(starts), M, M)
+    """
+    values = np.asarray(values, dtype=float)
+    counts = np.diff(np.append(starts, len(values)))
+    means = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+    deviations = values - np.repeat(means, counts, axis=0)
+    return np.add.reduceat(deviations[:, :, None] * deviations[:, None, :], starts,
+                           axis=0)
+
+
+@instrument(rows=lambda x, *args, **kwargs: len(x))
+def get_correlation_and_slope(x, y, starts=None, segment_ids=None, nr_segments=None):
+    """
+    Pearson correlation and slope of the linear regression of y on x within every
+    segment, see get_segment_moments.
+
+    :return: tuple of np.array
+        correlation and slope per segment
+    """
+    moments = get_segment_moments(x, y, starts, segment_ids, nr_segments)
+    return moments.correlation(), moments.slope()
+
+
+def get_slope_penalty(slope):
+    """
+    Deviation of the slope from 1, min(|beta|, |1/beta|).
+
+    :param slope: np.array
+    :return: np.array
+    """
+    slope = np.abs(slope)
+    with np.errstate(divide="ignore"):
+        return np.minimum(slope, 1 / slope)
@@ -1,16 +1,209 @@
+import numpy as np
 import pandas as pd
 
-from indicators import get_fairness, get_expansion_der,\
-    get_efficient_electricity_usage, get_efficient_grid, \
-    add_names_criteria
+from engine import Segments, get_performance_matrix, get_efficient_grid_sweep, \
+    get_fairness_matrix, get_expansion_der_matrix, \
+    get_efficient_electricity_usage_matrix
+from indicators import names_criteria, get_pv_cost_reduction
+from instrumentation import instrument
+
+
+class Ratings:
+    """
+    Overall rating of all alternatives in all scenarios for several weightings.
+
+    :param values: np.array
+        array of shape (len(scenarios), len(alternatives), len(weightings))
+    :param scenarios: list of int
+        labels of first axis
+    :param alternatives: list of int
+        labels of second axis
+    :param weightings: list
+        labels of third axis, e.g. names of stakeholders
+    """
+    def __init__(self, values, scenarios, alternatives, weightings):
+        self.values = values
+        self.scenarios = list(scenarios)
+        self.alternatives = list(alternatives)
+        self.weightings = list(weightings)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def scenario(self, idx_scenario):
+        """
+        Ratings of a single scenario.
+
+        :param idx_scenario: int
+        :return: pd.DataFrame
+            index: alternatives, columns: weightings
+        """
+        return pd.DataFrame(self.values[self.scenarios.index(idx_scenario)],
+                            index=self.alternatives, columns=self.weightings)
+
+    def weighting(self, weighting):
+        """
+        Ratings for a single weighting, format of get_results.
+
+        :param weighting: label of weighting
+        :return: pd.DataFrame
+            index: alternatives, columns: scenarios
+        """
+        return pd.DataFrame(self.values[:, :, self.weightings.index(weighting)].T,
+                            index=self.alternatives, columns=self.scenarios)
+
+    def to_frame(self, scenario_names=None, alternative_names=None):
+        """
+        Ratings of all scenarios below each other, format of results/end_rating.csv.
+
+        :param scenario_names: list of str or None (default)
+            names of scenarios, defaults to the scenario labels
+        :param alternative_names: list of str or None (default)
+            names of alternatives, defaults to the alternative labels
+        :return: pd.DataFrame
+            columns: weightings, "Scenario" and "Network Tariff"
+        """
+        nr_scenarios, nr_alternatives, nr_weightings = self.shape
+        ratings = pd.DataFrame(self.values.reshape(-1, nr_weightings),
+                               columns=self.weightings)
+        ratings["Scenario"] = np.repeat(
+            self.scenarios if scenario_names is None else scenario_names,
+            nr_alternatives)
+        ratings["Network Tariff"] = np.tile(
+            self.alternatives if alternative_names is None else alternative_names,
+            nr_scenarios)
+        return ratings
+
+
+@instrument
+def rate_many(performance, weights_matrix):
+    """
+    Combining performance matrix with several weightings of the criteria at once.
+
+    :param performance: PerformanceMatrix
+        performance of all alternatives, see engine.get_performance_matrix
+    :param weights_matrix: pd.DataFrame or np.array
+        weightings of the criteria, either as dataframe with one row per weighting and
+        the criteria as columns (e.g. output of get_relative_weights_stakeholder) or as
+        array of shape (len(criteria), N)
+    :return: Ratings
+    """
+    weightings, weights_matrix = _get_weights_matrix(weights_matrix,
+                                                     performance.criteria)
+    return Ratings(performance.values @ weights_matrix, performance.scenarios,
+                   performance.alternatives, weightings)
+
+
+def _get_weights_matrix(weights_matrix, criteria):
+    # labels of the weightings and weights as array of shape (len(criteria), N)
+    if isinstance(weights_matrix, pd.DataFrame):
+        weightings = weights_matrix.index
+        weights_matrix = weights_matrix.loc[:, criteria].to_numpy(float).T
+    else:
+        weights_matrix = np.asarray(weights_matrix, dtype=float)
+        if weights_matrix.ndim == 1:
+            weights_matrix = weights_matrix[:, None]
+        weightings = range(weights_matrix.shape[1])
+    if weights_matrix.shape[0] != len(criteria):
+        raise ValueError(f"Weights have to be given for {len(criteria)} "
+                         f"criteria, got {weights_matrix.shape[0]}.")
+    return weightings, weights_matrix
+
+
+class CostSplitSweep:
+    """
+    Cost contributions, performance and ratings for several assumptions of the share
+    of usage-related costs in the status quo, see sweep_cost_split.
+
+    :param ur_base: np.array
+        shares of usage-related costs in the status quo, shape (U,)
+    :param cost_contribution_ur: np.array
+        share of usage-related costs, shape (U, S, A)
+    :param performance: np.array
+        performance of all alternatives, shape (U, S, A, len(criteria))
+    :param ratings: np.array
+        overall ratings, shape (U, S, A, N)
+    """
+    def __init__(self, ur_base, cost_contribution_ur, performance, ratings, scenarios,
+                 alternatives, criteria, weightings):
+        self.ur_base = ur_base
+        self.cost_contribution_ur = cost_contribution_ur
+        self.performance = performance
+        self.ratings = ratings
+        self.scenarios = list(scenarios)
+        self.alternatives = list(alternatives)
+        self.criteria = list(criteria)
+        self.weightings = list(weightings)
+
+    def to_frame(self):
+        """
+        Sensitivity curves of Efficient Grid and the ratings.
+
+        :return: pd.DataFrame
+            index: ("Share Usage-related Costs", "Scenario", "Alternative"), columns:
+            "Cost Contribution UR", "Efficient Grid" and the weightings
+        """
+        index = pd.MultiIndex.from_product(
+            [self.ur_base, self.scenarios, self.alternatives],
+            names=["Share Usage-related Costs", "Scenario", "Alternative"])
+        frame = pd.DataFrame(self.ratings.reshape(-1, len(self.weightings)),
+                             index=index, columns=self.weightings)
+        frame.insert(0, "Efficient Grid",
+                     self.performance[..., self.criteria.index("Efficient Grid")]
+                     .ravel())
+        frame.insert(0, "Cost Contribution UR", self.cost_contribution_ur.ravel())
+        return frame
+
+
+@instrument
+def sweep_cost_split(dt, ur_base, weights_matrix, scenarios=None, alternatives=None,
+                     inputs=None):
+    """
+    Evaluate all alternatives for several assumptions of the share of usage-related
+    costs in the status quo (0.41 from Chanel and Limoges in
+    data/cost_contribution_ur.csv) in one pass. Only Efficient Grid depends on the
+    split, the other criteria are determined once and the ratings are linear in the
+    criteria.
+
+    :param dt: Dataset
+        input data
+    :param ur_base: list of float or np.array
+        shares of usage-related costs in the status quo
+    :param weights_matrix: pd.DataFrame or np.array
+        weightings of the criteria, see rate_many
+    :param scenarios: list of int or None (default)
+        scenarios to be analysed, defaults to all scenarios in dt
+    :param alternatives: list of int or None (default)
+        alternatives to be analysed, defaults to all alternatives in dt
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :return: CostSplitSweep
+    """
+    scenarios = dt.scenarios if scenarios is None else list(scenarios)
+    alternatives = dt.alternatives if alternatives is None else list(alternatives)
+    ur_base = np.atleast_1d(np.asarray(ur_base, dtype=float))
+    criteria = names_criteria()
+    weightings, weights_matrix = _get_weights_matrix(weights_matrix, criteria)
+    segments = Segments(dt, scenarios, alternatives)
+    cost_contribution_ur, efficient_grid = get_efficient_grid_sweep(segments, ur_base)
+    performance = np.empty(efficient_grid.shape + (len(criteria),))
+    performance[..., 0] = efficient_grid
+    performance[..., 1] = get_fairness_matrix(segments)
+    performance[..., 2] = get_expansion_der_matrix(segments,
+                                                   get_pv_cost_reduction(inputs))
+    performance[..., 3] = get_efficient_electricity_usage_matrix(segments)
+    return CostSplitSweep(ur_base, cost_contribution_ur, performance,
+                          performance @ weights_matrix, scenarios, alternatives,
+                          criteria, weightings)
 
 
 def get_performance_indicators_scenario_with_names(
-        dt, idx_scenario, nr_alternatives, alternative_names=None):
+        dt, idx_scenario, nr_alternatives, alternative_names=None, inputs=None):
     """
     Method for calculation of indicators for specific scenario.
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
@@ -19,10 +212,12 @@ def get_performance_indicators_scenario_with_names(
     :param alternative_names: list of str or None (default)
         names of investigated alternatives, defaults to ['Volumetric Tariff',
         'Monthly Power Peak', 'Yearly Power Peak', 'Capacity Tariff']
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
     :return:
     """
-    result_matrix = \
-        get_performance_indicators_scenario(dt, idx_scenario, nr_alternatives)
+    result_matrix = get_performance_indicators_scenario(
+        dt, idx_scenario, nr_alternatives, inputs)
     if alternative_names is None:
         alternative_names = ['Volumetric Tariff', 'Monthly Power Peak',
                              'Yearly Power Peak', 'Capacity Tariff']
@@ -33,35 +228,34 @@ def get_performance_indicators_scenario_with_names(
     return result_matrix
 
 
-def get_performance_indicators_scenario(dt, idx_scenario, nr_alternatives):
+@instrument
+def get_performance_indicators_scenario(dt, idx_scenario, nr_alternatives,
+                                        inputs=None):
     """
     Normalised results for indicators
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
     :param nr_alternatives: int
         total number of alternatives
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
     :return:
     """
-    efficient_grid = get_efficient_grid(dt, idx_scenario, nr_alternatives)
-    fairness_and_customer_acceptance = get_fairness(dt, idx_scenario, nr_alternatives)
-    expansion_der = get_expansion_der(dt, idx_scenario, nr_alternatives)
-    efficient_electricity_usage = \
-        get_efficient_electricity_usage(dt, idx_scenario, nr_alternatives)
-    result_matrix = pd.concat([efficient_grid,
-                               fairness_and_customer_acceptance,
-                               expansion_der,
-                               efficient_electricity_usage], ignore_index=True)
-    return add_names_criteria(result_matrix.T).T
+    performance_matrix = get_performance_matrix(
+        dt, scenarios=[idx_scenario], alternatives=range(1, nr_alternatives + 1),
+        inputs=inputs)
+    return performance_matrix.scenario(idx_scenario)
 
 
-def get_rating_scenario(dt, idx_scenario, nr_alternatives, weights):
+@instrument
+def get_rating_scenario(dt, idx_scenario, nr_alternatives, weights, inputs=None):
     """
     Combining indicator results with criteria weights to generate ranking
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param idx_scenario: int
         scenario to be analysed
@@ -69,25 +263,26 @@ def get_rating_scenario(dt, idx_scenario, nr_alternatives, weights):
         total number of alternatives
     :param weights: pd.DataFrame
         dataframe with weighting of indicators
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
     :return:
     """
-    performance_indicators = \
-        get_performance_indicators_scenario(dt, idx_scenario, nr_alternatives)
-
-    for alternative in range(1, len(performance_indicators.columns) + 1):
-        performance_indicators[alternative] = \
-            performance_indicators[alternative] * weights.transpose().iloc[:, 0]
-
-    overall_rating = performance_indicators.sum()
-
+    performance_matrix = get_performance_matrix(
+        dt, scenarios=[idx_scenario], alternatives=range(1, nr_alternatives + 1),
+        inputs=inputs)
+    overall_rating = pd.Series(
+        rate_many(performance_matrix, weights.iloc[:1]).values[0, :, 0],
+        index=performance_matrix.alternatives)
     return overall_rating
 
 
-def get_results(dt, nr_scenarios, nr_alternatives, weights, scenario_names=None):
+@instrument
+def get_results(dt, nr_scenarios, nr_alternatives, weights, scenario_names=None,
+                inputs=None, workers=None):
     """
     Aggregating results for all scenarios
 
-    :param dt: pd.DataFrame
+    :param dt: Dataset
         input data
     :param nr_scenarios: int
         total number of simulated scenarios
@@ -98,15 +293,20 @@ def get_results(dt, nr_scenarios, nr_alternatives, weights, scenario_names=None)
     :param scenario_names: list of str or None (default)
         names of investigated scenarios, defaults to ['Scenario 1', 'Scenario 2',
         'Scenario 3', 'Scenario 4']
+    :param inputs: InputBundle or None (default)
+        side inputs, defaults to the input files in effnets/data
+    :param workers: int or None (default)
+        number of processes the scenarios are distributed over, evaluated in the
+        calling process by default
     :return:
     """
-
-    results_final = pd.concat([
-        get_rating_scenario(
-            dt=dt, idx_scenario=i+1, nr_alternatives=nr_alternatives, weights=weights)
-        for i in range(nr_scenarios)], axis=1)
+    performance_matrix = get_performance_matrix(
+        dt, scenarios=range(1, nr_scenarios + 1),
+        alternatives=range(1, nr_alternatives + 1), inputs=inputs, workers=workers)
     if scenario_names is None:
         scenario_names = ['Scenario 1', 'Scenario 2', 'Scenario 3', 'Scenario 4']
-    results_final.columns = scenario_names
+    results_final = pd.DataFrame(
+        rate_many(performance_matrix, weights.iloc[:1]).values[:, :, 0].T,
+        index=performance_matrix.alternatives, columns=scenario_names)
 
     return results_final
@@ -0,0 +1,444 @@
+from itertools import combinations, islice
+from math import comb
+import os
+from concurrent.futures import ProcessPoolExecutor
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+from weights import extract_weights_batch
+
+# Saaty scale of pairwise comparisons, reciprocal values for the inverse comparison
+SAATY_SCALE = np.array([1/9, 1/8, 1/7, 1/6, 1/5, 1/4, 1/3, 1/2,
+                        1, 2, 3, 4, 5, 6, 7, 8, 9])
+# maximum number of candidate vertices of a winning region, see get_winning_regions
+MAX_VERTEX_CANDIDATES = 500000
+# maximum number of weightings of a grid, see sample_weight_simplex
+MAX_GRID_POINTS = 10000000
+
+
+def get_scale_positions(values):
+    """
+    Position of pairwise comparison values on the Saaty scale, values in between are
+    assigned to the closest position on logarithmic scale.
+
+    :param values: np.array
+    :return: np.array of int
+    """
+    return np.abs(np.log(np.asarray(values, dtype=float))[..., None] -
+                  np.log(SAATY_SCALE)).argmin(axis=-1)
+
+
+def sample_pairwise_comparisons(pairwise_comparison_matrix, nr_draws, rng,
+                                max_step=1):
+    """
+    Draw perturbed versions of a pairwise comparison matrix. Every judgment of the
+    upper triangle is moved by a uniformly drawn number of steps on the Saaty scale in
+    the range [-max_step, max_step] and clipped to the scale. The lower triangle is
+    set to the reciprocal values, so that all samples remain reciprocal and on-scale.
+
+    :param pairwise_comparison_matrix: np.array
+        NxN-matrix with pairwise comparison of N criteria, see weights.priorities
+    :param nr_draws: int
+        number of samples
+    :param rng: np.random.Generator
+    :param max_step: int
+        maximum deviation from the given judgments in steps of the Saaty scale
+    :return: np.array
+        array of shape (nr_draws, N, N)
+    """
+    nr_criteria = pairwise_comparison_matrix.shape[0]
+    idx_upper = np.triu_indices(nr_criteria, 1)
+    positions = get_scale_positions(pairwise_comparison_matrix[idx_upper])
+    steps = rng.integers(-max_step, max_step + 1, size=(nr_draws, len(positions)))
+    positions = np.clip(positions + steps, 0, len(SAATY_SCALE) - 1)
+    samples = np.ones((nr_draws, nr_criteria, nr_criteria))
+    samples[:, idx_upper[0], idx_upper[1]] = SAATY_SCALE[positions]
+    samples[:, idx_upper[1], idx_upper[0]] = SAATY_SCALE[::-1][positions]
+    return samples
+
+
+def get_rank_counts(ratings):
+    """
+    Count how often every alternative reaches every rank.
+
+    :param ratings: np.array
+        ratings of shape (S, A, N) for S scenarios, A alternatives and N draws
+    :return: np.array
+        counts of shape (S, A, A), entry [s, a, r] counts the draws in which
+        alternative a is ranked at position r (0 being the best) in scenario s
+    """
+    nr_scenarios, nr_alternatives, _ = ratings.shape
+    order = np.argsort(-ratings, axis=1, kind="stable")
+    ranks = np.argsort(order, axis=1, kind="stable")
+    idx = (np.arange(nr_scenarios)[:, None, None] * nr_alternatives +
+           np.arange(nr_alternatives)[None, :, None]) * nr_alternatives + ranks
+    return np.bincount(idx.ravel(), minlength=nr_scenarios * nr_alternatives ** 2
+                       ).reshape(nr_scenarios, nr_alternatives, nr_alternatives)
+
+
+def _sample_rank_counts(performance_values, weighting, seed_sequence, nr_draws,
+                        max_step):
+    """
+    Rank counts of one chunk of draws, executed in the worker processes.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    weights = extract_weights_batch(
+        sample_pairwise_comparisons(weighting["Main"], nr_draws, rng, max_step),
+        sample_pairwise_comparisons(weighting["Political Objectives"], nr_draws, rng,
+                                    max_step))
+    return get_rank_counts(performance_values @ weights.T)
+
+
+@instrument
+def get_rank_acceptability(performance, weighting_dict, nr_draws=100000, seed=None,
+                           max_step=1, chunk_size=10000, workers=None):
+    """
+    Monte Carlo analysis of the robustness of the rankings with respect to the
+    judgments of the stakeholders. The pairwise comparison matrices "Main" and
+    "Political Objectives" of every stakeholder are perturbed on the Saaty scale (see
+    sample_pairwise_comparisons), the resulting weights are used to rate all
+    alternatives and the frequency of every rank is recorded.
+
+    Draws are processed in chunks of <chunk_size> to bound memory. Every chunk gets
+    its own seed derived from <seed>, results therefore do not depend on the number of
+    workers.
+
+    :param performance: PerformanceMatrix
+        performance of all alternatives, see engine.get_performance_matrix
+    :param weighting_dict: dict
+        pairwise comparisons per stakeholder, see
+        data.expert_weighting.expert_pairwise_comparison_dict
+    :param nr_draws: int
+        number of draws per stakeholder
+    :param seed: int or None (default)
+        seed of the random number generator
+    :param max_step: int
+        maximum deviation from the given judgments in steps of the Saaty scale
+    :param chunk_size: int
+        number of draws evaluated at once
+    :param workers: int or None (default)
+        number of processes, defaults to the number of cores, 1 evaluates all chunks
+        in the calling process
+    :return: pd.DataFrame
+        rank acceptability, i.e. probability of every alternative to reach a certain
+        rank, index: ("Stakeholder", "Scenario", "Alternative"), columns: ranks
+        starting at 1 for the best rank
+    """
+    stakeholders = list(weighting_dict)
+    stakeholder_seeds = np.random.SeedSequence(seed).spawn(len(stakeholders))
+    chunks = [min(chunk_size, nr_draws - start)
+              for start in range(0, nr_draws, chunk_size)]
+    tasks = []
+    idx_stakeholders = []
+    for idx, (stakeholder, stakeholder_seed) in enumerate(
+            zip(stakeholders, stakeholder_seeds)):
+        for chunk_seed, nr_draws_chunk in zip(stakeholder_seed.spawn(len(chunks)),
+                                              chunks):
+            tasks.append((performance.values, weighting_dict[stakeholder], chunk_seed,
+                          nr_draws_chunk, max_step))
+            idx_stakeholders.append(idx)
+    nr_scenarios, nr_alternatives, _ = performance.shape
+    counts = np.zeros((len(stakeholders), nr_scenarios, nr_alternatives,
+                       nr_alternatives), dtype=np.int64)
+    if workers is None:
+        workers = os.cpu_count()
+    if workers == 1:
+        for idx, task in zip(idx_stakeholders, tasks):
+            counts[idx] += _sample_rank_counts(*task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for idx, counts_chunk in zip(
+                    idx_stakeholders,
+                    executor.map(_sample_rank_counts, *zip(*tasks))):
+                counts[idx] += counts_chunk
+    index = pd.MultiIndex.from_product(
+        [stakeholders, performance.scenarios, performance.alternatives],
+        names=["Stakeholder", "Scenario", "Alternative"])
+    return pd.DataFrame(counts.reshape(-1, nr_alternatives) / nr_draws, index=index,
+                        columns=range(1, nr_alternatives + 1))
+
+
+# Analysis of the space of all weightings, i.e. the simplex of non-negative weights of
+# the criteria summing up to 1. As the rating is a weighted sum of the criteria, the
+# simplex splits into convex regions in which the same alternative is ranked first.
+
+
+def get_winning_regions(performance, tol=1e-12):
+    """
+    Exact region of the weight simplex in which an alternative is ranked first, i.e.
+    the intersection of the simplex with the half-spaces
+    (p_a - p_b) * w >= 0 for all other alternatives b. The regions are determined by
+    enumerating the vertices, i.e. the feasible intersections of K-1 of the bounding
+    hyperplanes with the plane of the simplex for K criteria. The number of candidate
+    vertices grows combinatorially with the number of alternatives and criteria and
+    is limited to MAX_VERTEX_CANDIDATES per alternative.
+
+    :param performance: PerformanceMatrix
+        performance of all alternatives, see engine.get_performance_matrix
+    :param tol: float
+        tolerance of the feasibility check
+    :return: dict
+        vertices of the winning region per (scenario, alternative), array of shape
+        (V, K) with one weighting per row, empty if the alternative is never ranked
+        first
+    """
+    nr_scenarios, nr_alternatives, nr_criteria = performance.shape
+    nr_candidates = comb(nr_criteria + nr_alternatives - 1, nr_criteria - 1)
+    if nr_candidates > MAX_VERTEX_CANDIDATES:
+        raise ValueError(f"Winning regions of {nr_alternatives} alternatives and "
+                         f"{nr_criteria} criteria require {nr_candidates} candidate "
+                         f"vertices, at most {MAX_VERTEX_CANDIDATES} are supported. "
+                         f"Use get_weight_space_acceptability instead.")
+    regions = {}
+    for idx_scenario, scenario in enumerate(performance.scenarios):
+        values = performance.values[idx_scenario]
+        for idx_alternative, alternative in enumerate(performance.alternatives):
+            # constraints c * w >= 0: non-negative weights and higher rating than
+            # all other alternatives
+            constraints = np.concatenate([
+                np.eye(nr_criteria),
+                values[idx_alternative] - np.delete(values, idx_alternative, axis=0)])
+            active = np.array(list(combinations(range(len(constraints)),
+                                                nr_criteria - 1)))
+            systems = np.concatenate([
+                constraints[active],
+                np.ones((len(active), 1, nr_criteria))], axis=1)
+            regular = np.abs(np.linalg.det(systems)) > tol
+            right_hand_side = np.zeros((regular.sum(), nr_criteria, 1))
+            right_hand_side[:, -1] = 1.
+            vertices = np.linalg.solve(systems[regular], right_hand_side)[..., 0]
+            scale = np.abs(constraints).max(axis=1)
+            feasible = (vertices @ constraints.T >= -tol * scale).all(axis=1)
+            vertices = vertices[feasible]
+            if len(vertices):
+                _, idx_unique = np.unique(np.round(vertices, 9), axis=0,
+                                          return_index=True)
+                vertices = vertices[np.sort(idx_unique)]
+            regions[(scenario, alternative)] = vertices
+    return regions
+
+
+def sample_weight_simplex(nr_samples, nr_criteria, method="quasi-random", seed=None,
+                          nr_steps=100):
+    """
+    Weightings covering the simplex of non-negative weights summing up to 1.
+
+    * "grid": all weightings with weights that are multiples of 1/<nr_steps>,
+      i.e. (nr_steps + K - 1) over (K - 1) weightings for K criteria, at most
+      MAX_GRID_POINTS
+    * "quasi-random": low-discrepancy sequence (R-sequence of Roberts) mapped to the
+      simplex by the spacings of the sorted coordinates
+    * "random": uniformly distributed weightings
+
+    :param nr_samples: int
+        number of weightings, not used for "grid"
+    :param nr_criteria: int
+    :param method: str
+    :param seed: int or None (default)
+        seed of the random number generator for "random" and of the offset of the
+        quasi-random sequence
+    :param nr_steps: int
+        number of steps per weight for "grid"
+    :return: np.array
+        array of shape (N, nr_criteria)
+    """
+    nr_weights = comb(nr_steps + nr_criteria - 1, nr_criteria - 1) \
+        if method == "grid" else nr_samples
+    return np.concatenate(list(iter_weight_simplex(
+        nr_samples, nr_criteria, method, seed, nr_steps, max(nr_weights, 1))))
+
+
+def iter_weight_simplex(nr_samples, nr_criteria, method="quasi-random", seed=None,
+                        nr_steps=100, chunk_size=100000):
+    """
+    Weightings of sample_weight_simplex generated in chunks of <chunk_size>, so that
+    only one chunk is held in memory at a time.
+
+    :return: iterator of np.array
+        arrays of shape (chunk_size, nr_criteria), the last chunk may be smaller
+    """
+    dimension = nr_criteria - 1
+    if method == "grid":
+        nr_points = comb(nr_steps + dimension, dimension)
+        if nr_points > MAX_GRID_POINTS:
+            raise ValueError(f"A grid of {nr_steps} steps for {nr_criteria} criteria "
+                             f"has {nr_points} weightings, at most "
+                             f"{MAX_GRID_POINTS} are supported.")
+        # stars and bars, positions of the K-1 bars among nr_steps stars
+        all_bars = combinations(range(nr_steps + dimension), dimension)
+        while True:
+            bars = list(islice(all_bars, chunk_size))
+            if not bars:
+                return
+            bars = np.array(bars, dtype=int).reshape(len(bars), dimension)
+            bounds = np.concatenate([
+                np.full((len(bars), 1), -1), bars,
+                np.full((len(bars), 1), nr_steps + dimension)], axis=1)
+            yield (np.diff(bounds, axis=1) - 1) / nr_steps
+    if method not in ["quasi-random", "random"]:
+        raise ValueError(f"Unknown method {method}, valid methods are 'grid', "
+                         f"'quasi-random' and 'random'.")
+    rng = np.random.default_rng(seed)
+    if method == "quasi-random":
+        # generalised golden ratio, unique positive root of x^(d+1) = x + 1
+        phi = 2.
+        for _ in range(50):
+            phi = (1 + phi) ** (1 / (dimension + 1))
+        alpha = (1 / phi) ** np.arange(1, dimension + 1)
+        offset = rng.random(dimension)
+    for start in range(0, nr_samples, chunk_size):
+        stop = min(start + chunk_size, nr_samples)
+        if method == "quasi-random":
+            points = (offset + np.arange(start + 1, stop + 1)[:, None] * alpha) % 1
+        else:
+            points = rng.random((stop - start, dimension))
+        points = np.sort(points, axis=1)
+        yield np.diff(points, axis=1, prepend=0., append=1.)
+
+
+@instrument
+def get_weight_space_acceptability(performance, nr_samples=1000000,
+                                   method="quasi-random", seed=None,
+                                   chunk_size=100000, nr_steps=100):
+    """
+    Share of the weight simplex in which every alternative reaches a certain rank
+    (rank acceptability index without preferences of the stakeholders). The share
+    for rank 1 is the volume of the winning region, see get_winning_regions. The
+    volumes are estimated from weightings covering the simplex, see
+    sample_weight_simplex, which are generated and rated in chunks of <chunk_size>.
+
+    :param performance: PerformanceMatrix
+        performance of all alternatives, see engine.get_performance_matrix
+    :param nr_samples: int
+        number of weightings, not used for "grid"
+    :param method: str
+        "grid", "quasi-random" or "random", see sample_weight_simplex
+    :param seed: int or None (default)
+    :param chunk_size: int
+        number of weightings rated at once
+    :param nr_steps: int
+        number of steps per weight for "grid"
+    :return: pd.DataFrame
+        index: ("Scenario", "Alternative"), columns: ranks starting at 1 for the best
+        rank
+    """
+    nr_scenarios, nr_alternatives, nr_criteria = performance.shape
+    counts = np.zeros((nr_scenarios, nr_alternatives, nr_alternatives),
+                      dtype=np.int64)
+    nr_weights = 0
+    for weights in iter_weight_simplex(nr_samples, nr_criteria, method, seed,
+                                       nr_steps, chunk_size):
+        counts += get_rank_counts(performance.values @ weights.T)
+        nr_weights += len(weights)
+    index = pd.MultiIndex.from_product(
+        [performance.scenarios, performance.alternatives],
+        names=["Scenario", "Alternative"])
+    return pd.DataFrame(counts.reshape(-1, nr_alternatives) / nr_weights,
+                        index=index, columns=range(1, nr_alternatives + 1))
+
+
+def _project_simplex(points):
+    # euclidean projection of every row onto the simplex, Duchi et al. (2008)
+    nr_criteria = points.shape[-1]
+    ordered = -np.sort(-points, axis=-1)
+    cumulative = np.cumsum(ordered, axis=-1) - 1
+    steps = np.arange(1, nr_criteria + 1)
+    nr_positive = (ordered - cumulative / steps > 0).sum(axis=-1, keepdims=True)
+    threshold = np.take_along_axis(cumulative, nr_positive - 1, axis=-1) / nr_positive
+    return np.maximum(points - threshold, 0.)
+
+
+def _project_reversal(weights, directions, max_iter=1000, tol=1e-12):
+    """
+    Closest weightings on the simplex with directions * w <= 0, determined with
+    Dykstra's alternating projections onto the simplex and the half-space.
+
+    :param weights: np.array
+        weightings, shape (N, K)
+    :param directions: np.array
+        difference of the performance of the compared alternatives, shape (N, K)
+    :return: np.array
+        shape (N, K)
+    """
+    x = weights.copy()
+    if not len(x):
+        return x
+    p = np.zeros_like(x)
+    q = np.zeros_like(x)
+    norm = (directions * directions).sum(axis=1, keepdims=True)
+    for _ in range(max_iter):
+        y = _project_simplex(x + p)
+        p = x + p - y
+        z = y + q
+        x_new = z - np.maximum((directions * z).sum(axis=1, keepdims=True), 0.) / \
+            norm * directions
+        q = z - x_new
+        step = np.abs(x_new - x).max()
+        x = x_new
+        if step < tol:
+            break
+    else:
+        warnings.warn(f"Projection onto the reversed order did not converge within "
+                      f"{max_iter} iterations, last step {step:.2e}.",
+                      stacklevel=2)
+    return x
+
+
+@instrument
+def get_distance_to_rank_reversal(performance, weights):
+    """
+    Euclidean distance of the weightings of stakeholders to the closest weighting on
+    the simplex that reverses the order of two alternatives. For every pair of
+    alternatives, the closest weighting with reversed order is the projection onto
+    the intersection of the simplex and the half-space of the reversed order. Pairs
+    in which one alternative performs better in all criteria cannot be reversed.
+
+    :param performance: PerformanceMatrix
+        performance of all alternatives, see engine.get_performance_matrix
+    :param weights: pd.DataFrame
+        weightings of the criteria, one row per stakeholder, e.g. output of
+        weights.get_relative_weights_stakeholder
+    :return: pd.DataFrame
+        index: ("Stakeholder", "Scenario"), columns: "Winner", "Distance to Change of
+        Winner" with the closest alternative "Challenger" and "Distance to Rank
+        Reversal" for the closest reversal of any pair of alternatives, infinite if
+        no reversal is possible
+    """
+    weights_matrix = weights.loc[:, performance.criteria].to_numpy(float)
+    weights_matrix = weights_matrix / weights_matrix.sum(axis=1, keepdims=True)
+    nr_scenarios, nr_alternatives, nr_criteria = performance.shape
+    nr_stakeholders = len(weights_matrix)
+    # pairs (a, b) with a rated higher than b for the weighting of the stakeholder
+    idx_a, idx_b = np.triu_indices(nr_alternatives, 1)
+    ratings = np.einsum("sak,nk->nsa", performance.values, weights_matrix)
+    directions = performance.values[:, idx_a] - performance.values[:, idx_b]
+    directions = np.broadcast_to(directions, (nr_stakeholders,) + directions.shape)
+    sign = np.where(ratings[..., idx_a] >= ratings[..., idx_b], 1., -1.)
+    directions = directions * sign[..., None]
+    start = np.broadcast_to(weights_matrix[:, None, None],
+                            directions.shape).reshape(-1, nr_criteria)
+    directions = directions.reshape(-1, nr_criteria)
+    # reversal is only possible if the loser is better in at least one criterion
+    reversible = directions.min(axis=1) < 0
+    distances = np.full(len(directions), np.inf)
+    projected = _project_reversal(start[reversible], directions[reversible])
+    distances[reversible] = np.linalg.norm(projected - start[reversible], axis=1)
+    distances = distances.reshape(nr_stakeholders, nr_scenarios, len(idx_a))
+    # change of winner, pairs containing the best rated alternative
+    winner = ratings.argmax(axis=2)
+    contains_winner = (idx_a == winner[..., None]) | (idx_b == winner[..., None])
+    distances_winner = np.where(contains_winner, distances, np.inf)
+    idx_pair = distances_winner.argmin(axis=2)
+    challenger = np.where(idx_a[idx_pair] == winner, idx_b[idx_pair],
+                          idx_a[idx_pair])
+    alternatives = np.asarray(performance.alternatives)
+    index = pd.MultiIndex.from_product([weights.index, performance.scenarios],
+                                       names=["Stakeholder", "Scenario"])
+    return pd.DataFrame({
+        "Winner": alternatives[winner].ravel(),
+        "Challenger": alternatives[challenger].ravel(),
+        "Distance to Change of Winner": distances_winner.min(axis=2).ravel(),
+        "Distance to Rank Reversal": distances.min(axis=2).ravel()}, index=index)
@@ -0,0 +1,352 @@
+"""
+Local HTTP service answering rating, ranking and performance queries for arbitrary
+weightings of the criteria. The input data is read and the performance matrix is
+computed once, every query only combines the matrix with the given weights. Input
+files are reloaded when they change on disk.
+
+Example:
+
+    python effnets/service.py --port 8765
+
+    curl localhost:8765/performance
+    curl -d '{"weights": [0.4, 0.2, 0.2, 0.2]}' localhost:8765/rating
+    curl -d '{"pairwise": {"Main": [[1, 3, 5], [0.33, 1, 2], [0.2, 0.5, 1]],
+              "Political Objectives": [[1, 2], [0.5, 1]]}}' localhost:8765/ranking
+"""
+import argparse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+EFFNETS_DIR = os.path.dirname(os.path.abspath(__file__))
+if EFFNETS_DIR not in sys.path:
+    sys.path.insert(0, EFFNETS_DIR)
+
+from graph import build_analysis_graph  # noqa: E402
+from indicators import names_criteria  # noqa: E402
+from inputs import InputBundle  # noqa: E402
+from results import rate_many  # noqa: E402
+from weights import get_relative_weights_stakeholder  # noqa: E402
+
+
+class LRUCache:
+    """
+    Thread-safe cache holding at most <maxsize> values, the least recently used
+    value is removed first.
+
+    :param maxsize: int
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._values:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._values.move_to_end(key)
+            return self._values[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class EvaluationService:
+    """
+    Performance matrix of all scenarios and alternatives kept in memory and rated with
+    arbitrary weightings. Results of queries are cached, the cache is cleared when the
+    input files change.
+
+    :param inputs: InputBundle or None (default)
+        input files, defaults to the input files in effnets/data
+    :param scenarios: list of int or None (default)
+        scenarios to be analysed, defaults to all scenarios of the input data
+    :param alternatives: list of int or None (default)
+        alternatives to be analysed, defaults to all alternatives of the input data
+    :param cache_size: int
+        maximum number of cached query results
+    :param check_interval: float
+        minimum time in seconds between two checks of the input files for changes
+    :param cache_dir: str or None (default)
+        directory of the cache of the indicator chain, see graph.Graph
+    """
+    def __init__(self, inputs=None, scenarios=None, alternatives=None, cache_size=1024,
+                 check_interval=1., cache_dir=None):
+        self.inputs = InputBundle() if inputs is None else inputs
+        self.scenarios = scenarios
+        self.alternatives = alternatives
+        self.check_interval = check_interval
+        self.cache_dir = cache_dir
+        self.cache = LRUCache(cache_size)
+        self.version = 0
+        self._performance = None
+        self._last_check = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        graph = build_analysis_graph(None, self.inputs, self.scenarios,
+                                     self.alternatives, self.cache_dir)
+        self._performance = graph.get("performance")
+        self.cache.clear()
+        self.version += 1
+        self._last_check = time.monotonic()
+
+    @property
+    def performance(self):
+        """
+        Performance matrix of the current input files, the inputs are checked for
+        changes at most every check_interval seconds.
+
+        :return: engine.PerformanceMatrix
+        """
+        if time.monotonic() - self._last_check >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._last_check >= self.check_interval:
+                    if self.inputs.changed():
+                        self.inputs.reload()
+                        self._load()
+                    self._last_check = time.monotonic()
+        return self._performance
+
+    def get_weights(self, weights=None, pairwise=None):
+        """
+        Weights matrix from weight vectors or pairwise comparison matrices.
+
+        :param weights: list or dict or None (default)
+            weight vector of the criteria (list in the order of names_criteria or dict
+            with the names of the criteria), a list of such vectors or a dict of
+            named vectors
+        :param pairwise: dict or None (default)
+            pairwise comparison matrices "Main" and "Political Objectives", see
+            weights.get_relative_weights_stakeholder, or dict of these per name
+        :return: tuple
+            names of the weightings and array of shape (len(criteria), N)
+        """
+        criteria = names_criteria()
+        if pairwise is not None:
+            if "Main" in pairwise:
+                pairwise = {"Pairwise Comparison": pairwise}
+            names = list(pairwise)
+            matrix = np.concatenate([get_relative_weights_stakeholder(
+                {key: np.asarray(value, dtype=float) for key, value in
+                 matrices.items()}, name).loc[:, criteria].to_numpy(float)
+                for name, matrices in pairwise.items()]).T
+            return names, matrix
+        if weights is None:
+            raise ValueError("Either weights or pairwise comparison matrices have to be "
+                             "given.")
+        if isinstance(weights, dict) and set(weights) <= set(criteria):
+            weights = [[weights.get(criterion, 0.) for criterion in criteria]]
+            names = [0]
+        elif isinstance(weights, dict):
+            names = list(weights)
+            weights = [[vector.get(criterion, 0.) for criterion in criteria]
+                       if isinstance(vector, dict) else vector
+                       for vector in weights.values()]
+        else:
+            weights = np.asarray(weights, dtype=float)
+            if weights.ndim == 1:
+                weights = weights[None, :]
+            names = list(range(len(weights)))
+        return names, np.asarray(weights, dtype=float).T
+
+    def rate(self, weights=None, pairwise=None):
+        """
+        Overall rating of all alternatives in all scenarios.
+
+        :return: dict
+            "scenarios", "alternatives", "weightings" and "values" with shape
+            (len(scenarios), len(alternatives), len(weightings))
+        """
+        names, matrix = self.get_weights(weights, pairwise)
+        performance = self.performance
+        key = ("rating", self.version, tuple(names), matrix.tobytes(), matrix.shape)
+        result = self.cache.get(key)
+        if result is None:
+            ratings = rate_many(performance, matrix)
+            result = {"scenarios": ratings.scenarios,
+                      "alternatives": ratings.alternatives,
+                      "weightings": names, "values": ratings.values.tolist()}
+            self.cache.put(key, result)
+        return result
+
+    def rank(self, weights=None, pairwise=None):
+        """
+        Alternatives of every scenario sorted from best to worst rating.
+
+        :return: dict
+            "scenarios", "weightings" and "ranking" with the labels of the
+            alternatives per weighting and scenario
+        """
+        names, matrix = self.get_weights(weights, pairwise)
+        performance = self.performance
+        key = ("ranking", self.version, tuple(names), matrix.tobytes(), matrix.shape)
+        result = self.cache.get(key)
+        if result is None:
+            ratings = rate_many(performance, matrix)
+            # shape (len(weightings), len(scenarios), len(alternatives))
+            order = np.argsort(-ratings.values.transpose(2, 0, 1), axis=-1,
+                               kind="stable")
+            alternatives = np.asarray(ratings.alternatives)
+            result = {"scenarios": ratings.scenarios, "weightings": names,
+                      "ranking": alternatives[order].tolist()}
+            self.cache.put(key, result)
+        return result
+
+    def get_performance(self):
+        """
+        Performance of all alternatives per criterion.
+
+        :return: dict
+            "scenarios", "alternatives", "criteria" and "values" with shape
+            (len(scenarios), len(alternatives), len(criteria))
+        """
+        performance = self.performance
+        key = ("performance", self.version)
+        result = self.cache.get(key)
+        if result is None:
+            result = {"scenarios": performance.scenarios,
+                      "alternatives": performance.alternatives,
+                      "criteria": performance.criteria,
+                      "values": performance.values.tolist()}
+            self.cache.put(key, result)
+        return result
+
+    def get_status(self):
+        return {"version": self.version, "cached_results": len(self.cache),
+                "cache_hits": self.cache.hits, "cache_misses": self.cache.misses}
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    Requests:
+
+    * GET /performance: performance matrix, see EvaluationService.get_performance
+    * POST /rating: ratings for the weights in the JSON body, see
+      EvaluationService.rate
+    * POST /ranking: rankings for the weights in the JSON body, see
+      EvaluationService.rank
+    * GET /status: version of the inputs and statistics of the cache
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/performance":
+            self._respond(self.server.service.get_performance)
+        elif self.path == "/status":
+            self._respond(self.server.service.get_status)
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}."})
+
+    def do_POST(self):
+        queries = {"/rating": self.server.service.rate,
+                   "/ranking": self.server.service.rank}
+        if self.path not in queries:
+            self._send(404, {"error": f"Unknown path {self.path}."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send(400, {"error": f"Invalid request body: {e}"})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {"error": "Request body has to be a JSON object."})
+            return
+        self._respond(queries[self.path], weights=body.get("weights"),
+                      pairwise=body.get("pairwise"))
+
+    def _respond(self, func, **kwargs):
+        try:
+            result = func(**kwargs)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, result)
+
+    def _send(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def get_server(service, host="127.0.0.1", port=8765, quiet=False):
+    """
+    HTTP server handling every request in a separate thread.
+
+    :param service: EvaluationService
+    :param host: str
+    :param port: int
+        port of the server, 0 for a free port
+    :param quiet: bool
+        whether requests are not logged
+    :return: ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", help="directory of the input files, defaults "
+                                           "to effnets/data")
+    parser.add_argument("--scenarios", nargs="+", type=int, metavar="SCENARIO")
+    parser.add_argument("--alternatives", nargs="+", type=int,
+                        metavar="ALTERNATIVE")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="maximum number of cached query results")
+    parser.add_argument("--check-interval", type=float, default=1.,
+                        help="seconds between checks of the input files for changes")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    service = EvaluationService(InputBundle(args.data_dir), args.scenarios,
+                                args.alternatives, args.cache_size,
+                                args.check_interval)
+    server = get_server(service, args.host, args.port, args.quiet)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
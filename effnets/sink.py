@@ -0,0 +1,253 @@
+"""
+Columnar results written while they are produced. Ratings, performance matrices and
+weightings are appended to a sink, which buffers a bounded number of rows and writes
+them as Parquet or Arrow IPC files partitioned by scenario and weighting:
+
+    <output_dir>/end_rating/scenario=1/weighting=DSO/part-00000.parquet
+    <output_dir>/result_matrix/scenario=1/part-00000.parquet
+    <output_dir>/weighting/weighting=DSO/part-00000.parquet
+
+Arrow IPC files (format "arrow") are memory-mapped when read with read_results, so
+that the values are loaded without copies. Both formats require pyarrow.
+"""
+import glob
+import os
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+# partition columns of every output, see ResultsWriter
+PARTITIONS = {"end_rating": ["Scenario", "Weighting"],
+              "result_matrix": ["Scenario"],
+              "weighting": ["Weighting"]}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Writing and reading parquet or arrow files requires "
+                          "pyarrow.")
+    return pyarrow
+
+
+def _get_partition_dir(columns, values):
+    # hive-style directory names, values are percent-encoded
+    return os.path.join(*[f"{column.lower()}={quote(str(value), safe='')}"
+                          for column, value in zip(columns, values)])
+
+
+class ResultsWriter:
+    """
+    Sink of the outputs of the framework. Records are buffered per partition and
+    written as soon as buffer_rows rows are buffered in total, every write adds a new
+    part file to the buffered partitions. Larger blocks of records are split, so that
+    the buffer never holds more than buffer_rows rows. Part files of an output written
+    by a previous run are removed when the writer first writes the output. Use as
+    context manager or call close to write the remaining records.
+
+    :param output_dir: str
+    :param format: str
+        "parquet" (default) or "arrow" (Arrow IPC file format)
+    :param buffer_rows: int
+        maximum number of buffered rows
+    """
+    def __init__(self, output_dir, format="parquet", buffer_rows=65536):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format}, valid formats are "
+                             f"{list(FORMATS)}.")
+        self.output_dir = output_dir
+        self.format = format
+        self.buffer_rows = buffer_rows
+        self.files = []
+        self._buffers = {}
+        self._buffered_rows = 0
+        self._parts = {}
+        self._outputs = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, output, records):
+        """
+        Add records of an output, see PARTITIONS.
+
+        :param output: str
+        :param records: pd.DataFrame
+            records with the partition columns of the output
+        """
+        columns = PARTITIONS[output]
+        start = 0
+        while start < len(records):
+            stop = start + self.buffer_rows - self._buffered_rows
+            for values, partition in records.iloc[start:stop].groupby(columns,
+                                                                      sort=False):
+                key = (output, _get_partition_dir(columns, values))
+                self._buffers.setdefault(key, []).append(partition)
+                self._buffered_rows += len(partition)
+            start = stop
+            if self._buffered_rows >= self.buffer_rows:
+                self.flush()
+
+    def write_ratings(self, ratings, alternative_names=None):
+        """
+        Append ratings, partitioned by scenario and weighting.
+
+        :param ratings: results.Ratings
+        :param alternative_names: list of str or None (default)
+            names of the alternatives, defaults to the alternative labels
+        """
+        nr_scenarios, nr_alternatives, nr_weightings = ratings.shape
+        alternatives = np.asarray(ratings.alternatives)
+        names = np.asarray(ratings.alternatives if alternative_names is None else
+                           alternative_names, dtype=str)
+        # scenarios first, weightings last as in ratings.values
+        self.append("end_rating", pd.DataFrame({
+            "Scenario": np.repeat(ratings.scenarios, nr_alternatives * nr_weightings),
+            "Weighting": np.tile(np.asarray(ratings.weightings, dtype=str),
+                                 nr_scenarios * nr_alternatives),
+            "Alternative": np.tile(np.repeat(alternatives, nr_weightings),
+                                   nr_scenarios),
+            "Network Tariff": np.tile(np.repeat(names, nr_weightings), nr_scenarios),
+            "Rating": ratings.values.ravel()}))
+
+    def write_performance(self, performance, alternative_names=None):
+        """
+        Append performance matrices, partitioned by scenario.
+
+        :param performance: engine.PerformanceMatrix
+        :param alternative_names: list of str or None (default)
+            names of the alternatives, defaults to the alternative labels
+        """
+        nr_scenarios, nr_alternatives, nr_criteria = performance.shape
+        alternatives = np.asarray(performance.alternatives)
+        names = np.asarray(performance.alternatives if alternative_names is None else
+                           alternative_names, dtype=str)
+        self.append("result_matrix", pd.DataFrame({
+            "Scenario": np.repeat(performance.scenarios,
+                                  nr_alternatives * nr_criteria),
+            "Alternative": np.tile(np.repeat(alternatives, nr_criteria),
+                                   nr_scenarios),
+            "Network Tariff": np.tile(np.repeat(names, nr_criteria), nr_scenarios),
+            "Criterion": np.tile(np.asarray(performance.criteria, dtype=str),
+                                 nr_scenarios * nr_alternatives),
+            "Value": performance.values.ravel()}))
+
+    def write_weights(self, weights):
+        """
+        Append weightings of the criteria, partitioned by weighting.
+
+        :param weights: pd.DataFrame
+            index: weightings, columns: criteria, e.g. output of
+            get_relative_weights_stakeholder
+        """
+        nr_weightings, nr_criteria = weights.shape
+        self.append("weighting", pd.DataFrame({
+            "Weighting": np.repeat(weights.index.astype(str), nr_criteria),
+            "Criterion": np.tile(weights.columns.astype(str), nr_weightings),
+            "Weight": weights.to_numpy(float).ravel()}))
+
+    @instrument
+    def flush(self):
+        """
+        Write all buffered records, one new part file per partition.
+        """
+        for (output, partition_dir), frames in self._buffers.items():
+            if output not in self._outputs:
+                self._clear(output)
+                self._outputs.add(output)
+            directory = os.path.join(self.output_dir, output, partition_dir)
+            part = self._parts.get(directory, 0)
+            self._parts[directory] = part + 1
+            path = os.path.join(directory, f"part-{part:05d}{FORMATS[self.format]}")
+            self._write(pd.concat(frames, ignore_index=True), path)
+            self.files.append(path)
+        self._buffers = {}
+        self._buffered_rows = 0
+
+    def _clear(self, output):
+        # part files of a previous run are replaced by the parts of this writer
+        for path in glob.glob(os.path.join(self.output_dir, output, "**", "part-*"),
+                              recursive=True):
+            os.remove(path)
+
+    def _write(self, records, path):
+        pa = _import_pyarrow()
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(records, preserve_index=False)
+        # the part is written to a temporary file first so that readers never see a
+        # partial part, the name does not match the pattern of the parts
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        if self.format == "parquet":
+            pa.parquet.write_table(table, tmp_path)
+        else:
+            with pa.ipc.new_file(tmp_path, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.flush()
+
+
+@instrument
+def read_results(output_dir, output, scenarios=None, weightings=None):
+    """
+    Read an output written by ResultsWriter. Only the partitions of the given
+    scenarios and weightings are read, Arrow IPC files are memory-mapped.
+
+    :param output_dir: str
+    :param output: str
+        "end_rating", "result_matrix" or "weighting"
+    :param scenarios: list of int or None (default)
+        scenarios to be read, defaults to all
+    :param weightings: list of str or None (default)
+        weightings to be read, defaults to all
+    :return: pd.DataFrame
+    """
+    pa = _import_pyarrow()
+    tables = []
+    for path in get_part_paths(output_dir, output, scenarios, weightings):
+        if path.endswith(FORMATS["arrow"]):
+            tables.append(pa.ipc.open_file(pa.memory_map(path)).read_all())
+        else:
+            tables.append(pa.parquet.read_table(path, memory_map=True))
+    if not tables:
+        raise FileNotFoundError(f"No results of {output} found in {output_dir}.")
+    return pa.concat_tables(tables).to_pandas()
+
+
+def get_part_paths(output_dir, output, scenarios=None, weightings=None):
+    """
+    Part files of the given scenarios and weightings of an output written by
+    ResultsWriter.
+
+    :param output_dir: str
+    :param output: str
+    :param scenarios: list of int or None (default)
+        scenarios to be read, defaults to all
+    :param weightings: list of str or None (default)
+        weightings to be read, defaults to all
+    :return: list of str
+    """
+    selection = {"Scenario": scenarios, "Weighting": weightings}
+    # one directory pattern per combination of the selected partitions
+    directories = [os.path.join(output_dir, output)]
+    for column in PARTITIONS[output]:
+        values = selection[column]
+        directories = [os.path.join(directory, f"{column.lower()}=*")
+                       if values is None else
+                       os.path.join(directory, _get_partition_dir([column], [value]))
+                       for directory in directories
+                       for value in ([None] if values is None else values)]
+    return [path for directory in directories
+            for path in sorted(glob.glob(os.path.join(directory, "part-*")))]
@@ -1,10 +1,21 @@
+from collections import namedtuple
+import warnings
+
 import numpy as np
-from numpy.linalg import eig
 import pandas as pd
 
 from indicators import add_names_criteria
+from instrumentation import instrument
+
+# Random consistency index by Saaty for matrices with 1 to 10 criteria
+RANDOM_INDEX = np.array([0., 0., 0., 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49])
 
+AHPResult = namedtuple(
+    "AHPResult",
+    ["priorities", "lambda_max", "consistency_index", "consistency_ratio"])
 
+
+@instrument
 def get_relative_weights_stakeholder(weighting_dict, stakeholder):
     """
     Method to extract relative weights with pairwise comparison of stakehodler
@@ -12,8 +23,11 @@ def get_relative_weights_stakeholder(weighting_dict, stakeholder):
 
 
     :param weighting_dict: dict
-
-    :param stakeholder:
+        Dictionary with pairwise comparison matrices "Main" (3x3) and
+        "Political Objectives" (2x2), see data.expert_weighting. For a panel of N
+        respondents, stacked matrices of shape (N, 3, 3) and (N, 2, 2) can be given.
+    :param stakeholder: str or list of str
+        name of stakeholder, list of N names for stacked matrices
     :return: pd.DataFrame
         column names: see addnames()
         index: input stakeholder
@@ -22,10 +36,33 @@ def get_relative_weights_stakeholder(weighting_dict, stakeholder):
         weighting_dict["Main"],
         weighting_dict["Political Objectives"]
     ))
-    weights['Stakeholder'] = [stakeholder]
+    weights['Stakeholder'] = \
+        [stakeholder] if np.ndim(weighting_dict["Main"]) == 2 else list(stakeholder)
     return weights.set_index("Stakeholder")
 
 
+@instrument
+def get_consistency_ratios_stakeholder(weighting_dict, stakeholder):
+    """
+    Method to extract consistency ratios of the pairwise comparisons of stakeholder
+    representatives. Ratios above 0.1 are usually considered inconsistent.
+
+    :param weighting_dict: dict
+        see get_relative_weights_stakeholder
+    :param stakeholder: str or list of str
+        see get_relative_weights_stakeholder
+    :return: pd.DataFrame
+        column names: "Main", "Political Objectives"
+        index: input stakeholder
+    """
+    stakeholders = \
+        [stakeholder] if np.ndim(weighting_dict["Main"]) == 2 else list(stakeholder)
+    return pd.DataFrame(
+        {comparison: solve_priorities(weighting_dict[comparison]).consistency_ratio
+         for comparison in ["Main", "Political Objectives"]},
+        index=pd.Index(stakeholders, name="Stakeholder"))
+
+
 def priorities(pairwise_comparison_matrix):
     """
     Method to extract rated eigenvector for weighting
@@ -49,11 +86,56 @@ def priorities(pairwise_comparison_matrix):
         Relative weights of N criteria, in example above for [a, b]
         [0.75, 0.25]
     """
-    # Eigenvector resulting in criteria's weights
-    eig_vec = eig(pairwise_comparison_matrix)[1][:, 0]
-    rated_eig_vec = eig_vec / eig_vec.sum()
-    rated_eig_vec = np.real(rated_eig_vec)
-    return rated_eig_vec
+    # Principal eigenvector resulting in criteria's weights
+    return solve_priorities(pairwise_comparison_matrix).priorities[0]
+
+
+@instrument
+def solve_priorities(pairwise_comparison_matrices, tol=1e-12, max_iter=1000):
+    """
+    Method to extract rated principal eigenvectors and consistency measures of
+    several pairwise comparison matrices at once. The principal eigenvectors are
+    determined by power iteration, which converges for positive matrices.
+
+    :param pairwise_comparison_matrices: np.array
+        array of shape (M, N, N) with M pairwise comparison matrices of N criteria or
+        single NxN-matrix, see priorities()
+    :param tol: float
+        maximum change of the priorities in the last iteration
+    :param max_iter: int
+        maximum number of iterations
+    :return: AHPResult
+        priorities: relative weights of N criteria, shape (M, N)
+        lambda_max: principal eigenvalues, shape (M,)
+        consistency_index: (lambda_max - N) / (N - 1), shape (M,)
+        consistency_ratio: consistency index divided by random index, shape (M,)
+    """
+    matrices = np.asarray(pairwise_comparison_matrices, dtype=float)
+    if matrices.ndim == 2:
+        matrices = matrices[None]
+    nr_criteria = matrices.shape[-1]
+    rated_eig_vec = np.full(matrices.shape[:2], 1 / nr_criteria)
+    for _ in range(max_iter):
+        product = np.einsum("mij,mj->mi", matrices, rated_eig_vec)
+        new_eig_vec = product / product.sum(axis=-1, keepdims=True)
+        converged = np.abs(new_eig_vec - rated_eig_vec).max() <= tol
+        rated_eig_vec = new_eig_vec
+        if converged:
+            break
+    else:
+        warnings.warn(f"Power iteration did not converge within {max_iter} "
+                      f"iterations.", stacklevel=2)
+    # priorities sum up to 1, sum of A*w therefore equals lambda_max
+    lambda_max = np.einsum("mij,mj->m", matrices, rated_eig_vec)
+    if nr_criteria > 1:
+        consistency_index = (lambda_max - nr_criteria) / (nr_criteria - 1)
+    else:
+        consistency_index = np.zeros_like(lambda_max)
+    random_index = RANDOM_INDEX[nr_criteria] if nr_criteria < len(RANDOM_INDEX) \
+        else RANDOM_INDEX[-1]
+    consistency_ratio = consistency_index / random_index if random_index > 0 \
+        else np.zeros_like(consistency_index)
+    return AHPResult(rated_eig_vec, lambda_max, consistency_index, consistency_ratio)
 
 
 def extract_weights(pairwise_comparison_main,
@@ -61,11 +143,11 @@ def extract_weights(pairwise_comparison_main,
     """
     Method to extract relative weights from comparison matrices.
 
-    :param pairwise_comparison_main: np.array (3x3)
+    :param pairwise_comparison_main: np.array (3x3 or Mx3x3)
         Comparison matrix for main criteria:
         (i) efficient grid, (ii) fairness and customer acceptance,
         (iii) consistency with political objectives
-    :param pairwise_comparison_political_objectives: np.array (2x2)
+    :param pairwise_comparison_political_objectives: np.array (2x2 or Mx2x2)
         Comparison matrix for sub-criteria with respect to consistency with political
         objectives
         (i) expansion of DER, (ii) efficient electricity usage
@@ -77,17 +159,42 @@ def extract_weights(pairwise_comparison_main,
         3: expansion of DER
         4: efficient electricity usage
     """
-    # initialise weights
-    weights = np.ones([1, 4])
-    # extract priorities for main- and sub-criteria
-    priorities_main = priorities(pairwise_comparison_main)
-    priorities_pol_objectives = priorities(pairwise_comparison_political_objectives)
-    # combine weights of main and sub-criteria
-    weights[0, 0] = priorities_main[0]
-    weights[0, 1] = priorities_main[1]
-    weights[0, 2] = priorities_pol_objectives[0] * priorities_main[2]
-    weights[0, 3] = priorities_pol_objectives[1] * priorities_main[2]
-    weights = pd.DataFrame(weights)
+    weights = pd.DataFrame(extract_weights_batch(
+        pairwise_comparison_main, pairwise_comparison_political_objectives))
     return weights
 
 
+def priorities_batch(pairwise_comparison_matrices):
+    """
+    Method to extract rated principal eigenvectors of several pairwise comparison
+    matrices at once, see priorities().
+
+    :param pairwise_comparison_matrices: np.array
+        array of shape (M, N, N) with M pairwise comparison matrices of N criteria
+    :return: np.array
+        Relative weights of N criteria for all M matrices, shape (M, N)
+    """
+    return solve_priorities(pairwise_comparison_matrices).priorities
+
+
+@instrument
+def extract_weights_batch(pairwise_comparison_main,
+                          pairwise_comparison_political_objectives):
+    """
+    Method to extract relative weights from several sets of comparison matrices at
+    once, see extract_weights().
+
+    :param pairwise_comparison_main: np.array (Mx3x3 or 3x3)
+        Comparison matrices for main criteria
+    :param pairwise_comparison_political_objectives: np.array (Mx2x2 or 2x2)
+        Comparison matrices for sub-criteria with respect to consistency with
+        political objectives
+    :return: np.array (Mx4)
+        Relative weights of all criteria, columns in the order of names_criteria()
+    """
+    priorities_main = priorities_batch(pairwise_comparison_main)
+    priorities_pol_objectives = \
+        priorities_batch(pairwise_comparison_political_objectives)
+    return np.concatenate([
+        priorities_main[:, :2],
+        priorities_pol_objectives * priorities_main[:, 2:3]], axis=1)
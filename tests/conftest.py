@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+EFFNETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "effnets")
+sys.path.insert(0, EFFNETS_DIR)
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    # tracked input files only, the compiled cache of the workbook is written here
+    # instead of to effnets/data
+    from inputs import DATA_DIR
+    data_dir = tmp_path_factory.mktemp("data")
+    for name in ["inputdata_new.xlsx", "cost_contribution_ur.csv",
+                 "pv_cost_reduction.csv"]:
+        shutil.copy2(DATA_DIR / name, data_dir / name)
+    return data_dir
+
+
+@pytest.fixture(scope="session")
+def dt(data_dir):
+    from data.data_preparation import import_data
+    return import_data(str(data_dir / "inputdata_new.xlsx"))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from data.aggregation import aggregate_simulation_results, INPUT_COLUMNS
+from data.data_preparation import DERIVED_COLUMNS
+
+
+def test_aggregation_independent_of_chunks():
+    rng = np.random.default_rng(0)
+    timesteps = pd.date_range("2021-01-01", periods=24 * 60, freq="h")
+    results = pd.concat([pd.DataFrame({
+        "Scenario": scenario, "Alternative": alternative, "Customer": customer,
+        "Customer Group": customer % 3 + 1, "Timestep": timesteps,
+        "Power": 5 * rng.random(len(timesteps)), "Cost": rng.random(len(timesteps))})
+        for scenario in [1, 2] for alternative in [1, 2] for customer in range(10)],
+        ignore_index=True)
+    dt = aggregate_simulation_results([results])
+    dt_chunks = aggregate_simulation_results(
+        [results.iloc[start:start + 5000] for start in range(0, len(results), 5000)])
+    assert list(dt.columns) == INPUT_COLUMNS + list(DERIVED_COLUMNS)
+    pd.testing.assert_frame_equal(dt.data, dt_chunks.data)
+    shares = dt.data.groupby(["Scenario", "Alternative"])[
+        ["Group Share", "Cost Share", "Peak Share", "Energy Share"]].sum()
+    assert np.allclose(shares, 100)
+
+
+def test_aggregation_of_tiny_input():
+    # customers 0 and 2 in group 1, customer 1 in group 2, two hourly timesteps
+    results = pd.DataFrame({
+        "Scenario": 1, "Alternative": 1, "Customer": [0, 0, 1, 1, 2, 2],
+        "Customer Group": [1, 1, 2, 2, 1, 1],
+        "Timestep": ["2021-01-01 00:00", "2021-01-01 01:00"] * 3,
+        "Power": [3., 1., 1., 4., 2., 2.], "Cost": 1.})
+    dt = aggregate_simulation_results(
+        [results.iloc[[row]] for row in range(len(results))])
+    # total load 6 and 7 kW, coincident peak in the second hour
+    assert dt.array("Simultaneous Peak").tolist() == [3., 4.]
+    assert dt.array("Aggregated Simultaneous Peak").tolist() == [5., 4.]
+    # smallest capacity tiers covering the peaks 3, 2 and 4 kW are 3, 3 and 5 kW
+    assert dt.array("Contracted Capacity").tolist() == [6., 5.]
+    assert dt.array("Electricity Purchased").tolist() == [8., 5.]
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from cli import main
+
+
+def test_run_file_with_selection(data_dir, tmp_path):
+    run_file = tmp_path / "run.toml"
+    run_file.write_text(f'data_dir = "{data_dir.as_posix()}"\n'
+                        'output_dir = "out"\n'
+                        'cache_dir = ""\n'
+                        '[weights]\n'
+                        '"Grid Only" = [1, 0, 0, 0]\n'
+                        '[selection]\n'
+                        'scenarios = [2]\n'
+                        'stakeholders = ["Grid Only"]\n')
+    assert main([str(run_file), "--alternatives", "1", "3",
+                 "--outputs", "end_rating", "result_matrix"]) == 0
+    ratings = pd.read_csv(tmp_path / "out" / "end_rating.csv", index_col=0)
+    performance = pd.read_csv(tmp_path / "out" / "result_matrix.csv", index_col=0)
+    assert list(ratings["Network Tariff"]) == ["Volumetric Tariff", "Yearly Power Peak"]
+    assert ratings["Grid Only"].tolist() == \
+        performance.loc["Efficient Grid", ["Volumetric Tariff",
+                                           "Yearly Power Peak"]].tolist()
+    assert not (tmp_path / "out" / "weighting.csv").exists()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_preparation import get_month_starts, get_tariff_cost_drivers, \
+    iter_combined_profiles, ProfileStore, Dataset, \
+    determine_usage_and_capacity_related_cost_contributions
+
+
+def test_tariff_cost_drivers():
+    index = pd.date_range("2021-01-01", periods=8760, freq="h")
+    profiles = pd.DataFrame(
+        12 * np.random.default_rng(0).random((len(index), 5)), index=index)
+    month_starts = get_month_starts(index)
+    assert len(month_starts) == 12
+    assert np.allclose(get_tariff_cost_drivers(profiles, "VT"), profiles.sum())
+    assert np.allclose(get_tariff_cost_drivers(profiles, "MPT", month_starts),
+                       profiles.groupby(profiles.index.month).max().sum())
+    assert np.allclose(get_tariff_cost_drivers(profiles, "YPT"), profiles.max())
+    assert np.allclose(get_tariff_cost_drivers(profiles, "CT"), 10 * 1.44)
+
+
+def test_combined_profiles_cover_cross_product():
+    rng = np.random.default_rng(0)
+    households, pv, ev = rng.random((24, 3)), -rng.random((24, 2)), rng.random((24, 4))
+    chunks = list(iter_combined_profiles([households, pv, ev], chunk_size=5))
+    combinations = np.concatenate([chunk[0] for chunk in chunks])
+    combined_profiles = np.concatenate([chunk[1] for chunk in chunks], axis=1)
+    assert len(chunks) == 5
+    assert len(np.unique(combinations, axis=0)) == 3 * 2 * 4
+    assert np.allclose(
+        combined_profiles,
+        np.maximum(households[:, combinations[:, 0]] + pv[:, combinations[:, 1]] +
+                   ev[:, combinations[:, 2]], 0))
+
+
+def test_profile_store(tmp_path):
+    index = pd.date_range("2021-01-01", periods=8760, freq="h")
+    profiles = pd.DataFrame(np.random.default_rng(0).random((len(index), 3)),
+                            index=index, columns=["C1", "C2", "C3"])
+    ProfileStore.create(tmp_path, {"household": profiles})
+    profile_store = ProfileStore(tmp_path)
+    assert isinstance(profile_store["household"], np.memmap)
+    assert not profile_store["household"].flags.writeable
+    assert np.array_equal(profile_store.month_starts, get_month_starts(index))
+    pd.testing.assert_frame_equal(profile_store.frame("household", ["C2"]),
+                                  profiles[["C2"]].astype(np.float32),
+                                  check_freq=False)
+
+
+def test_dataset_is_derived_once_and_frozen():
+    data = pd.DataFrame({
+        "Scenario": [2, 2, 1, 1], "Alternative": 1, "Customer Group": [1, 2, 1, 2],
+        "Group Share": [80., 20., 80., 20.], "Cost Share": [40., 60., 60., 40.],
+        "Simultaneous Peak": [2., 2., 3., 1.]})
+    dt = Dataset(data)
+    assert "Relative Cost Share" not in data.columns
+    assert np.allclose(dt.array("Relative Cost Share"), [0.75, 2., 0.5, 3.])
+    assert np.allclose(dt.references([1, 2], "Simultaneous Peak"), [4., 4.])
+    assert dt.reference(2, "Relative Cost Share") == 0.5
+    assert not dt.array("Cost Share").flags.writeable
+    with pytest.raises(TypeError):
+        dt["Relative Cost Share"] = 1.
+    with pytest.raises(AttributeError):
+        dt.data = data
+
+
+def test_cost_contributions_in_memory_match_csv(dt, data_dir, tmp_path):
+    from inputs import InputBundle, read_cost_contribution_ur
+    cost_contribution_ur, cost_contribution_cr = \
+        determine_usage_and_capacity_related_cost_contributions(
+            dt, file_path=tmp_path / "cost_contribution_ur.csv")
+    inputs = InputBundle(data_dir)
+    expected = inputs.cost_contribution_ur
+    assert inputs.cost_contribution_cr is inputs.cost_contribution_cr
+    np.testing.assert_allclose(cost_contribution_ur, expected, atol=1e-15)
+    np.testing.assert_allclose(cost_contribution_ur + cost_contribution_cr, 1)
+    np.testing.assert_allclose(
+        read_cost_contribution_ur(tmp_path / "cost_contribution_ur.csv"), expected)
+    np.testing.assert_allclose(InputBundle(data_dir, ur_base=0.41).cost_contribution_ur,
+                               expected, atol=1e-15)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+from data.data_preparation import \
+    determine_usage_and_capacity_related_cost_contributions, \
+    determine_proxy_of_cost_reduction_der, get_cost_reduction_der_cube
+from engine import get_performance_matrix
+from indicators import add_names_criteria
+from inputs import InputBundle
+from results import get_results, rate_many, sweep_cost_split
+
+
+def test_performance_matrix_matches_indicators(dt):
+    performance_matrix = get_performance_matrix(dt)
+    assert performance_matrix.shape == (4, 4, 4)
+    for idx_scenario in dt.scenarios:
+        expected = np.stack([
+            ind.get_efficient_grid(dt, idx_scenario, 4).values,
+            ind.get_fairness(dt, idx_scenario, 4).values,
+            ind.get_expansion_der(dt, idx_scenario, 4).values,
+            ind.get_efficient_electricity_usage(dt, idx_scenario, 4).values])
+        np.testing.assert_allclose(
+            performance_matrix.scenario(idx_scenario).values, expected, rtol=1e-12)
+
+
+def test_performance_matrix_selection(dt):
+    performance_matrix = get_performance_matrix(dt)
+    selection = get_performance_matrix(dt, scenarios=[3, 2], alternatives=[4, 2])
+    np.testing.assert_array_equal(
+        selection.values, performance_matrix.select([3, 2], [4, 2]).values)
+
+
+def test_performance_matrix_missing_scenario(dt):
+    with pytest.raises(KeyError):
+        get_performance_matrix(dt, scenarios=[5])
+
+
+def test_rate_many_matches_get_results(dt):
+    weights = add_names_criteria(pd.DataFrame(
+        np.random.default_rng(0).dirichlet(np.ones(4), size=50)))
+    ratings = rate_many(get_performance_matrix(dt), weights)
+    assert ratings.shape == (4, 4, 50)
+    for weighting in [0, 17, 49]:
+        expected = get_results(dt, 4, 4, weights.loc[[weighting]])
+        np.testing.assert_allclose(ratings.weighting(weighting).values,
+                                   expected.values, rtol=1e-12)
+
+
+def test_performance_matrix_parallel_is_identical(dt):
+    np.testing.assert_array_equal(get_performance_matrix(dt, workers=2).values,
+                                  get_performance_matrix(dt).values)
+
+
+def test_cost_split_sweep_matches_single_evaluation(dt):
+    weights = pd.DataFrame([[1/3, 1/3, 1/6, 1/6], [0.7, 0.1, 0.1, 0.1]],
+                           columns=ind.names_criteria())
+    sweep = sweep_cost_split(dt, [0.2, 0.41], weights)
+    # share of usage-related costs assumed in the input files
+    cost_contribution_ur, _ = \
+        determine_usage_and_capacity_related_cost_contributions(dt)
+    performance = get_performance_matrix(dt, cost_contribution_ur=cost_contribution_ur)
+    np.testing.assert_allclose(sweep.performance[1], performance.values)
+    np.testing.assert_allclose(sweep.ratings[1], rate_many(performance, weights).values)
+    assert not np.allclose(sweep.performance[0, ..., 0], performance.values[..., 0])
+    assert sweep.to_frame().shape == (2 * 4 * 4, 4)
+
+
+def test_scenario_specific_der_cost_reduction(dt, data_dir):
+    cube = get_cost_reduction_der_cube(dt)
+    assert cube.shape == (4 * 4, 4)
+    np.testing.assert_allclose(
+        cube.groupby(level="Consumer Group", sort=False).mean(),
+        determine_proxy_of_cost_reduction_der(dt=dt))
+    inputs = InputBundle(data_dir, der_proxy=True)
+    performance = get_performance_matrix(dt, inputs=inputs)
+    for idx_scenario in dt.scenarios:
+        np.testing.assert_allclose(
+            performance.scenario(idx_scenario).loc["Expansion of DER"],
+            ind.get_expansion_der(dt, idx_scenario, 4, inputs).values)
@@ -0,0 +1,45 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from engine import get_performance_matrix
+import graph as graph_module
+from graph import build_analysis_graph
+from indicators import names_criteria
+from inputs import DATA_DIR, InputBundle
+
+
+def test_graph_recomputes_changed_nodes(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for file in ["inputdata_new.xlsx", "cost_contribution_ur.csv",
+                 "pv_cost_reduction.csv"]:
+        shutil.copy2(DATA_DIR / file, data_dir)
+    weights = pd.DataFrame([[1/3, 1/3, 1/6, 1/6]], columns=names_criteria())
+    graph = build_analysis_graph(weights, InputBundle(data_dir),
+                                 cache_dir=tmp_path / "cache")
+    performance = graph.get("performance")
+    graph.get("ratings")
+    expected = get_performance_matrix(InputBundle(data_dir).dataset,
+                                      inputs=InputBundle(data_dir))
+    assert np.allclose(performance.values, expected.values)
+    # nothing is recomputed without changes
+    graph = build_analysis_graph(weights, InputBundle(data_dir),
+                                 cache_dir=tmp_path / "cache")
+    graph.get("ratings")
+    assert graph.computed == []
+    # changed PV cost reduction only affects Expansion of DER
+    pv_cost_reduction = pd.read_csv(data_dir / "pv_cost_reduction.csv", index_col=0)
+    (0.9 * pv_cost_reduction).to_csv(data_dir / "pv_cost_reduction.csv")
+    graph = build_analysis_graph(weights, InputBundle(data_dir),
+                                 cache_dir=tmp_path / "cache")
+    graph.get("ratings")
+    assert set(graph.computed) == {"segments", "Expansion of DER", "performance",
+                                   "ratings"}
+    # all outputs are recomputed with changed code
+    monkeypatch.setattr(graph_module, "get_code_hash", lambda: "changed")
+    graph = build_analysis_graph(weights, InputBundle(data_dir),
+                                 cache_dir=tmp_path / "cache")
+    graph.get("ratings")
+    assert "Reflection of Costs" in graph.computed
@@ -0,0 +1,57 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+import instrumentation
+from instrumentation import ENABLED, Recorder, instrument
+
+
+def test_disabled_instrumentation_returns_function():
+    def func():
+        pass
+    assert (instrument(func) is func) != ENABLED
+    assert (instrument(rows="result")(func) is func) != ENABLED
+
+
+def test_recorder_self_time():
+    recorder = Recorder()
+
+    def inner(values):
+        time.sleep(0.01)
+        return values
+
+    def outer():
+        return recorder.call("inner", inner, "result", ([1, 2, 3],), {})
+    recorder.call("outer", outer, None, (), {})
+    statistics = recorder.statistics
+    assert statistics["inner"]["calls"] == 1
+    assert statistics["inner"]["rows_scanned"] == 3
+    assert statistics["outer"]["cumulative_time"] >= \
+        statistics["inner"]["cumulative_time"] >= 0.01
+    assert statistics["outer"]["self_time"] < 0.01
+    assert [event["name"] for event in recorder.events] == ["inner", "outer"]
+
+
+def test_recorder_peak_memory(monkeypatch):
+    monkeypatch.setattr(instrumentation, "TRACE_MEMORY", True)
+    recorder = Recorder()
+
+    def inner():
+        # temporary array of 8 MB, freed before returning
+        return np.ones(1000000).sum()
+
+    def outer():
+        np.ones(2000000).sum()
+        return recorder.call("inner", inner, None, (), {})
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        recorder.call("outer", outer, None, (), {})
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    statistics = recorder.statistics
+    assert 8e6 <= statistics["inner"]["bytes_allocated"] < 9e6
+    assert 16e6 <= statistics["outer"]["bytes_allocated"] < 17e6
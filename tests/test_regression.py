@@ -0,0 +1,26 @@
+import numpy as np
+
+from regression import get_correlation_and_slope, get_slope_penalty, SegmentMoments
+
+
+def test_batch_and_streaming_moments_match_per_segment_fit():
+    rng = np.random.default_rng(0)
+    counts = rng.integers(3, 8, 50)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    segment_ids = np.repeat(np.arange(len(counts)), counts)
+    x = rng.random(counts.sum())
+    y = 1e6 + 3 * x + rng.random(counts.sum())
+    correlation, slope = get_correlation_and_slope(x, y, starts=starts)
+    for idx in range(len(counts)):
+        x_segment = x[segment_ids == idx]
+        y_segment = y[segment_ids == idx]
+        assert np.isclose(correlation[idx], np.corrcoef(x_segment, y_segment)[0, 1])
+        assert np.isclose(slope[idx], np.polyfit(x_segment, y_segment, 1)[0])
+    # rows of segments in arbitrary order, added in chunks
+    order = rng.permutation(len(x))
+    moments = SegmentMoments(len(counts))
+    for chunk in np.array_split(order, 7):
+        moments.update(segment_ids[chunk], x[chunk], y[chunk])
+    assert np.allclose(moments.correlation(), correlation)
+    assert np.allclose(moments.slope(), slope)
+    assert np.allclose(get_slope_penalty(np.array([-2., 0.5, 1.])), [0.5, 0.5, 1.])
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.expert_weighting import expert_pairwise_comparison_dict
+from engine import PerformanceMatrix, get_performance_matrix
+from robustness import SAATY_SCALE, get_rank_acceptability, \
+    sample_pairwise_comparisons, get_winning_regions, get_weight_space_acceptability, \
+    sample_weight_simplex, iter_weight_simplex, get_distance_to_rank_reversal, \
+    _project_reversal
+
+
+def test_samples_are_reciprocal_and_on_scale():
+    comparison = expert_pairwise_comparison_dict()["DSO"]["Main"]
+    samples = sample_pairwise_comparisons(
+        comparison, 1000, np.random.default_rng(0), max_step=2)
+    np.testing.assert_allclose(samples * samples.transpose(0, 2, 1), 1)
+    assert np.isin(samples, SAATY_SCALE).all()
+
+
+def test_rank_acceptability_is_reproducible(dt):
+    performance = get_performance_matrix(dt)
+    weighting_dict = expert_pairwise_comparison_dict()
+    acceptability = get_rank_acceptability(
+        performance, weighting_dict, nr_draws=2000, seed=3, chunk_size=500, workers=1)
+    np.testing.assert_allclose(acceptability.sum(axis=1), 1)
+    np.testing.assert_array_equal(
+        acceptability.values,
+        get_rank_acceptability(performance, weighting_dict, nr_draws=2000, seed=3,
+                               chunk_size=500, workers=2).values)
+
+
+def test_weight_space_regions_and_distance_to_rank_reversal(dt):
+    performance = get_performance_matrix(dt, scenarios=[3])
+    values = performance.values[0]
+    regions = get_winning_regions(performance)
+    for (_, alternative), vertices in regions.items():
+        ratings = vertices @ values.T
+        np.testing.assert_allclose(vertices.sum(axis=1), 1)
+        assert (ratings[:, alternative - 1] >= ratings.max(axis=1) - 1e-9).all()
+    acceptability = get_weight_space_acceptability(performance, 100000, seed=0)
+    np.testing.assert_allclose(acceptability.sum(axis=0), 1)
+    weights = pd.DataFrame([[0.4, 0.3, 0.2, 0.1]], index=["Test"],
+                           columns=performance.criteria)
+    distance = get_distance_to_rank_reversal(performance, weights)
+    # closest sampled weighting with a different winner
+    samples = sample_weight_simplex(200000, 4, seed=1)
+    winner = (samples @ values.T).argmax(axis=1) + 1
+    changed = winner != distance.loc[("Test", 3), "Winner"]
+    closest = np.linalg.norm(samples[changed] - weights.to_numpy(), axis=1).min()
+    assert distance.loc[("Test", 3), "Distance to Change of Winner"] <= closest
+    assert closest - distance.loc[("Test", 3), "Distance to Change of Winner"] < 0.02
+
+
+def test_weight_space_limits():
+    with pytest.warns(UserWarning, match="did not converge"):
+        _project_reversal(np.array([[0.7, 0.3]]), np.array([[1., -1.]]), max_iter=1)
+    performance = PerformanceMatrix(np.zeros((1, 200, 4)), [1], range(200))
+    with pytest.raises(ValueError):
+        get_winning_regions(performance)
+    # the grid is generated in chunks and limited in size
+    grid = sample_weight_simplex(1000000, 4, "grid", nr_steps=20)
+    assert len(grid) == 1771
+    np.testing.assert_array_equal(
+        np.concatenate(list(iter_weight_simplex(0, 4, "grid", nr_steps=20,
+                                                chunk_size=100))), grid)
+    with pytest.raises(ValueError):
+        get_weight_space_acceptability(performance, method="grid", nr_steps=1000)
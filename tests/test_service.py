@@ -0,0 +1,45 @@
+import json
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from inputs import DATA_DIR, InputBundle
+from service import EvaluationService, get_server
+
+
+def test_queries_and_reload(tmp_path):
+    for name in ["inputdata_new.xlsx", "cost_contribution_ur.csv",
+                 "pv_cost_reduction.csv"]:
+        shutil.copy2(DATA_DIR / name, tmp_path / name)
+    service = EvaluationService(InputBundle(tmp_path), check_interval=0.)
+    server = get_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = urllib.request.Request(
+            f"{url}/rating", data=json.dumps({"weights": [1, 0, 0, 0]}).encode())
+        with urllib.request.urlopen(request) as response:
+            rating = json.loads(response.read())
+        with urllib.request.urlopen(f"{url}/performance") as response:
+            performance = json.loads(response.read())
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/ranking", data=b"[]"))
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert np.allclose(np.asarray(rating["values"])[:, :, 0],
+                       np.asarray(performance["values"])[:, :, 0])
+    assert service.rank([1, 0, 0, 0]) == service.rank([1, 0, 0, 0])
+    assert service.cache.hits == 1
+    # a changed input file is reloaded with the next query
+    pv_cost_reduction = tmp_path / "pv_cost_reduction.csv"
+    pv_cost_reduction.write_text(pv_cost_reduction.read_text().replace("0.", "0.1"))
+    expansion_der = service.rate([0, 0, 1, 0])["values"]
+    assert service.version == 2
+    assert not np.allclose(expansion_der,
+                           np.asarray(performance["values"])[:, :, 2:3])
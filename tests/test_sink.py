@@ -0,0 +1,61 @@
+import pathlib
+
+import numpy as np
+import pytest
+
+from results import Ratings
+from sink import ResultsWriter, get_part_paths, read_results
+
+
+class RecordingWriter(ResultsWriter):
+    # keeps the written records in memory instead of writing files
+    def _write(self, records, path):
+        self.written = getattr(self, "written", []) + [(path, records)]
+
+
+def get_ratings():
+    values = np.arange(24, dtype=float).reshape(2, 4, 3)
+    return Ratings(values, [1, 2], [1, 2, 3, 4], ["DSO", "Equal Weights", "A/B"])
+
+
+def test_buffer_is_bounded_and_partitioned(tmp_path):
+    # part of a previous run
+    stale = tmp_path / "end_rating" / "scenario=3" / "weighting=DSO" / "part-00005.arrow"
+    stale.parent.mkdir(parents=True)
+    stale.touch()
+    writer = RecordingWriter(tmp_path, "arrow", buffer_rows=10)
+    with writer:
+        writer.write_ratings(get_ratings())
+        assert writer._buffered_rows == 4
+        writer.write_ratings(get_ratings())
+    # 48 rows written in flushes of at most 10 rows
+    assert sum(len(records) for _, records in writer.written) == 48
+    assert max(len(records) for _, records in writer.written) <= 10
+    assert writer._buffered_rows == 0
+    assert not stale.exists()
+    paths = [path for path, _ in writer.written]
+    assert str(tmp_path / "end_rating" / "scenario=2" / "weighting=A%2FB" /
+               "part-00000.arrow") in paths
+    for path in paths:
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        pathlib.Path(path).touch()
+    assert get_part_paths(tmp_path, "end_rating", scenarios=[2],
+                          weightings=["A/B"]) == \
+        [path for path in sorted(paths) if "scenario=2/weighting=A%2FB" in path]
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_ratings_are_read_back(tmp_path, format):
+    pytest.importorskip("pyarrow")
+    ratings = get_ratings()
+    with ResultsWriter(tmp_path, format, buffer_rows=1) as writer:
+        writer.write_ratings(ratings)
+    # a rerun with fewer parts replaces all parts of the first run
+    with ResultsWriter(tmp_path, format, buffer_rows=100) as writer:
+        writer.write_ratings(ratings)
+        writer.write_ratings(ratings)
+    assert not list(tmp_path.rglob(".*.tmp"))
+    result = read_results(tmp_path, "end_rating", scenarios=[2],
+                          weightings=["A/B"])
+    assert result["Rating"].tolist() == 2 * ratings.values[1, :, 2].tolist()
+    assert set(result["Weighting"]) == {"A/B"}
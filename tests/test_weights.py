@@ -0,0 +1,38 @@
+import numpy as np
+
+from data.expert_weighting import expert_pairwise_comparison_dict
+from weights import get_relative_weights_stakeholder, priorities, solve_priorities
+
+
+def test_priorities_example():
+    np.testing.assert_allclose(priorities(np.array([[1, 3], [1/3, 1]])), [0.75, 0.25])
+
+
+def test_solve_priorities_matches_principal_eigenvector():
+    rng = np.random.default_rng(0)
+    matrices = np.exp(rng.normal(size=(200, 4, 4)))
+    matrices = np.triu(matrices, 1)
+    matrices = matrices + 1 / np.where(matrices == 0, np.inf, matrices).transpose(
+        0, 2, 1) + np.eye(4)
+    result = solve_priorities(matrices)
+    eig_val, eig_vec = np.linalg.eig(matrices)
+    idx_principal = np.argmax(eig_val.real, axis=-1)
+    eig_vec = np.take_along_axis(eig_vec, idx_principal[:, None, None], -1)[..., 0].real
+    np.testing.assert_allclose(result.priorities,
+                               eig_vec / eig_vec.sum(axis=-1, keepdims=True), atol=1e-10)
+    np.testing.assert_allclose(result.lambda_max, eig_val.real.max(axis=-1))
+    np.testing.assert_allclose(result.consistency_ratio,
+                               (result.lambda_max - 4) / 3 / 0.9)
+
+
+def test_relative_weights_of_panel():
+    weighting_dict = expert_pairwise_comparison_dict()
+    panel = {comparison: np.stack([weighting_dict[stakeholder][comparison]
+                                   for stakeholder in weighting_dict])
+             for comparison in ["Main", "Political Objectives"]}
+    weights_panel = get_relative_weights_stakeholder(panel, list(weighting_dict))
+    for stakeholder in weighting_dict:
+        np.testing.assert_allclose(
+            weights_panel.loc[[stakeholder]].values,
+            get_relative_weights_stakeholder(
+                weighting_dict[stakeholder], stakeholder).values)